@@ -1,6 +1,26 @@
 # apps/academic/admin.py
 from django.contrib import admin
-from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject
+from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject, GradeBoundary
+
+
+class RelatedListFilter(admin.RelatedFieldListFilter):
+    """
+    Foreign key filter whose choices are read with the related model admin's
+    list_select_related, so a __str__ that follows relations (Term -> academic
+    year) costs one query for all choices instead of one per choice.
+    """
+
+    def field_choices(self, field, request, model_admin):
+        related_admin = model_admin.admin_site._registry.get(field.related_model)
+        related = related_admin.list_select_related if related_admin else ()
+        if not related or related is True:
+            return super().field_choices(field, request, model_admin)
+        queryset = field.related_model._default_manager.select_related(*related)
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return [(obj.pk, str(obj)) for obj in queryset]
+
 
 @admin.register(AcademicYear)
 class AcademicYearAdmin(admin.ModelAdmin):
@@ -11,6 +31,7 @@ class AcademicYearAdmin(admin.ModelAdmin):
 class TermAdmin(admin.ModelAdmin):
     list_display = ['name', 'academic_year', 'sequence', 'start_date', 'end_date']
     list_filter = ['academic_year']
+    list_select_related = ['academic_year']
 
 @admin.register(Curriculum)
 class CurriculumAdmin(admin.ModelAdmin):
@@ -21,14 +42,23 @@ class CurriculumAdmin(admin.ModelAdmin):
 class SubjectAdmin(admin.ModelAdmin):
     list_display = ['code', 'name', 'curriculum']
     list_filter = ['curriculum']
+    list_select_related = ['curriculum']
     search_fields = ['code', 'name']
 
 @admin.register(Cohort)
 class CohortAdmin(admin.ModelAdmin):
     list_display = ['name', 'level', 'curriculum', 'academic_year']
     list_filter = ['curriculum', 'academic_year']
+    list_select_related = ['curriculum', 'academic_year']
 
 @admin.register(CohortSubject)
 class CohortSubjectAdmin(admin.ModelAdmin):
     list_display = ['cohort', 'subject', 'is_compulsory']
-    list_filter = ['cohort', 'is_compulsory']
\ No newline at end of file
+    list_filter = ['cohort', 'is_compulsory']
+    list_select_related = ['cohort', 'subject']
+
+@admin.register(GradeBoundary)
+class GradeBoundaryAdmin(admin.ModelAdmin):
+    list_display = ['curriculum', 'grade', 'min_score', 'points', 'remark']
+    list_filter = ['curriculum']
+    list_select_related = ['curriculum']
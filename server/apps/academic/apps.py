@@ -4,3 +4,5 @@ from django.apps import AppConfig
 class AcademicConfig(AppConfig):
     name = 'apps.academic'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,40 @@
+# ============================================================================
+# apps/academic/caching.py
+# Process-local caches kept coherent across workers
+# ============================================================================
+
+import uuid
+
+from django.core.cache import cache
+
+
+class ProcessLocalCache:
+    """
+    A per-process dict for small, rarely changing reference data.
+
+    Entries live in process memory. A version token in the Django cache is
+    replaced by ``invalidate()``; every process compares it on ``current()``
+    and drops its entries when it changed, so one cache read replaces the
+    database queries.
+    """
+
+    def __init__(self, name):
+        self.version_key = f'{name}:version'
+        self._data = {}
+        self._version = None
+
+    def current(self):
+        """The cached entries, emptied first if another process invalidated them"""
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        if version != self._version:
+            self._data.clear()
+            self._version = version
+        return self._data
+
+    def invalidate(self):
+        """Drop the entries in this and every other process"""
+        self._data.clear()
+        cache.set(self.version_key, uuid.uuid4().hex, None)
@@ -0,0 +1,39 @@
+# ============================================================================
+# apps/academic/db.py
+# Shared database helpers used across apps
+# ============================================================================
+
+from itertools import islice
+
+from django.db import connections, router
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=1000,
+                using=None):
+    """
+    Insert ``objs`` or update the existing rows matching ``unique_fields``.
+
+    MySQL resolves conflicts against every unique key and rejects an explicit
+    conflict target, so ``unique_fields`` is only passed to backends that
+    accept one.
+    """
+    db = using or router.db_for_write(model)
+    features = connections[db].features
+    options = {
+        'update_conflicts': True,
+        'update_fields': update_fields,
+        'batch_size': batch_size,
+    }
+    if features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    return model._default_manager.using(db).bulk_create(objs, **options)
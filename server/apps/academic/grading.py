@@ -0,0 +1,125 @@
+# ============================================================================
+# apps/academic/grading.py
+# Percentage -> grade letter and points, per curriculum
+# ============================================================================
+#
+# A curriculum's boundaries (its GradeBoundary rows, or the built-in table of
+# its CurriculumType) are compiled once into a GradeTable: boundaries sorted
+# ascending in a NumPy array, looked up by binary search. Compiled tables are
+# cached per process and dropped everywhere when boundaries, curricula or
+# subjects change.
+
+import bisect
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS
+
+from .caching import ProcessLocalCache
+from .models import Curriculum, CurriculumType, GradeBoundary, Subject
+
+
+# (grade, lowest percentage, points), highest grade first
+BUILTIN_BOUNDARIES = {
+    CurriculumType.EIGHT_FOUR_FOUR: [
+        ('A', 80, 12), ('A-', 75, 11), ('B+', 70, 10), ('B', 65, 9),
+        ('B-', 60, 8), ('C+', 55, 7), ('C', 50, 6), ('C-', 45, 5),
+        ('D+', 40, 4), ('D', 35, 3), ('D-', 30, 2), ('E', 0, 1),
+    ],
+    CurriculumType.IGCSE: [
+        ('A*', 90, 8), ('A', 80, 7), ('B', 70, 6), ('C', 60, 5),
+        ('D', 50, 4), ('E', 40, 3), ('F', 30, 2), ('G', 20, 1), ('U', 0, 0),
+    ],
+    CurriculumType.CBC: [
+        ('EE', 75, 4), ('ME', 50, 3), ('AE', 25, 2), ('BE', 0, 1),
+    ],
+}
+
+
+@dataclass(frozen=True)
+class GradeTable:
+    """Compiled boundaries of one curriculum, ascending by lowest percentage"""
+    grades: tuple
+    thresholds: np.ndarray
+    points: np.ndarray
+
+    @classmethod
+    def compile(cls, boundaries):
+        """Build a table from (grade, lowest percentage, points) rows in any order"""
+        rows = sorted(boundaries, key=lambda row: row[1])
+        return cls(
+            grades=tuple(grade for grade, _, _ in rows),
+            thresholds=np.array([low for _, low, _ in rows], dtype=float),
+            points=np.array([np.nan if p is None else p for _, _, p in rows], dtype=float),
+        )
+
+    def __bool__(self):
+        return bool(self.grades)
+
+    def grade(self, score):
+        """``(grade, points)`` of one percentage; ``('', None)`` when ungradable"""
+        if not self.grades or score is None or score != score:
+            return '', None
+        index = max(bisect.bisect_right(self.thresholds, score) - 1, 0)
+        points = self.points[index]
+        return self.grades[index], None if np.isnan(points) else float(points)
+
+    def grade_array(self, scores):
+        """
+        Grade a whole array of percentages at once.
+
+        Returns an object array of grades ('' for NaN) and a float array of
+        points (NaN where ungraded). Scores under the lowest boundary get
+        the lowest grade.
+        """
+        scores = np.asarray(scores, dtype=float)
+        if not self.grades:
+            return np.full(scores.shape, '', dtype=object), np.full(scores.shape, np.nan)
+        index = np.clip(np.searchsorted(self.thresholds, scores, side='right') - 1, 0, None)
+        missing = np.isnan(scores)
+        grades = np.array(self.grades, dtype=object)[index]
+        grades[missing] = ''
+        points = np.where(missing, np.nan, self.points[index])
+        return grades, points
+
+
+EMPTY_TABLE = GradeTable.compile([])
+
+_tables = ProcessLocalCache('academic:grading')
+
+
+def invalidate():
+    """Make every process recompile its grade tables on next use"""
+    _tables.invalidate()
+
+
+def table_for_curriculum(curriculum_id, using=DEFAULT_DB_ALIAS):
+    """Compiled GradeTable of a curriculum; empty if it has no boundaries"""
+    tables = _tables.current()
+    table = tables.get(curriculum_id)
+    if table is None:
+        boundaries = list(
+            GradeBoundary.objects.using(using).filter(curriculum_id=curriculum_id)
+            .values_list('grade', 'min_score', 'points')
+        )
+        if not boundaries:
+            curriculum_type = Curriculum.objects.using(using).filter(
+                pk=curriculum_id
+            ).values_list('curriculum_type', flat=True).first()
+            boundaries = BUILTIN_BOUNDARIES.get(curriculum_type, [])
+        table = tables[curriculum_id] = GradeTable.compile(boundaries)
+    return table
+
+
+def table_for_subject(subject_id, using=DEFAULT_DB_ALIAS):
+    """Compiled GradeTable of the curriculum a subject belongs to"""
+    tables = _tables.current()
+    key = ('subject', subject_id)
+    if key not in tables:
+        tables[key] = Subject.objects.using(using).filter(
+            pk=subject_id
+        ).values_list('curriculum_id', flat=True).first()
+    curriculum_id = tables[key]
+    if curriculum_id is None:
+        return EMPTY_TABLE
+    return table_for_curriculum(curriculum_id, using=using)
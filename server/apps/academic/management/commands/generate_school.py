@@ -0,0 +1,96 @@
+# ============================================================================
+# apps/academic/management/commands/generate_school.py
+# Load a synthetic school for scale testing
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academic.models import AcademicYear, CurriculumType
+from apps.academic.synthetic import SchoolGenerator, SchoolSpec
+from apps.reporting.ranking import rank_cohort
+from apps.reporting.rebuild import rebuild_shard
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic school (years, terms, cohorts, students, sessions, "
+        "attendance, assessments, scores, CBC evidence, projects) with bulk "
+        "inserts, then rebuild its reporting summaries."
+    )
+
+    def add_arguments(self, parser):
+        defaults = SchoolSpec()
+        parser.add_argument('--start-year', type=int, default=defaults.start_year)
+        parser.add_argument('--years', type=int, default=defaults.years)
+        parser.add_argument('--terms', type=int, default=defaults.terms,
+                            help="Terms per year")
+        parser.add_argument('--curriculum', action='append', dest='curricula',
+                            choices=CurriculumType.values,
+                            help="Curriculum type (repeatable; default: 8-4-4 and CBC)")
+        parser.add_argument('--cohorts', type=int, default=defaults.cohorts,
+                            help="Cohorts per curriculum and year")
+        parser.add_argument('--students', type=int, default=defaults.students,
+                            help="Students per cohort")
+        parser.add_argument('--subjects', type=int, default=defaults.subjects,
+                            help="Subjects per curriculum")
+        parser.add_argument('--weeks', type=int, default=defaults.weeks,
+                            help="Teaching weeks per term")
+        parser.add_argument('--lessons', type=int, default=defaults.lessons,
+                            help="Lessons per cohort, subject and week")
+        parser.add_argument('--assessments', type=int, default=defaults.assessments,
+                            help="Assessments per subject and term")
+        parser.add_argument('--projects', type=int, default=defaults.projects,
+                            help="Projects per subject and term")
+        parser.add_argument('--milestones', type=int, default=defaults.milestones,
+                            help="Milestones per project")
+        parser.add_argument('--evidence', type=int, default=defaults.evidence,
+                            help="Evidence records per CBC student and term")
+        parser.add_argument('--instructors', type=int, default=defaults.instructors)
+        parser.add_argument('--batch-size', type=int, default=defaults.batch_size)
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument('--no-summaries', action='store_true',
+                            help="Skip rebuilding summaries and class positions")
+
+    def handle(self, *args, **options):
+        spec = SchoolSpec(
+            start_year=options['start_year'],
+            years=options['years'],
+            terms=options['terms'],
+            curricula=tuple(options['curricula'] or SchoolSpec.curricula),
+            cohorts=options['cohorts'],
+            students=options['students'],
+            subjects=options['subjects'],
+            weeks=options['weeks'],
+            lessons=options['lessons'],
+            assessments=options['assessments'],
+            projects=options['projects'],
+            milestones=options['milestones'],
+            evidence=options['evidence'],
+            instructors=options['instructors'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+        )
+        names = [str(spec.start_year + n) for n in range(spec.years)]
+        taken = list(AcademicYear.objects.filter(name__in=names).values_list('name', flat=True))
+        if taken:
+            raise CommandError(
+                f"Academic years {', '.join(taken)} already exist; pick another --start-year."
+            )
+
+        generator = SchoolGenerator(spec, log=lambda message: self.stdout.write(message))
+        counts = generator.generate()
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f"  {label:<32} {count:>12,}")
+
+        if options['no_summaries']:
+            return
+        started = time.perf_counter()
+        rows = sum(rebuild_shard(term_id).grade_rows for term_id in generator.term_ids)
+        for cohort_id, term_id in generator.cohort_terms:
+            rank_cohort(cohort_id, term_id)
+        self.stdout.write(
+            f"Rebuilt {rows} grade summaries and ranked {len(generator.cohort_terms)} "
+            f"cohort terms in {time.perf_counter() - started:.1f}s"
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeBoundary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(max_length=10)),
+                ('min_score', models.FloatField(help_text='Inclusive lower bound, 0-100')),
+                ('points', models.FloatField(blank=True, null=True)),
+                ('remark', models.CharField(blank=True, max_length=100)),
+                ('curriculum', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_boundaries', to='academic.curriculum')),
+            ],
+            options={
+                'verbose_name': 'Grade Boundary',
+                'verbose_name_plural': 'Grade Boundaries',
+                'ordering': ['curriculum', '-min_score'],
+                'unique_together': {('curriculum', 'grade'), ('curriculum', 'min_score')},
+            },
+        ),
+    ]
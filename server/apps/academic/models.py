@@ -158,3 +158,31 @@ class CohortSubject(models.Model):
     def __str__(self):
         return f"{self.cohort.name} - {self.subject.name}"
 
+
+class GradeBoundary(models.Model):
+    """
+    Lowest percentage earning a grade in a curriculum. A curriculum with
+    boundaries uses them instead of the built-in table of its type.
+    """
+    curriculum = models.ForeignKey(
+        Curriculum,
+        on_delete=models.CASCADE,
+        related_name='grade_boundaries'
+    )
+    grade = models.CharField(max_length=10)  # "A", "B+", "EE"
+    min_score = models.FloatField(help_text="Inclusive lower bound, 0-100")
+    points = models.FloatField(null=True, blank=True)
+    remark = models.CharField(max_length=100, blank=True)  # "Excellent"
+    
+    class Meta:
+        unique_together = [['curriculum', 'grade'], ['curriculum', 'min_score']]
+        ordering = ['curriculum', '-min_score']
+        verbose_name = "Grade Boundary"
+        verbose_name_plural = "Grade Boundaries"
+    
+    def __str__(self):
+        return f"{self.grade} >= {self.min_score:g} ({self.curriculum.name})"
+    
+    def clean(self):
+        if self.min_score is not None and not 0 <= self.min_score <= 100:
+            raise ValidationError("Minimum score must be between 0 and 100")
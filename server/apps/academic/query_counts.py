@@ -0,0 +1,163 @@
+# ============================================================================
+# apps/academic/query_counts.py
+# Query-count regression harness for API endpoints and admin changelists
+# ============================================================================
+#
+# A request whose query count grows with the data is an N+1: a list that
+# renders __str__ of a foreign key, a serializer reading a relation per
+# row, a loop issuing one query per item. QueryCountTestCase generates a
+# synthetic school at two sizes, each inside a savepoint that is rolled
+# back, runs the same requests against both and asserts that every request
+# issued the same number of queries.
+#
+# The module doubles as the URLconf of these tests, since the project's
+# URLconf is not part of the apps.
+
+from dataclasses import dataclass
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from rest_framework.test import APIClient
+
+from apps.assessments.models import Assessment, EvaluationType
+from apps.reporting.ranking import rank_cohort
+from apps.reporting.rebuild import rebuild_shard
+
+from .models import Cohort, CohortSubject, CurriculumType
+from .synthetic import SchoolGenerator, SchoolSpec
+
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('api/assessments/', include('apps.assessments.urls')),
+    path('api/reporting/', include('apps.reporting.urls')),
+    path('api/sessions/', include('apps.sessions.urls')),
+]
+
+# Every count that can show up in a list grows between the two sizes.
+SIZES = {
+    'small': SchoolSpec(terms=1, cohorts=1, students=3, subjects=2, weeks=1, lessons=1,
+                        assessments=2, projects=1, milestones=1, evidence=1, instructors=2),
+    'large': SchoolSpec(terms=2, cohorts=2, students=9, subjects=3, weeks=2, lessons=2,
+                        assessments=3, projects=2, milestones=2, evidence=3, instructors=4),
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+@dataclass
+class School:
+    """A generated school and the rows requests are usually made against"""
+    generator: SchoolGenerator
+    client: APIClient
+    cohort: Cohort
+    subject_id: int
+    term_id: int
+    assessment: Assessment
+
+    @property
+    def params(self):
+        """Query parameters selecting the cohort, subject and term"""
+        return {'cohort': self.cohort.pk, 'subject': self.subject_id, 'term': self.term_id}
+
+    @property
+    def students(self):
+        return self.cohort.students.order_by('pk')
+
+
+def build_school(spec):
+    """Generate a school with its summaries and a logged-in superuser client"""
+    generator = SchoolGenerator(spec)
+    generator.generate()
+    for term_id in generator.term_ids:
+        rebuild_shard(term_id)
+    for cohort_id, term_id in generator.cohort_terms:
+        rank_cohort(cohort_id, term_id)
+
+    client = APIClient()
+    client.force_login(get_user_model().objects.create_superuser(
+        email='admin@synthetic.school', password=None, first_name='Admin', last_name='User',
+    ))
+    cohort = Cohort.objects.filter(
+        curriculum__curriculum_type=CurriculumType.EIGHT_FOUR_FOUR
+    ).order_by('pk').first()
+    subject_id = CohortSubject.objects.filter(cohort=cohort).order_by('pk').values_list(
+        'subject_id', flat=True
+    ).first()
+    term_id = generator.term_ids[0]
+    assessment = Assessment.objects.filter(
+        term_id=term_id, subject_id=subject_id, evaluation_type=EvaluationType.NUMERIC,
+    ).order_by('pk').first()
+    return School(generator, client, cohort, subject_id, term_id, assessment)
+
+
+@override_settings(ROOT_URLCONF='apps.academic.query_counts')
+class QueryCountTestCase(TestCase):
+    """
+    Asserts that requests issue as many queries against a large school as
+    against a small one.
+    """
+    sizes = SIZES
+
+    def query_counts(self, requests):
+        """
+        ``{name: {size: captured queries}}`` of ``requests``, a dict of
+        ``name: callable(school)``, run against each size in turn. A callable
+        returns its response, or None when it calls a function directly.
+
+        Commit hooks run inside the capture, so work deferred to on_commit
+        is counted too. Caches are cleared per size so both sizes start
+        equally cold.
+        """
+        captured = {name: {} for name in requests}
+        for size, spec in self.sizes.items():
+            try:
+                with transaction.atomic():
+                    cache.clear()
+                    school = build_school(spec)
+                    for name, request in requests.items():
+                        with CaptureQueriesContext(connection) as queries, \
+                                self.captureOnCommitCallbacks(execute=True):
+                            response = request(school)
+                            # Streaming responses query while being consumed.
+                            if response is not None and response.streaming:
+                                b''.join(response.streaming_content)
+                        if response is not None:
+                            self.assertLess(response.status_code, 400, f"{name}: {response}")
+                        captured[name][size] = queries.captured_queries
+                    raise Rollback
+            except Rollback:
+                pass
+        return captured
+
+    def assertConstantQueries(self, requests):
+        """Every request issues the same number of queries at every size"""
+        for name, by_size in self.query_counts(requests).items():
+            with self.subTest(name):
+                counts = {size: len(queries) for size, queries in by_size.items()}
+                if len(set(counts.values())) > 1:
+                    largest = max(by_size.values(), key=len)
+                    self.fail(f"{name} queries grow with the data: {counts}\n" + "\n".join(
+                        query['sql'] for query in largest
+                    ))
+
+    def assertConstantChangelists(self, app_label):
+        """Every admin changelist of the app issues a constant number of queries"""
+        models = [model for model in admin.site._registry
+                  if model._meta.app_label == app_label]
+        self.assertTrue(models, f"No models of {app_label} are registered with the admin")
+        self.assertConstantQueries({
+            model._meta.label: self._changelist(model) for model in models
+        })
+
+    @staticmethod
+    def _changelist(model):
+        url = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+        return lambda school: school.client.get(url)
@@ -0,0 +1,22 @@
+# ============================================================================
+# apps/academic/signals.py
+# Keep compiled grade tables in step with their sources
+# ============================================================================
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import grading
+from .models import Curriculum, GradeBoundary, Subject
+
+
+@receiver(post_save, sender=GradeBoundary)
+@receiver(post_delete, sender=GradeBoundary)
+@receiver(post_save, sender=Curriculum)
+@receiver(post_delete, sender=Curriculum)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=Subject)
+def grading_source_changed(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Other processes must not recompile the table before the edit is visible
+    transaction.on_commit(grading.invalidate, using=using)
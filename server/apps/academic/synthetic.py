@@ -0,0 +1,538 @@
+# ============================================================================
+# apps/academic/synthetic.py
+# Synthetic school data for scale testing
+# ============================================================================
+#
+# Builds a consistent school — curricula, years, terms, cohorts, students,
+# timetabled sessions with attendance, assessments with scores, CBC strands
+# and evidence, projects with milestones — from a SchoolSpec. Parent rows
+# are few and inserted in batches whose primary keys are recovered where the
+# backend cannot return them (MySQL). Leaf rows (attendance, scores,
+# evidence, milestone scores) are generated with NumPy and streamed into
+# bulk_create in batches, so memory stays bounded whatever the scale.
+#
+# Summary maintenance is suspended while loading; callers rebuild the
+# reporting tables afterwards. Session counters are recounted per term.
+
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, time as dt_time, timedelta
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from apps.assessments.models import (
+    Assessment, AssessmentScore, AssessmentType, EvaluationType, RubricLevel, RubricScale,
+)
+from apps.cbc.models import EvidenceRecord, LearningOutcome, Strand, SubStrand
+from apps.learners.models import Student
+from apps.projects.models import MilestoneScore, Project, ProjectMilestone, ProjectParticipation
+from apps.reporting import attendance, grades
+from apps.sessions import counters
+from apps.sessions.models import (
+    AttendanceRecord, AttendanceStatus, Session, SessionType, venue_key,
+)
+from apps.users.models import User, UserRole
+
+from .db import chunked
+from .models import (
+    AcademicYear, Cohort, CohortSubject, Curriculum, CurriculumType, GradeBoundary, Subject,
+    Term,
+)
+
+
+SUBJECT_NAMES = {
+    CurriculumType.EIGHT_FOUR_FOUR: [
+        'Mathematics', 'English', 'Kiswahili', 'Biology', 'Chemistry', 'Physics',
+        'History', 'Geography', 'CRE', 'Business Studies', 'Agriculture',
+        'Computer Studies',
+    ],
+    CurriculumType.CBC: [
+        'Mathematics', 'English', 'Kiswahili', 'Integrated Science', 'Social Studies',
+        'Pre-Technical Studies', 'Agriculture', 'Creative Arts', 'Religious Education',
+        'Health Education',
+    ],
+    CurriculumType.IGCSE: [
+        'Mathematics', 'English Language', 'Biology', 'Chemistry', 'Physics',
+        'Geography', 'History', 'Economics', 'Computer Science', 'French',
+    ],
+    CurriculumType.CUSTOM: [
+        'Numeracy', 'Literacy', 'Science', 'Humanities', 'Languages', 'Arts',
+    ],
+}
+
+LEVELS = {
+    CurriculumType.EIGHT_FOUR_FOUR: ['Form 1', 'Form 2', 'Form 3', 'Form 4'],
+    CurriculumType.CBC: ['Grade 7', 'Grade 8', 'Grade 9'],
+    CurriculumType.IGCSE: ['Year 9', 'Year 10', 'Year 11'],
+    CurriculumType.CUSTOM: ['Level 1', 'Level 2', 'Level 3'],
+}
+
+CUSTOM_BOUNDARIES = [
+    ('DIST', 75, 4, "Distinction"), ('CR', 60, 3, "Credit"),
+    ('PASS', 40, 2, "Pass"), ('FAIL', 0, 0, "Fail"),
+]
+
+CBC_LEVELS = [
+    ('EE', 'Exceeding Expectations', 4), ('ME', 'Meeting Expectations', 3),
+    ('AE', 'Approaching Expectations', 2), ('BE', 'Below Expectations', 1),
+]
+
+FIRST_NAMES = [
+    'Amani', 'Baraka', 'Chebet', 'Daudi', 'Esther', 'Faith', 'Grace', 'Hassan',
+    'Imani', 'Jabari', 'Kamau', 'Lilian', 'Mwangi', 'Njeri', 'Otieno', 'Pendo',
+    'Rehema', 'Salim', 'Tumaini', 'Wanjiru', 'Zawadi', 'Brian', 'Mercy', 'Kevin',
+]
+LAST_NAMES = [
+    'Achieng', 'Barasa', 'Cheruiyot', 'Gitau', 'Kariuki', 'Kiprop', 'Macharia',
+    'Mutua', 'Njoroge', 'Ochieng', 'Odhiambo', 'Omondi', 'Wafula', 'Wambui',
+    'Wekesa', 'Kimani', 'Mohamed', 'Nyambura', 'Rotich', 'Onyango',
+]
+
+# Chance of each non-present status besides a student's own absence rate
+LATE_RATE, EXCUSED_RATE, SICK_RATE = 0.04, 0.015, 0.01
+
+STATUS_CODES = np.array([
+    AttendanceStatus.PRESENT, AttendanceStatus.ABSENT, AttendanceStatus.LATE,
+    AttendanceStatus.EXCUSED, AttendanceStatus.SICK,
+], dtype=object)
+
+
+@dataclass
+class SchoolSpec:
+    """Size of the generated school; counts are per parent unless noted"""
+    start_year: int = 2024
+    years: int = 1
+    terms: int = 3
+    curricula: tuple = (CurriculumType.EIGHT_FOUR_FOUR, CurriculumType.CBC)
+    cohorts: int = 2                # per curriculum and year
+    students: int = 40              # per cohort
+    subjects: int = 8               # per curriculum
+    weeks: int = 12                 # per term
+    lessons: int = 3                # per cohort, subject and week
+    assessments: int = 3            # per subject and term
+    projects: int = 1               # per subject and term
+    milestones: int = 3             # per project
+    evidence: int = 6               # per CBC student and term
+    instructors: int = 10
+    batch_size: int = 5000
+    seed: int = 0
+
+
+@dataclass
+class _Curriculum:
+    curriculum: Curriculum
+    subjects: list
+    scale: RubricScale | None = None
+    levels: list = field(default_factory=list)      # RubricLevel, highest first
+    outcomes: dict = field(default_factory=dict)    # subject_id -> [outcome ids]
+
+
+class SchoolGenerator:
+    """Generates one SchoolSpec worth of data; see ``generate()``"""
+
+    def __init__(self, spec, using=DEFAULT_DB_ALIAS, log=None):
+        self.spec = spec
+        self.using = using
+        self.log = log or (lambda message: None)
+        self.rng = np.random.default_rng(spec.seed)
+        self.counts = Counter()
+        self.instructors = []
+        self.instructor_ids = {}
+        self.serial = 0
+        self.term_ids = []
+        self.cohort_terms = []
+
+    # -- helpers -----------------------------------------------------------
+
+    def _insert(self, model, objs):
+        """
+        bulk_create parents and make sure they come back with primary keys.
+
+        Backends that cannot return ids from a bulk insert get them read
+        back: the generator is the only writer, so rows above the previous
+        maximum id are ours, in insertion order.
+        """
+        objs = list(objs)
+        if not objs:
+            return objs
+        manager = model._default_manager.using(self.using)
+        if connections[self.using].features.can_return_rows_from_bulk_insert:
+            manager.bulk_create(objs, batch_size=self.spec.batch_size)
+        else:
+            before = manager.order_by('-pk').values_list('pk', flat=True).first() or 0
+            manager.bulk_create(objs, batch_size=self.spec.batch_size)
+            pks = manager.filter(pk__gt=before).order_by('pk').values_list('pk', flat=True)
+            for obj, pk in zip(objs, pks):
+                obj.pk = pk
+        self.counts[model._meta.label] += len(objs)
+        return objs
+
+    def _stream(self, model, objs):
+        """bulk_create leaf rows in batches without keeping them around"""
+        manager = model._default_manager.using(self.using)
+        for batch in chunked(objs, self.spec.batch_size):
+            manager.bulk_create(batch)
+            self.counts[model._meta.label] += len(batch)
+
+    def _instructor(self):
+        return self.instructors[int(self.rng.integers(len(self.instructors)))]
+
+    def _book(self, preferred, day, start):
+        """``preferred`` unless already teaching then, else the next free instructor"""
+        booked = self.booked[(day, start)]
+        first = self.instructors.index(preferred)
+        for n in range(len(self.instructors)):
+            instructor = self.instructors[(first + n) % len(self.instructors)]
+            if instructor not in booked:
+                booked.add(instructor)
+                return instructor
+        return ''
+
+    # -- generation --------------------------------------------------------
+
+    def generate(self):
+        """Generate the whole school; returns row counts per model"""
+        started = time.perf_counter()
+        with grades.suspended(), attendance.suspended(), counters.suspended():
+            self._instructors()
+            curricula = [self._curriculum(kind) for kind in self.spec.curricula]
+            for offset in range(self.spec.years):
+                self._year(self.spec.start_year + offset, curricula)
+        self.log(f"Generated {sum(self.counts.values())} rows "
+                 f"in {time.perf_counter() - started:.1f}s")
+        return self.counts
+
+    def _instructors(self):
+        password = make_password(None)
+        users = [
+            User(email=f'instructor{n}@synthetic.school', first_name=FIRST_NAMES[n % 24],
+                 last_name=LAST_NAMES[n % 20], role=UserRole.INSTRUCTOR, password=password)
+            for n in range(self.spec.instructors)
+        ]
+        User.objects.using(self.using).bulk_create(users, ignore_conflicts=True)
+        self.instructors = [user.email for user in users] or ['']
+        self.booked = defaultdict(set)      # (date, start time) -> instructors teaching
+        self.instructor_ids = dict(
+            User.objects.using(self.using).filter(email__in=self.instructors)
+            .values_list('email', 'pk')
+        )
+
+    def _curriculum(self, kind):
+        label = f"{CurriculumType(kind).label} (synthetic {self.spec.start_year})"
+        curriculum, = self._insert(Curriculum, [Curriculum(name=label, curriculum_type=kind)])
+        names = SUBJECT_NAMES[kind]
+        subjects = self._insert(Subject, [
+            Subject(curriculum=curriculum,
+                    code=f"{names[i % len(names)][:3].upper()}{i + 1}",
+                    name=names[i] if i < len(names) else f"Elective {i - len(names) + 1}")
+            for i in range(self.spec.subjects)
+        ])
+        data = _Curriculum(curriculum, subjects)
+
+        if kind == CurriculumType.CUSTOM:
+            self._insert(GradeBoundary, [
+                GradeBoundary(curriculum=curriculum, grade=grade, min_score=low,
+                              points=points, remark=remark)
+                for grade, low, points, remark in CUSTOM_BOUNDARIES
+            ])
+        if kind == CurriculumType.CBC:
+            data.scale, = self._insert(RubricScale, [
+                RubricScale(curriculum=curriculum, name="CBC 4-Point Scale")
+            ])
+            data.levels = self._insert(RubricLevel, [
+                RubricLevel(rubric_scale=data.scale, code=code, label=text,
+                            numeric_value=value, sequence=value)
+                for code, text, value in CBC_LEVELS
+            ])
+            self._strands(data)
+        return data
+
+    def _strands(self, data):
+        strands = self._insert(Strand, [
+            Strand(curriculum=data.curriculum, subject=subject, code=f"S{n + 1}",
+                   name=f"{subject.name} strand {n + 1}", sequence=n)
+            for subject in data.subjects for n in range(3)
+        ])
+        sub_strands = self._insert(SubStrand, [
+            SubStrand(strand=strand, code=f"{strand.code}.{n + 1}",
+                      name=f"{strand.name}.{n + 1}", sequence=n)
+            for strand in strands for n in range(2)
+        ])
+        outcomes = self._insert(LearningOutcome, [
+            LearningOutcome(
+                sub_strand=sub_strand,
+                code=f"{data.curriculum.pk}.{sub_strand.strand.subject.code}."
+                     f"{sub_strand.code}.{n + 1}",
+                description=f"Demonstrates {sub_strand.name} outcome {n + 1}",
+            )
+            for sub_strand in sub_strands for n in range(3)
+        ])
+        for outcome in outcomes:
+            data.outcomes.setdefault(outcome.sub_strand.strand.subject_id, []).append(outcome.pk)
+
+    def _year(self, year, curricula):
+        spec = self.spec
+        # Terms start on Mondays with a four-week break between them.
+        first_monday = date(year, 1, 8) - timedelta(days=date(year, 1, 8).weekday())
+        academic_year, = self._insert(AcademicYear, [AcademicYear(
+            name=str(year), start_date=date(year, 1, 1),
+            end_date=first_monday + timedelta(weeks=spec.terms * (spec.weeks + 4)),
+        )])
+        terms = self._insert(Term, [
+            Term(academic_year=academic_year, name=f"Term {n + 1}", sequence=n + 1,
+                 start_date=first_monday + timedelta(weeks=n * (spec.weeks + 4)),
+                 end_date=first_monday + timedelta(weeks=n * (spec.weeks + 4) + spec.weeks,
+                                                   days=-3))
+            for n in range(spec.terms)
+        ])
+        self.term_ids += [term.pk for term in terms]
+
+        for data in curricula:
+            cohorts = self._cohorts(academic_year, data)
+            students = {cohort.pk: self._students(cohort) for cohort in cohorts}
+            with transaction.atomic(using=self.using):
+                for term in terms:
+                    self.log(f"{year} {term.name} {data.curriculum.name}")
+                    projects = self._projects(term, data, students)
+                    for cohort in cohorts:
+                        self._sessions(term, data, cohort, students[cohort.pk], projects)
+                        self.cohort_terms.append((cohort.pk, term.pk))
+                    self._assessments(term, data, students)
+                    if data.scale:
+                        self._evidence(term, data, students)
+
+    def _cohorts(self, academic_year, data):
+        levels = LEVELS[data.curriculum.curriculum_type]
+        cohorts = self._insert(Cohort, [
+            Cohort(curriculum=data.curriculum, academic_year=academic_year,
+                   level=levels[n % len(levels)],
+                   name=f"{levels[n % len(levels)]} {chr(ord('A') + n // len(levels))}")
+            for n in range(self.spec.cohorts)
+        ])
+        self._insert(CohortSubject, [
+            CohortSubject(cohort=cohort, subject=subject,
+                          is_compulsory=n < max(len(data.subjects) - 2, 1))
+            for cohort in cohorts for n, subject in enumerate(data.subjects)
+        ])
+        return cohorts
+
+    def _students(self, cohort):
+        """
+        Insert a cohort's students; returns (ids, ability, absence) arrays.
+        Ability is a student's mean percentage, absence their chance of
+        missing a session.
+        """
+        n = self.spec.students
+        year = cohort.academic_year.start_date.year
+        first = self.rng.integers(len(FIRST_NAMES), size=n)
+        last = self.rng.integers(len(LAST_NAMES), size=n)
+        students = self._insert(Student, [
+            Student(
+                admission_number=f"SYN/{year}/{self.serial + i + 1:07d}",
+                first_name=FIRST_NAMES[first[i]],
+                last_name=LAST_NAMES[last[i]],
+                gender='F' if i % 2 else 'M',
+                date_of_birth=date(year - 14, 1, 1) + timedelta(days=int(i * 37 % 365)),
+                cohort=cohort,
+            )
+            for i in range(n)
+        ])
+        self.serial += n
+        ids = np.array([student.pk for student in students], dtype=np.int64)
+        ability = np.clip(self.rng.normal(58, 15, size=n), 5, 98)
+        absence = np.clip(self.rng.beta(1.2, 18, size=n), 0, 0.6)
+        return ids, ability, absence
+
+    def _percentages(self, ability, spread=10):
+        return np.clip(ability + self.rng.normal(0, spread, size=len(ability)), 0, 100)
+
+    def _levels_for(self, data, percentages):
+        """RubricLevel ids for percentages, using the CBC grade bands"""
+        ids = np.array([level.pk for level in reversed(data.levels)], dtype=np.int64)
+        return ids[np.searchsorted([25, 50, 75], percentages, side='right')]
+
+    def _sessions(self, term, data, cohort, cohort_students, projects):
+        spec = self.spec
+        ids, _, absence = cohort_students
+        venue = f"Room {cohort.pk}"
+        sessions = []
+        for s, subject in enumerate(data.subjects):
+            project = projects.get(subject.pk)
+            # One teacher per class and subject, covered when teaching elsewhere
+            teacher = self._instructor()
+            for week in range(spec.weeks):
+                for lesson in range(spec.lessons):
+                    slot = (s * spec.lessons + lesson) % 8
+                    is_project = project is not None and lesson == 0 and week % 4 == 3
+                    day = term.start_date + timedelta(weeks=week, days=(lesson * 2 + s) % 5)
+                    instructor = self._book(teacher, day, slot)
+                    sessions.append(Session(
+                        term=term, subject=subject, cohort=cohort,
+                        session_type=SessionType.PROJECT if is_project else SessionType.LESSON,
+                        session_date=day,
+                        start_time=dt_time(8 + slot),
+                        end_time=dt_time(8 + slot, 40),
+                        title=f"{cohort.name} {subject.name}",
+                        venue=venue,
+                        venue_key=venue_key(venue),
+                        instructor_id=self.instructor_ids.get(instructor),
+                        project=project if is_project else None,
+                        created_by=instructor,
+                    ))
+        sessions = self._insert(Session, sessions)
+        marked_by = self._instructor()
+
+        def records():
+            for session in sessions:
+                draw = self.rng.random(len(ids))
+                status = np.select(
+                    [draw < absence,
+                     draw < absence + LATE_RATE,
+                     draw < absence + LATE_RATE + EXCUSED_RATE,
+                     draw < absence + LATE_RATE + EXCUSED_RATE + SICK_RATE],
+                    [1, 2, 3, 4], default=0,
+                )
+                for student_id, code in zip(ids.tolist(), STATUS_CODES[status]):
+                    yield AttendanceRecord(session_id=session.pk, student_id=student_id,
+                                           status=code, marked_by=marked_by)
+
+        self._stream(AttendanceRecord, records())
+        counters.recount_sessions([session.pk for session in sessions], using=self.using)
+
+    def _participants(self, students):
+        ids = np.concatenate([s[0] for s in students.values()])
+        ability = np.concatenate([s[1] for s in students.values()])
+        return ids, ability
+
+    def _assessments(self, term, data, students):
+        spec = self.spec
+        rubric = data.scale is not None
+        assessments = []
+        for subject in data.subjects:
+            for n in range(spec.assessments):
+                is_exam = n == spec.assessments - 1
+                assessments.append(Assessment(
+                    term=term, subject=subject,
+                    name="End Term Exam" if is_exam else f"CAT {n + 1}",
+                    assessment_type=(
+                        AssessmentType.COMPETENCY if rubric
+                        else AssessmentType.MAIN_EXAM if is_exam else AssessmentType.CAT
+                    ),
+                    evaluation_type=EvaluationType.RUBRIC if rubric else EvaluationType.NUMERIC,
+                    total_marks=None if rubric else (100 if is_exam else 30),
+                    rubric_scale=data.scale,
+                    assessment_date=term.start_date + timedelta(
+                        weeks=(n + 1) * spec.weeks // (spec.assessments + 1)
+                    ) if not is_exam else term.end_date - timedelta(days=4),
+                    weight=2.0 if is_exam else 1.0,
+                    created_by=self._instructor(),
+                ))
+        assessments = self._insert(Assessment, assessments)
+        ids, ability = self._participants(students)
+
+        def scores():
+            for assessment in assessments:
+                percentages = self._percentages(ability)
+                graded_by = self._instructor()
+                if rubric:
+                    levels = self._levels_for(data, percentages)
+                    for student_id, level_id in zip(ids.tolist(), levels.tolist()):
+                        yield AssessmentScore(assessment_id=assessment.pk, student_id=student_id,
+                                              rubric_level_id=level_id, graded_by=graded_by)
+                else:
+                    marks = np.round(percentages * assessment.total_marks / 100, 1)
+                    for student_id, mark in zip(ids.tolist(), marks.tolist()):
+                        yield AssessmentScore(assessment_id=assessment.pk, student_id=student_id,
+                                              score=mark, graded_by=graded_by)
+
+        self._stream(AssessmentScore, scores())
+
+    def _projects(self, term, data, students):
+        """Projects of a term, keyed by subject id (first project per subject)"""
+        spec = self.spec
+        if not spec.projects:
+            return {}
+        rubric = data.scale is not None
+        projects = self._insert(Project, [
+            Project(
+                subject=subject, term=term, name=f"{subject.name} project {n + 1}",
+                start_date=term.start_date + timedelta(weeks=1),
+                end_date=term.end_date - timedelta(weeks=1),
+                total_marks=None if rubric else 50,
+                evaluation_type='RUBRIC' if rubric else 'NUMERIC',
+                rubric_scale=data.scale,
+                created_by=self._instructor(),
+            )
+            for subject in data.subjects for n in range(spec.projects)
+        ])
+        milestones = self._insert(ProjectMilestone, [
+            ProjectMilestone(project=project, name=f"Milestone {n + 1}", sequence=n + 1,
+                             due_date=project.start_date + timedelta(weeks=2 * (n + 1)),
+                             max_score=10)
+            for project in projects for n in range(spec.milestones)
+        ])
+        ids, ability = self._participants(students)
+        participations = []
+        marks = {}
+        for project in projects:
+            evaluated_by = self._instructor()
+            percentages = self._percentages(ability, spread=12)
+            levels = self._levels_for(data, percentages) if rubric else [None] * len(ids)
+            for student_id, percentage, level_id in zip(ids.tolist(), percentages, levels):
+                participations.append(ProjectParticipation(
+                    project=project, student_id=student_id,
+                    final_score=None if rubric else round(percentage / 2, 1),
+                    rubric_level_id=None if level_id is None else int(level_id),
+                    evaluated_by=evaluated_by,
+                ))
+                marks[(project.pk, student_id)] = percentage
+        participations = self._insert(ProjectParticipation, participations)
+
+        per_project = {}
+        for milestone in milestones:
+            per_project.setdefault(milestone.project_id, []).append(milestone)
+
+        def milestone_scores():
+            for participation in participations:
+                base = marks[(participation.project_id, participation.student_id)] / 10
+                noise = self.rng.normal(0, 1, size=spec.milestones)
+                for milestone, delta in zip(per_project[participation.project_id], noise):
+                    yield MilestoneScore(milestone=milestone, participation=participation,
+                                         score=round(float(np.clip(base + delta, 0, 10)), 1))
+
+        self._stream(MilestoneScore, milestone_scores())
+        first = {}
+        for project in projects:
+            first.setdefault(project.subject_id, project)
+        return first
+
+    def _evidence(self, term, data, students):
+        spec = self.spec
+        outcomes = [pk for subject_outcomes in data.outcomes.values() for pk in subject_outcomes]
+        if not outcomes or not spec.evidence:
+            return
+        ids, ability = self._participants(students)
+        days = (term.end_date - term.start_date).days
+
+        def records():
+            for _ in range(spec.evidence):
+                recorded_by = self._instructor()
+                percentages = self._percentages(ability, spread=12)
+                levels = self._levels_for(data, percentages)
+                picks = self.rng.integers(len(outcomes), size=len(ids))
+                offsets = self.rng.integers(days + 1, size=len(ids))
+                for student_id, level_id, pick, offset in zip(
+                    ids.tolist(), levels.tolist(), picks.tolist(), offsets.tolist()
+                ):
+                    yield EvidenceRecord(
+                        student_id=student_id, learning_outcome_id=outcomes[pick],
+                        source_type='OBSERVATION', evaluation_type='RUBRIC',
+                        rubric_level_id=level_id,
+                        observed_at=term.start_date + timedelta(days=offset),
+                        recorded_by=recorded_by,
+                    )
+
+        self._stream(EvidenceRecord, records())
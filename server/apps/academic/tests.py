@@ -1,3 +1,104 @@
-from django.test import TestCase
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from apps.academic.query_counts import QueryCountTestCase
+
+from . import grading
+from .grading import BUILTIN_BOUNDARIES, GradeTable
+from .models import Curriculum, CurriculumType, GradeBoundary, Subject
+
+
+class AdminQueryCountTests(QueryCountTestCase):
+
+    def test_changelists(self):
+        self.assertConstantChangelists('academic')
+
+
+class GradeTableTests(SimpleTestCase):
+
+    table = GradeTable.compile([('B', 50, 2), ('A', 70, None), ('C', 20, 1)])
+
+    def test_boundaries_are_inclusive(self):
+        self.assertEqual(
+            [self.table.grade(score) for score in (0, 19.99, 20, 49.99, 50, 70, 100, 120)],
+            [('C', 1.0), ('C', 1.0), ('C', 1.0), ('C', 1.0), ('B', 2.0), ('A', None),
+             ('A', None), ('A', None)],
+        )
+
+    def test_ungradable(self):
+        self.assertEqual(self.table.grade(None), ('', None))
+        self.assertEqual(self.table.grade(float('nan')), ('', None))
+        self.assertEqual(grading.EMPTY_TABLE.grade(80), ('', None))
+        self.assertFalse(grading.EMPTY_TABLE)
+
+    def test_array_agrees_with_scalar(self):
+        scores = [0, 19.99, 20, 49.99, 50, 69.99, 70, 100, np.nan]
+        grades, points = self.table.grade_array(scores)
+        expected = [self.table.grade(score) for score in scores]
+        self.assertEqual(list(grades), [grade for grade, _ in expected])
+        np.testing.assert_array_equal(
+            points, [np.nan if p is None else p for _, p in expected]
+        )
+
+    def test_builtin_tables(self):
+        tables = {kind: GradeTable.compile(rows) for kind, rows in BUILTIN_BOUNDARIES.items()}
+        self.assertEqual(
+            [tables[CurriculumType.EIGHT_FOUR_FOUR].grade(score) for score in (80, 79.9, 0)],
+            [('A', 12.0), ('A-', 11.0), ('E', 1.0)],
+        )
+        self.assertEqual(
+            [tables[CurriculumType.IGCSE].grade(score) for score in (90, 89.9, 19.9)],
+            [('A*', 8.0), ('A', 7.0), ('U', 0.0)],
+        )
+        self.assertEqual(
+            [tables[CurriculumType.CBC].grade(score) for score in (75, 74.9, 25, 24.9)],
+            [('EE', 4.0), ('ME', 3.0), ('AE', 2.0), ('BE', 1.0)],
+        )
+
+
+class GradeBoundaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.curriculum = Curriculum.objects.create(
+            name='8-4-4', curriculum_type=CurriculumType.EIGHT_FOUR_FOUR
+        )
+        cls.subject = Subject.objects.create(curriculum=cls.curriculum, code='MAT',
+                                             name='Mathematics')
+
+    def setUp(self):
+        grading.invalidate()
+
+    def grade(self, score):
+        return grading.table_for_subject(self.subject.pk).grade(score)
+
+    def test_custom_boundaries_replace_builtin_on_commit(self):
+        self.assertEqual(self.grade(85), ('A', 12.0))
+        with self.captureOnCommitCallbacks(execute=True):
+            passed = GradeBoundary.objects.create(curriculum=self.curriculum, grade='Pass',
+                                                  min_score=40, points=1)
+            GradeBoundary.objects.create(curriculum=self.curriculum, grade='Fail',
+                                         min_score=0, points=0)
+            # Not before the edit commits
+            self.assertEqual(self.grade(85), ('A', 12.0))
+        self.assertEqual((self.grade(85), self.grade(39)), (('Pass', 1.0), ('Fail', 0.0)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            passed.min_score = 60
+            passed.save()
+        self.assertEqual((self.grade(55), self.grade(60)), (('Fail', 0.0), ('Pass', 1.0)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GradeBoundary.objects.filter(curriculum=self.curriculum).delete()
+        self.assertEqual(self.grade(85), ('A', 12.0))
+
+    def test_clean(self):
+        boundary = GradeBoundary(curriculum=self.curriculum, grade='X', min_score=101)
+        with self.assertRaises(ValidationError):
+            boundary.clean()
+        boundary.min_score = None
+        boundary.clean()
+        with self.assertRaises(ValidationError) as raised:
+            boundary.full_clean()
+        self.assertIn('min_score', raised.exception.message_dict)
@@ -1,34 +1,40 @@
-# apps/academic/admin.py
+# apps/assessments/admin.py
 from django.contrib import admin
-from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject
+from apps.academic.admin import RelatedListFilter
+from .models import RubricScale, RubricLevel, Assessment, AssessmentScore, ScoreImport
 
-@admin.register(AcademicYear)
-class AcademicYearAdmin(admin.ModelAdmin):
-    list_display = ['name', 'start_date', 'end_date', 'is_current']
-    list_filter = ['is_current']
+@admin.register(RubricScale)
+class RubricScaleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'curriculum', 'is_active']
+    list_filter = ['curriculum', 'is_active']
+    list_select_related = ['curriculum']
 
-@admin.register(Term)
-class TermAdmin(admin.ModelAdmin):
-    list_display = ['name', 'academic_year', 'sequence', 'start_date', 'end_date']
-    list_filter = ['academic_year']
+@admin.register(RubricLevel)
+class RubricLevelAdmin(admin.ModelAdmin):
+    list_display = ['code', 'label', 'rubric_scale', 'numeric_value', 'sequence']
+    list_filter = [('rubric_scale', RelatedListFilter)]
+    list_select_related = ['rubric_scale__curriculum']
 
-@admin.register(Curriculum)
-class CurriculumAdmin(admin.ModelAdmin):
-    list_display = ['name', 'curriculum_type', 'is_active']
-    list_filter = ['curriculum_type', 'is_active']
+@admin.register(Assessment)
+class AssessmentAdmin(admin.ModelAdmin):
+    list_display = ['name', 'subject', 'term', 'assessment_type', 'evaluation_type',
+                    'total_marks', 'assessment_date']
+    list_filter = [('term', RelatedListFilter), 'assessment_type', 'evaluation_type']
+    list_select_related = ['subject', 'term__academic_year']
+    search_fields = ['name']
 
-@admin.register(Subject)
-class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'curriculum']
-    list_filter = ['curriculum']
-    search_fields = ['code', 'name']
+@admin.register(AssessmentScore)
+class AssessmentScoreAdmin(admin.ModelAdmin):
+    list_display = ['student', 'assessment', 'score', 'rubric_level', 'graded_by', 'graded_at']
+    list_filter = [('assessment__term', RelatedListFilter)]
+    list_select_related = ['student', 'assessment__term', 'assessment__subject', 'rubric_level']
+    raw_id_fields = ['student', 'assessment']
+    search_fields = ['student__admission_number']
 
-@admin.register(Cohort)
-class CohortAdmin(admin.ModelAdmin):
-    list_display = ['name', 'level', 'curriculum', 'academic_year']
-    list_filter = ['curriculum', 'academic_year']
-
-@admin.register(CohortSubject)
-class CohortSubjectAdmin(admin.ModelAdmin):
-    list_display = ['cohort', 'subject', 'is_compulsory']
-    list_filter = ['cohort', 'is_compulsory']
\ No newline at end of file
+@admin.register(ScoreImport)
+class ScoreImportAdmin(admin.ModelAdmin):
+    list_display = ['file_name', 'assessment', 'cohort', 'status', 'imported_rows',
+                    'error_count', 'created_at']
+    list_filter = ['status']
+    list_select_related = ['assessment__term', 'assessment__subject', 'cohort']
+    raw_id_fields = ['assessment']
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AssessmentsConfig(AppConfig):
     name = 'apps.assessments'
+
+    def ready(self):
+        from . import rubrics, statistics  # noqa: F401
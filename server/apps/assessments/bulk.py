@@ -0,0 +1,201 @@
+# ============================================================================
+# apps/assessments/bulk.py
+# Bulk validation and upsert of AssessmentScores
+# ============================================================================
+#
+# A whole mark sheet is validated against one assessment with a fixed number
+# of queries (students and the classes taking the subject; rubric levels
+# come from the scale cache), then
+# written with chunked upserts on the (assessment, student) unique key
+# inside one transaction, so derived summaries are recomputed once on
+# commit rather than per score.
+
+import math
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert, chunked
+from apps.academic.models import CohortSubject
+from apps.learners.models import Student
+
+from . import rubrics
+from .models import AssessmentScore
+
+
+UPSERT_CHUNK_SIZE = 1000
+
+SCORE_FIELDS = ['score', 'rubric_level', 'comments', 'graded_by', 'graded_at']
+
+
+def _error(errors, row, field, message):
+    errors.append({'row': row, 'field': field, 'message': message})
+
+
+def _parse_score(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        raise ValueError
+    score = float(value)
+    if not math.isfinite(score):
+        raise ValueError
+    return score
+
+
+def subject_cohort_ids(assessment, using=DEFAULT_DB_ALIAS):
+    """
+    Classes of the assessment's term taking its subject; every class taking
+    it for year-round assessments, which have no term
+    """
+    cohorts = CohortSubject.objects.using(using).filter(subject_id=assessment.subject_id)
+    if assessment.term_id is not None:
+        cohorts = cohorts.filter(cohort__academic_year__terms=assessment.term_id)
+    return set(cohorts.values_list('cohort_id', flat=True))
+
+
+def _student_key(value, lookup):
+    if value is None:
+        return None
+    value = str(value).strip()
+    if lookup == 'pk':
+        return int(value) if value.isdigit() else value
+    return value
+
+
+class ScoreValidator:
+    """
+    Validates mark-entry rows for one assessment.
+
+    Students are looked up through ``students``, a mapping of student key
+    (primary key or admission number, per ``student_field``) to primary
+    key. Unless ``eligible`` is None, only the students whose primary key
+    is in it, those of the classes taking the subject, are accepted. Rubric
+    level codes come from the cached rubric scale. A student repeated
+    across successive ``validate()`` calls is rejected.
+    """
+
+    def __init__(self, assessment, students, student_field='student', eligible=None,
+                 using=DEFAULT_DB_ALIAS):
+        self.assessment = assessment
+        self.students = students
+        self.eligible = eligible
+        self.student_field = student_field
+        self.lookup = 'pk' if student_field == 'student' else student_field
+        self.levels = rubrics.get_scale(assessment.rubric_scale_id, using=using).by_code
+        self.seen = set()
+
+    def validate(self, entries, first_row=0):
+        """
+        Returns ``(scores, errors)``: unsaved AssessmentScore objects for the
+        valid rows and a list of ``{'row', 'field', 'message'}`` dicts, ``row``
+        counting from ``first_row``.
+        """
+        assessment, field = self.assessment, self.student_field
+        scores, errors = [], []
+        for row, entry in enumerate(entries, start=first_row):
+            failed = len(errors)
+
+            key = _student_key(entry.get(field), self.lookup)
+            student_id = self.students.get(key)
+            if key in (None, ''):
+                _error(errors, row, field, "This field is required.")
+            elif student_id is None:
+                _error(errors, row, field, f"Unknown student {key!r}.")
+            elif self.eligible is not None and student_id not in self.eligible:
+                _error(errors, row, field,
+                       f"Student {key!r} is not in a class taking this subject.")
+            elif student_id in self.seen:
+                _error(errors, row, field, f"Student {key!r} appears more than once.")
+            else:
+                self.seen.add(student_id)
+
+            try:
+                score = _parse_score(entry.get('score'))
+            except (TypeError, ValueError):
+                score = None
+                _error(errors, row, 'score', "A valid number is required.")
+            else:
+                if score is not None and score < 0:
+                    _error(errors, row, 'score', "Score cannot be negative.")
+                elif score is not None and assessment.total_marks is not None \
+                        and score > assessment.total_marks:
+                    _error(errors, row, 'score',
+                           f"Score exceeds the assessment's total of {assessment.total_marks:g}.")
+
+            code = entry.get('rubric_level')
+            code = str(code).strip() if code not in (None, '') else None
+            level_id = None
+            if code is not None:
+                if not assessment.rubric_scale_id:
+                    _error(errors, row, 'rubric_level', "This assessment has no rubric scale.")
+                elif code not in self.levels:
+                    _error(errors, row, 'rubric_level', f"Unknown rubric level {code!r}.")
+                else:
+                    level_id = self.levels[code].pk
+
+            comments = entry.get('comments') or ''
+            if len(errors) == failed and score is None and code is None and not comments:
+                _error(errors, row, 'score', "Provide a score, rubric level or comments.")
+
+            if len(errors) == failed:
+                scores.append(AssessmentScore(
+                    assessment_id=assessment.pk,
+                    student_id=student_id,
+                    score=score,
+                    rubric_level_id=level_id,
+                    comments=str(comments),
+                ))
+        return scores, errors
+
+
+def validate_score_entries(assessment, entries, student_field='student',
+                           using=DEFAULT_DB_ALIAS):
+    """
+    Validate mark-entry rows for one assessment.
+
+    Each entry is a mapping with the student under ``student_field``
+    (``'student'`` for a primary key, ``'admission_number'`` for the
+    admission number) and any of ``score``, ``rubric_level`` (a level code
+    of the assessment's rubric scale) and ``comments``. Students must be in
+    a class taking the assessment's subject, in its term if it has one. The entries'
+    students are resolved with one query. Returns ``(scores, errors)`` as
+    ``ScoreValidator.validate()``.
+    """
+    lookup = 'pk' if student_field == 'student' else student_field
+    keys = {_student_key(entry.get(student_field), lookup) for entry in entries}
+    keys = {key for key in keys if key and (lookup != 'pk' or isinstance(key, int))}
+    rows = (
+        Student.objects.using(using).filter(**{f'{lookup}__in': keys})
+        .values_list(lookup, 'pk', 'cohort_id')
+    ) if keys else []
+    cohort_ids = subject_cohort_ids(assessment, using)
+    students, eligible = {}, set()
+    for key, pk, cohort_id in rows:
+        students[key] = pk
+        if cohort_id in cohort_ids:
+            eligible.add(pk)
+    validator = ScoreValidator(assessment, students, student_field, eligible, using=using)
+    return validator.validate(entries)
+
+
+def save_scores(scores, graded_by='', chunk_size=UPSERT_CHUNK_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Insert or overwrite validated scores on the (assessment, student) key.
+
+    Returns the number of scores written.
+    """
+    now = timezone.now()
+    for score in scores:
+        score.graded_by = graded_by
+        score.graded_at = now
+    with transaction.atomic(using=using):
+        for chunk in chunked(scores, chunk_size):
+            bulk_upsert(
+                AssessmentScore, chunk,
+                unique_fields=['assessment', 'student'],
+                update_fields=SCORE_FIELDS,
+                batch_size=chunk_size,
+                using=using,
+            )
+    return len(scores)
@@ -0,0 +1,83 @@
+# ============================================================================
+# apps/assessments/exports.py
+# Streaming marksheet export
+# ============================================================================
+#
+# Rows are students, columns are assessments. Students are walked in keyset
+# chunks ordered by admission number, and each chunk's scores are read with
+# one query, so memory is bounded by the chunk size on every backend
+# (MySQL drivers buffer whole result sets even for QuerySet.iterator()).
+
+import csv
+
+from apps.learners.models import Student
+
+from .models import Assessment, AssessmentScore
+
+
+STUDENT_CHUNK_SIZE = 500
+
+
+class Echo:
+    """File-like object whose write() just returns the value written"""
+
+    def write(self, value):
+        return value
+
+
+def marksheet_assessments(term_id, subject_id):
+    return list(
+        Assessment.objects.filter(term_id=term_id, subject_id=subject_id)
+        .order_by('assessment_date', 'pk')
+        .values('pk', 'name', 'total_marks')
+    )
+
+
+def marksheet_rows(cohort_id, assessments, chunk_size=STUDENT_CHUNK_SIZE):
+    """
+    Yield one list per student: admission number, name, then one cell per
+    assessment (numeric score, rubric code or blank).
+    """
+    assessment_ids = [a['pk'] for a in assessments]
+    column = {pk: index for index, pk in enumerate(assessment_ids)}
+    last = None
+    while True:
+        students = Student.objects.filter(cohort_id=cohort_id).order_by('admission_number')
+        if last is not None:
+            students = students.filter(admission_number__gt=last)
+        students = list(students.values_list(
+            'pk', 'admission_number', 'first_name', 'middle_name', 'last_name'
+        )[:chunk_size])
+        if not students:
+            return
+        last = students[-1][1]
+
+        cells = {pk: [''] * len(assessment_ids) for pk, *_ in students}
+        if assessment_ids:
+            for student_id, assessment_id, score, code in (
+                AssessmentScore.objects
+                .filter(assessment_id__in=assessment_ids,
+                        student_id__in=list(cells))
+                .values_list('student_id', 'assessment_id', 'score',
+                             'rubric_level__code')
+            ):
+                cells[student_id][column[assessment_id]] = (
+                    score if score is not None else (code or '')
+                )
+
+        for pk, admission_number, first, middle, last_name in students:
+            name = ' '.join(part for part in (first, middle, last_name) if part)
+            yield [admission_number, name, *cells[pk]]
+
+
+def marksheet_csv(cohort_id, assessments, chunk_size=STUDENT_CHUNK_SIZE):
+    """Yield the marksheet as CSV text, header first"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(
+        ['Admission No.', 'Name'] + [
+            f"{a['name']} (/{a['total_marks']:g})" if a['total_marks'] else a['name']
+            for a in assessments
+        ]
+    )
+    for row in marksheet_rows(cohort_id, assessments, chunk_size):
+        yield writer.writerow(row)
@@ -0,0 +1,76 @@
+# ============================================================================
+# apps/assessments/gradebook.py
+# Dense gradebook matrix for one cohort, subject and term
+# ============================================================================
+
+from apps.learners.models import Student
+
+from . import rubrics
+from .models import Assessment, AssessmentScore
+
+
+def build_gradebook(cohort_id, subject_id, term_id):
+    """
+    Return the gradebook in a compact columnar form.
+
+    Students and assessments are listed once; ``scores`` is a dense
+    students x assessments matrix whose cells are a numeric score, a rubric
+    level code or None. Runs three queries; rubric levels come from the
+    scale cache.
+    """
+    assessments = list(
+        Assessment.objects.filter(term_id=term_id, subject_id=subject_id)
+        .order_by('assessment_date', 'pk')
+        .values_list('pk', 'name', 'assessment_type', 'evaluation_type',
+                     'total_marks', 'weight', 'rubric_scale_id', 'assessment_date')
+    )
+    students = list(
+        Student.objects.filter(cohort_id=cohort_id)
+        .order_by('admission_number')
+        .values_list('pk', 'admission_number', 'first_name', 'middle_name', 'last_name')
+    )
+
+    column = {row[0]: index for index, row in enumerate(assessments)}
+    row_of = {row[0]: index for index, row in enumerate(students)}
+    matrix = [[None] * len(assessments) for _ in students]
+    if assessments and students:
+        for student_id, assessment_id, score, code in (
+            AssessmentScore.objects
+            .filter(assessment_id__in=list(column), student__cohort_id=cohort_id)
+            .values_list('student_id', 'assessment_id', 'score', 'rubric_level__code')
+        ):
+            matrix[row_of[student_id]][column[assessment_id]] = (
+                score if score is not None else code
+            )
+
+    scales = rubrics.get_scales({row[6] for row in assessments if row[6] is not None})
+    rubric_levels = {
+        str(scale_id): [
+            {'code': level.code, 'label': level.label, 'value': level.numeric_value}
+            for level in scale.levels
+        ]
+        for scale_id, scale in sorted(scales.items())
+    }
+
+    return {
+        'cohort': cohort_id,
+        'subject': subject_id,
+        'term': term_id,
+        'students': {
+            'ids': [row[0] for row in students],
+            'admission_numbers': [row[1] for row in students],
+            'names': [' '.join(part for part in row[2:] if part) for row in students],
+        },
+        'assessments': {
+            'ids': [row[0] for row in assessments],
+            'names': [row[1] for row in assessments],
+            'assessment_types': [row[2] for row in assessments],
+            'evaluation_types': [row[3] for row in assessments],
+            'total_marks': [row[4] for row in assessments],
+            'weights': [row[5] for row in assessments],
+            'rubric_scales': [row[6] for row in assessments],
+            'dates': [row[7] for row in assessments],
+        },
+        'scores': matrix,
+        'rubric_levels': rubric_levels,
+    }
@@ -0,0 +1,143 @@
+# ============================================================================
+# apps/assessments/imports.py
+# Streaming CSV marks import
+# ============================================================================
+#
+# The uploaded file is decoded and parsed as a stream, one chunk of rows at
+# a time. Admission numbers are mapped to students through one dictionary
+# prefetched for the cohort, every chunk is validated with the shared
+# ScoreValidator and its valid rows are upserted straight away. Invalid
+# rows are recorded on the ScoreImport and skipped; they never stop the
+# import. Memory is bounded by the chunk size plus the cohort's admission
+# number map.
+
+import csv
+import io
+import re
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apps.academic.db import chunked
+from apps.learners.models import Student
+
+from .bulk import UPSERT_CHUNK_SIZE, ScoreValidator, save_scores, subject_cohort_ids
+from .exports import Echo
+from .models import ImportStatus
+
+
+MAX_REPORTED_ERRORS = 10000
+
+HEADER_ALIASES = {
+    'admission_no': 'admission_number',
+    'adm_no': 'admission_number',
+    'admno': 'admission_number',
+    'mark': 'score',
+    'marks': 'score',
+    'level': 'rubric_level',
+    'rubric': 'rubric_level',
+    'comment': 'comments',
+    'remarks': 'comments',
+}
+
+ERROR_REPORT_HEADER = ['Row', 'Admission No.', 'Field', 'Message']
+
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be imported"""
+
+
+def normalize_header(name):
+    """'Admission No.' -> 'admission_number', 'Marks' -> 'score'"""
+    key = re.sub(r'[^a-z0-9]+', '_', (name or '').strip().lower()).strip('_')
+    return HEADER_ALIASES.get(key, key)
+
+
+def read_rows(stream):
+    """
+    Yield ``(line_number, row)`` for every non-blank data row of a CSV text
+    stream, ``row`` being a dict keyed by normalized header.
+    """
+    reader = csv.reader(stream)
+    header = [normalize_header(name) for name in next(reader, [])]
+    if 'admission_number' not in header:
+        raise ImportFileError("The file has no admission number column.")
+    if not {'score', 'rubric_level', 'comments'} & set(header):
+        raise ImportFileError("The file has no score, rubric level or comments column.")
+    for values in reader:
+        if any(value.strip() for value in values):
+            yield reader.line_num, dict(zip(header, values))
+
+
+def open_upload(upload):
+    """Text stream over an uploaded file; a UTF-8 byte order mark is dropped"""
+    return io.TextIOWrapper(upload, encoding='utf-8-sig', errors='replace', newline='')
+
+
+def import_scores(score_import, stream, chunk_size=UPSERT_CHUNK_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Import a CSV text stream into ``score_import.assessment`` and record the
+    outcome on ``score_import``.
+
+    The rows are written in one transaction, so a file that fails as a
+    whole (missing columns, unreadable CSV) leaves no scores behind, and
+    the import records no rows and that one error.
+    """
+    students = dict(
+        Student.objects.using(using).filter(cohort_id=score_import.cohort_id)
+        .values_list('admission_number', 'pk')
+    )
+    assessment = score_import.assessment
+    eligible = (set(students.values())
+                if score_import.cohort_id in subject_cohort_ids(assessment, using) else set())
+    validator = ScoreValidator(assessment, students, 'admission_number', eligible,
+                               using=using)
+    _reset_counts(score_import)
+
+    try:
+        with transaction.atomic(using=using):
+            for chunk in chunked(read_rows(stream), chunk_size):
+                lines, rows = zip(*chunk)
+                scores, errors = validator.validate(rows)
+                save_scores(scores, graded_by=score_import.uploaded_by,
+                            chunk_size=chunk_size, using=using)
+                score_import.total_rows += len(rows)
+                score_import.imported_rows += len(scores)
+                _record_errors(score_import, [
+                    dict(error, row=lines[error['row']],
+                         admission_number=rows[error['row']].get('admission_number', ''))
+                    for error in errors
+                ])
+    except (ImportFileError, csv.Error) as exc:
+        # The rows read before the failure were rolled back with it
+        score_import.status = ImportStatus.FAILED
+        _reset_counts(score_import)
+        _record_errors(score_import, [
+            {'row': None, 'admission_number': '', 'field': '', 'message': str(exc)}
+        ])
+    else:
+        score_import.status = ImportStatus.COMPLETED
+    score_import.completed_at = timezone.now()
+    score_import.save(using=using)
+    return score_import
+
+
+def _reset_counts(score_import):
+    score_import.total_rows = score_import.imported_rows = score_import.error_count = 0
+    score_import.errors = []
+
+
+def _record_errors(score_import, errors):
+    score_import.error_count += len(errors)
+    room = MAX_REPORTED_ERRORS - len(score_import.errors)
+    score_import.errors.extend(errors[:max(room, 0)])
+
+
+def error_report_csv(score_import):
+    """Yield the import's row errors as CSV text, header first"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(ERROR_REPORT_HEADER)
+    for error in score_import.errors:
+        yield writer.writerow([
+            error['row'] or '', error['admission_number'], error['field'], error['message']
+        ])
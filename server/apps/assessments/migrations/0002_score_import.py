@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0001_initial'),
+        ('assessments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('PROCESSING', 'Processing'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PROCESSING', max_length=20)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('imported_rows', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(default=list, help_text='[{"row": 7, "admission_number": "...", "field": "score", "message": "..."}]')),
+                ('uploaded_by', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('assessment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imports', to='assessments.assessment')),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_imports', to='academic.cohort')),
+            ],
+            options={
+                'verbose_name': 'Score Import',
+                'verbose_name_plural': 'Score Imports',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
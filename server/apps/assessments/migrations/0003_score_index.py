@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assessments', '0002_score_import'),
+        ('learners', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assessmentscore',
+            index=models.Index(fields=['assessment', 'score'], name='assessments_assessm_07109f_idx'),
+        ),
+    ]
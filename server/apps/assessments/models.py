@@ -5,6 +5,8 @@
 
 from django.db import models
 
+from .signals import scores_changed
+
 
 class AssessmentType(models.TextChoices):
     """Types of assessments"""
@@ -132,6 +134,46 @@ class Assessment(models.Model):
         return f"{self.name} - {self.subject.name} ({term_str})"
 
 
+class AssessmentScoreQuerySet(models.QuerySet):
+    """Announces bulk writes so derived summaries can follow them"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._send_changed({(obj.student_id, obj.assessment_id) for obj in objs})
+        return objs
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        self._send_changed({(obj.student_id, obj.assessment_id) for obj in objs})
+        return rows
+
+    bulk_update.alters_data = True
+
+    def update(self, **kwargs):
+        pairs = set(self.values_list('student_id', 'assessment_id'))
+        rows = super().update(**kwargs)
+        student = kwargs.get('student_id', kwargs.get('student'))
+        assessment = kwargs.get('assessment_id', kwargs.get('assessment'))
+        if student is not None or assessment is not None:
+            student = getattr(student, 'pk', student)
+            assessment = getattr(assessment, 'pk', assessment)
+            pairs |= {
+                (student or student_id, assessment or assessment_id)
+                for student_id, assessment_id in pairs
+            }
+        self._send_changed(pairs)
+        return rows
+
+    update.alters_data = True
+
+    def _send_changed(self, pairs):
+        if pairs:
+            scores_changed.send(sender=self.model, pairs=pairs, using=self.db)
+
+
 class AssessmentScore(models.Model):
     """Individual student assessment result"""
     assessment = models.ForeignKey(
@@ -165,10 +207,13 @@ class AssessmentScore(models.Model):
     graded_at = models.DateTimeField(auto_now_add=True)
     graded_by = models.CharField(max_length=100, blank=True)
     
+    objects = AssessmentScoreQuerySet.as_manager()
+    
     class Meta:
         unique_together = [['assessment', 'student']]
         indexes = [
             models.Index(fields=['assessment', 'student']),
+            models.Index(fields=['assessment', 'score']),
         ]
         verbose_name = "Assessment Score"
         verbose_name_plural = "Assessment Scores"
@@ -176,3 +221,53 @@ class AssessmentScore(models.Model):
     def __str__(self):
         return f"{self.student.admission_number} - {self.assessment.name}"
 
+
+class ImportStatus(models.TextChoices):
+    """Lifecycle of a marks import"""
+    PROCESSING = "PROCESSING", "Processing"
+    COMPLETED = "COMPLETED", "Completed"
+    FAILED = "FAILED", "Failed"
+
+
+class ScoreImport(models.Model):
+    """
+    One uploaded marks file for an assessment. Rows that failed validation
+    are kept in ``errors`` for the downloadable error report; the valid
+    rows are imported regardless.
+    """
+    assessment = models.ForeignKey(
+        Assessment,
+        on_delete=models.CASCADE,
+        related_name='imports'
+    )
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.CASCADE,
+        related_name='score_imports'
+    )
+    
+    file_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=ImportStatus.choices,
+        default=ImportStatus.PROCESSING
+    )
+    total_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(
+        default=list,
+        help_text='[{"row": 7, "admission_number": "...", "field": "score", "message": "..."}]'
+    )
+    
+    uploaded_by = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Score Import"
+        verbose_name_plural = "Score Imports"
+    
+    def __str__(self):
+        return f"{self.file_name or 'Import'} - {self.assessment.name} ({self.status})"
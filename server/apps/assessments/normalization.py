@@ -0,0 +1,126 @@
+# ============================================================================
+# apps/assessments/normalization.py
+# Raw AssessmentScores -> one normalized term score per student and subject
+# ============================================================================
+#
+# Every score of a subject in a term is read in one query into columnar
+# arrays and normalized to a 0-100 percentage:
+#
+#   numeric: score / Assessment.total_marks * 100
+#   rubric:  RubricLevel.numeric_value / highest numeric_value of the scale * 100
+#
+# A numeric score wins when both are present. Scores that can be neither
+# (descriptive assessments, missing total_marks) are ignored. Per student,
+# the plain mean and the Assessment.weight weighted mean of the percentages
+# are returned.
+
+from dataclasses import dataclass
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS
+
+from . import rubrics
+from .models import Assessment, AssessmentScore
+
+
+@dataclass
+class NormalizedScores:
+    """Normalized term scores of one subject, aligned on ``student_ids``"""
+    term_id: int
+    subject_id: int
+    student_ids: np.ndarray
+    counts: np.ndarray
+    averages: np.ndarray
+    weighted_averages: np.ndarray
+
+    def __len__(self):
+        return len(self.student_ids)
+
+    def rows(self):
+        """Yield (student_id, count, average, weighted_average) as Python values"""
+        for student_id, count, average, weighted in zip(
+            self.student_ids.tolist(), self.counts.tolist(),
+            self.averages.tolist(), self.weighted_averages.tolist()
+        ):
+            yield (
+                student_id, count,
+                None if np.isnan(average) else average,
+                None if np.isnan(weighted) else weighted,
+            )
+
+
+def _column(values):
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=float)
+
+
+def normalize_subject_term(term_id, subject_id, student_ids=None, cohort_id=None,
+                           using=DEFAULT_DB_ALIAS):
+    """
+    Normalize every score of ``subject_id`` in ``term_id``.
+
+    ``student_ids`` or ``cohort_id`` narrow the students read. Students
+    without a usable score are absent from the result.
+    """
+    assessments = list(
+        Assessment.objects.using(using)
+        .filter(term_id=term_id, subject_id=subject_id)
+        .order_by('pk')
+        .values_list('pk', 'total_marks', 'weight', 'rubric_scale_id')
+    )
+    empty = NormalizedScores(
+        term_id, subject_id, np.empty(0, dtype=np.int64),
+        np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    )
+    if not assessments:
+        return empty
+
+    assessment_ids, total_marks, weights, scale_ids = zip(*assessments)
+    assessment_ids = np.array(assessment_ids, dtype=np.int64)
+    total_marks = _column(total_marks)
+    weights = _column(weights)
+    scales = rubrics.get_scales(set(scale_ids), using=using)
+    rubric_max = _column(scales[s].max_value if s is not None else None for s in scale_ids)
+
+    scores = AssessmentScore.objects.using(using).filter(assessment_id__in=assessment_ids.tolist())
+    if student_ids is not None:
+        scores = scores.filter(student_id__in=student_ids)
+    if cohort_id is not None:
+        scores = scores.filter(student__cohort_id=cohort_id)
+    rows = list(scores.order_by().values_list(
+        'student_id', 'assessment_id', 'score', 'rubric_level__numeric_value'
+    ))
+    if not rows:
+        return empty
+
+    students, assessment_of, raw, rubric = zip(*rows)
+    students = np.array(students, dtype=np.int64)
+    index = np.searchsorted(assessment_ids, np.array(assessment_of, dtype=np.int64))
+    raw = _column(raw)
+    rubric = _column(rubric)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        numeric = np.where(total_marks[index] > 0, raw / total_marks[index] * 100, np.nan)
+        levelled = np.where(rubric_max[index] > 0, rubric / rubric_max[index] * 100, np.nan)
+    percentage = np.where(np.isnan(numeric), levelled, numeric)
+
+    usable = ~np.isnan(percentage)
+    students, percentage, weight = students[usable], percentage[usable], weights[index][usable]
+    if not len(students):
+        return empty
+
+    unique_students, student_index = np.unique(students, return_inverse=True)
+    counts = np.bincount(student_index)
+    sums = np.bincount(student_index, weights=percentage)
+    weighted_sums = np.bincount(student_index, weights=percentage * weight)
+    weight_sums = np.bincount(student_index, weights=weight)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weighted = np.where(weight_sums != 0, weighted_sums / weight_sums, np.nan)
+
+    return NormalizedScores(
+        term_id=term_id,
+        subject_id=subject_id,
+        student_ids=unique_students,
+        counts=counts,
+        averages=sums / counts,
+        weighted_averages=weighted,
+    )
@@ -0,0 +1,108 @@
+# ============================================================================
+# apps/assessments/rubrics.py
+# Process-local cache of rubric scales and their levels
+# ============================================================================
+#
+# Scales are tiny and almost never change, but every rubric conversion
+# (AssessmentScore, EvidenceRecord, ProjectParticipation) needs them. Each
+# process compiles a scale once into a CompiledScale; edits to scales or
+# levels invalidate every process's copy through the shared version token.
+
+from dataclasses import dataclass, field
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.academic.caching import ProcessLocalCache
+
+from .models import RubricLevel, RubricScale
+
+
+@dataclass(frozen=True)
+class Level:
+    pk: int
+    scale_id: int
+    code: str
+    label: str
+    numeric_value: float
+    sequence: int
+
+
+@dataclass
+class CompiledScale:
+    """One scale's levels, highest sequence first, with lookup maps"""
+    pk: int
+    levels: tuple
+    by_code: dict = field(init=False)
+    by_id: dict = field(init=False)
+    max_value: float | None = field(init=False)
+
+    def __post_init__(self):
+        self.by_code = {level.code: level for level in self.levels}
+        self.by_id = {level.pk: level for level in self.levels}
+        self.max_value = max((level.numeric_value for level in self.levels), default=None)
+
+
+EMPTY_SCALE = CompiledScale(pk=None, levels=())
+
+_scales = ProcessLocalCache('assessments:rubrics')
+
+
+def invalidate():
+    """Make every process reload its rubric scales on next use"""
+    _scales.invalidate()
+
+
+def get_scales(scale_ids, using=DEFAULT_DB_ALIAS):
+    """``{scale_id: CompiledScale}``; scales not cached yet are read in one query"""
+    scales = _scales.current()
+    missing = {pk for pk in scale_ids if pk is not None and pk not in scales}
+    if missing:
+        levels = {pk: [] for pk in missing}
+        for row in (
+            RubricLevel.objects.using(using).filter(rubric_scale_id__in=missing)
+            .order_by('rubric_scale_id', '-sequence')
+            .values_list('pk', 'rubric_scale_id', 'code', 'label', 'numeric_value', 'sequence')
+        ):
+            levels[row[1]].append(Level(*row))
+        for pk, rows in levels.items():
+            scales[pk] = CompiledScale(pk=pk, levels=tuple(rows))
+    return {pk: scales[pk] for pk in scale_ids if pk is not None}
+
+
+def get_scale(scale_id, using=DEFAULT_DB_ALIAS):
+    """CompiledScale of one scale; an empty scale for None"""
+    if scale_id is None:
+        return EMPTY_SCALE
+    return get_scales([scale_id], using=using)[scale_id]
+
+
+def get_levels(level_ids, using=DEFAULT_DB_ALIAS):
+    """
+    ``{level_id: Level}`` for RubricLevel ids from any scales. Only levels
+    of scales not cached yet cost a query.
+    """
+    level_ids = {pk for pk in level_ids if pk is not None}
+    scales = _scales.current()
+    found = {}
+    for scale in scales.values():
+        found.update((pk, scale.by_id[pk]) for pk in level_ids & scale.by_id.keys())
+    unknown = level_ids - found.keys()
+    if unknown:
+        scale_ids = set(
+            RubricLevel.objects.using(using).filter(pk__in=unknown)
+            .values_list('rubric_scale_id', flat=True)
+        )
+        for scale in get_scales(scale_ids, using=using).values():
+            found.update((pk, scale.by_id[pk]) for pk in unknown & scale.by_id.keys())
+    return found
+
+
+@receiver(post_save, sender=RubricScale)
+@receiver(post_delete, sender=RubricScale)
+@receiver(post_save, sender=RubricLevel)
+@receiver(post_delete, sender=RubricLevel)
+def rubric_changed(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    # Other processes must not reload the scale before the edit is visible
+    transaction.on_commit(invalidate, using=using)
@@ -0,0 +1,50 @@
+# ============================================================================
+# apps/assessments/serializers.py
+# ============================================================================
+
+from rest_framework import serializers
+
+from apps.academic.models import Cohort, Subject, Term
+
+from .models import ScoreImport
+
+
+class CohortSubjectTermSerializer(serializers.Serializer):
+    """Query parameters selecting one cohort's subject in a term"""
+    cohort = serializers.PrimaryKeyRelatedField(queryset=Cohort.objects.all())
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all())
+    term = serializers.PrimaryKeyRelatedField(queryset=Term.objects.all())
+
+
+class BulkScoreEntrySerializer(serializers.Serializer):
+    """
+    Envelope of a bulk mark entry. Rows are only checked for shape here;
+    ``bulk.validate_score_entries`` validates their content in bulk.
+    """
+    scores = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=10000
+    )
+    graded_by = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class ScoreImportUploadSerializer(serializers.Serializer):
+    """Multipart upload of a marks CSV for one cohort"""
+    file = serializers.FileField()
+    cohort = serializers.PrimaryKeyRelatedField(queryset=Cohort.objects.all())
+
+
+class ScoreImportSerializer(serializers.ModelSerializer):
+    """Outcome of a marks import, without the error rows themselves"""
+
+    class Meta:
+        model = ScoreImport
+        fields = [
+            'id', 'assessment', 'cohort', 'file_name', 'status', 'total_rows',
+            'imported_rows', 'error_count', 'uploaded_by', 'created_at', 'completed_at',
+        ]
+
+
+class AssessmentStatisticsSerializer(serializers.Serializer):
+    """Query parameters of the assessment statistics endpoint"""
+    pass_mark = serializers.FloatField(min_value=0, max_value=100, required=False)
+    bins = serializers.IntegerField(min_value=1, max_value=100, default=10)
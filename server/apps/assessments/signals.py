@@ -0,0 +1,12 @@
+# ============================================================================
+# apps/assessments/signals.py
+# Signals for score writes that bypass Model.save()/delete()
+# ============================================================================
+
+from django.dispatch import Signal
+
+
+# Sent after bulk_create(), bulk_update() and QuerySet.update() on
+# AssessmentScore. ``pairs`` is a set of (student_id, assessment_id) tuples
+# that were written.
+scores_changed = Signal()
@@ -0,0 +1,187 @@
+# ============================================================================
+# apps/assessments/statistics.py
+# Score statistics of one assessment, aggregated in the database
+# ============================================================================
+#
+# Count, mean and spread are one aggregate query, passes a COUNT. Quartiles read
+# at most two ordered values each at computed offsets, served by the
+# (assessment, score) index. The histogram is a GROUP BY over a FLOOR()ed
+# bin number and rubric levels are a GROUP BY over rubric_level. No query
+# returns more than a handful of rows, whatever the number of scores.
+#
+# Results are cached per assessment and parameters; any score or
+# assessment write replaces the assessment's cache version on commit.
+
+import math
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Avg, Count, F, Max, Min, StdDev, Value
+from django.db.models.functions import Floor, Greatest, Least
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import rubrics
+from .models import Assessment, AssessmentScore
+from .signals import scores_changed
+
+
+DEFAULT_BINS = 10
+QUARTILES = (25, 50, 75)
+
+
+def default_pass_mark():
+    """Pass threshold as a percentage of total marks"""
+    return getattr(settings, 'ASSESSMENTS_PASS_MARK', 50)
+
+
+def cache_timeout():
+    return getattr(settings, 'ASSESSMENTS_STATISTICS_CACHE_TIMEOUT', 600)
+
+
+def _version_key(assessment_id):
+    return f'assessments:statistics:{assessment_id}:version'
+
+
+def _version(assessment_id):
+    key = _version_key(assessment_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(assessment_ids, using=DEFAULT_DB_ALIAS):
+    """Drop cached statistics of these assessments once the transaction commits"""
+    assessment_ids = set(assessment_ids)
+
+    def bump():
+        cache.set_many(
+            {_version_key(pk): uuid.uuid4().hex for pk in assessment_ids}, None
+        )
+
+    transaction.on_commit(bump, using=using)
+
+
+def cached_statistics(assessment, pass_mark=None, bins=DEFAULT_BINS, using=DEFAULT_DB_ALIAS):
+    """``assessment_statistics()`` through the cache"""
+    pass_mark = default_pass_mark() if pass_mark is None else pass_mark
+    key = (
+        f'assessments:statistics:{assessment.pk}:{_version(assessment.pk)}'
+        f':{pass_mark:g}:{bins}'
+    )
+    stats = cache.get(key)
+    if stats is None:
+        stats = assessment_statistics(assessment, pass_mark, bins, using=using)
+        cache.set(key, stats, cache_timeout())
+    return stats
+
+
+def _quantiles(scores, count, percents):
+    """Linear-interpolated percentiles, reading two ordered values per percentile"""
+    ordered = scores.order_by('score').values_list('score', flat=True)
+    result = {}
+    for p in percents:
+        rank = (count - 1) * p / 100
+        low = math.floor(rank)
+        values = list(ordered[low:low + 2])
+        high = values[1] if len(values) > 1 else values[0]
+        result[str(p)] = values[0] + (high - values[0]) * (rank - low)
+    return result
+
+
+def assessment_statistics(assessment, pass_mark=None, bins=DEFAULT_BINS, using=DEFAULT_DB_ALIAS):
+    """
+    Statistics of an assessment's numeric scores, in marks, and the count of
+    scores per rubric level.
+
+    ``pass_mark`` is a percentage of total_marks (of the top score when the
+    assessment has no total). The histogram has ``bins`` equal-width bins
+    over 0 to that same maximum; the top score falls in the last bin.
+    """
+    pass_mark = default_pass_mark() if pass_mark is None else pass_mark
+    scores = AssessmentScore.objects.using(using).filter(
+        assessment_id=assessment.pk, score__isnull=False
+    )
+    summary = scores.aggregate(
+        count=Count('score'),
+        mean=Avg('score'),
+        std_dev=StdDev('score'),
+        minimum=Min('score'),
+        maximum=Max('score'),
+    )
+    count = summary['count']
+    scale = assessment.total_marks or summary['maximum'] or 0
+
+    stats = {
+        'assessment': assessment.pk,
+        'evaluation_type': assessment.evaluation_type,
+        'total_marks': assessment.total_marks,
+        **summary,
+        'quartiles': {str(p): None for p in QUARTILES},
+        'pass_mark': pass_mark,
+        'pass_score': scale * pass_mark / 100 if scale else None,
+        'passed': 0,
+        'pass_rate': None,
+        'histogram': {'edges': [], 'counts': []},
+        'rubric_levels': [],
+    }
+
+    if count:
+        stats['quartiles'] = _quantiles(scores, count, QUARTILES)
+        if scale:
+            stats['passed'] = scores.filter(score__gte=stats['pass_score']).count()
+            stats['pass_rate'] = stats['passed'] / count * 100
+
+            width = scale / bins
+            bin_number = Least(
+                Greatest(Floor(F('score') / Value(width)), Value(0.0)),
+                Value(float(bins - 1)),
+            )
+            counts = [0] * bins
+            for row in scores.annotate(bin=bin_number).values('bin').annotate(
+                n=Count('pk')
+            ).order_by():
+                counts[int(row['bin'])] += row['n']
+            stats['histogram'] = {
+                'edges': [width * i for i in range(bins + 1)],
+                'counts': counts,
+            }
+
+    if assessment.rubric_scale_id:
+        levelled = dict(
+            AssessmentScore.objects.using(using)
+            .filter(assessment_id=assessment.pk, rubric_level__isnull=False)
+            .values('rubric_level_id').annotate(n=Count('pk'))
+            .order_by().values_list('rubric_level_id', 'n')
+        )
+        total = sum(levelled.values())
+        stats['rubric_levels'] = [
+            {
+                'code': level.code,
+                'label': level.label,
+                'count': levelled.get(level.pk, 0),
+                'share': levelled.get(level.pk, 0) / total * 100 if total else None,
+            }
+            for level in rubrics.get_scale(assessment.rubric_scale_id, using=using).levels
+        ]
+    return stats
+
+
+@receiver(scores_changed)
+def scores_written(sender, pairs, using, **kwargs):
+    invalidate({assessment_id for _, assessment_id in pairs}, using=using)
+
+
+@receiver(post_save, sender=AssessmentScore)
+@receiver(post_delete, sender=AssessmentScore)
+def score_written(sender, instance, using, **kwargs):
+    invalidate([instance.assessment_id], using=using)
+
+
+@receiver(post_save, sender=Assessment)
+def assessment_written(sender, instance, using, **kwargs):
+    invalidate([instance.pk], using=using)
@@ -1,3 +1,374 @@
-from django.test import TestCase
+import csv
+import io
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.academic.models import Cohort, CohortSubject, Subject, Term
+from apps.academic.query_counts import SIZES, QueryCountTestCase
+from apps.academic.synthetic import SchoolGenerator
+
+from . import rubrics
+from .bulk import validate_score_entries
+from .imports import import_scores
+from .models import (
+    Assessment, AssessmentScore, AssessmentType, EvaluationType, ImportStatus, RubricLevel,
+    RubricScale, ScoreImport,
+)
+from .normalization import normalize_subject_term
+
+
+def bulk_score_entry(school):
+    scores = [
+        {'student': pk, 'score': 10 + n % 20}
+        for n, pk in enumerate(school.students.values_list('pk', flat=True))
+    ]
+    url = reverse('assessments:bulk-score-entry', args=[school.assessment.pk])
+    return school.client.post(url, {'scores': scores}, format='json')
+
+
+def score_import(school):
+    rows = ['Admission No,Marks'] + [
+        f'{number},{n % 30}'
+        for n, number in enumerate(school.students.values_list('admission_number', flat=True))
+    ] + ['UNKNOWN/1,12']
+    upload = SimpleUploadedFile('marks.csv', '\n'.join(rows).encode(), content_type='text/csv')
+    url = reverse('assessments:score-import', args=[school.assessment.pk])
+    return school.client.post(url, {'file': upload, 'cohort': school.cohort.pk},
+                              format='multipart')
+
+
+def score_import_errors(school):
+    errors = [
+        {'row': n + 2, 'admission_number': f'X/{n}', 'field': 'score',
+         'message': 'Score exceeds total marks'}
+        for n in range(school.students.count())
+    ]
+    imported = ScoreImport.objects.create(
+        assessment=school.assessment, cohort=school.cohort, status=ImportStatus.COMPLETED,
+        error_count=len(errors), errors=errors,
+    )
+    return school.client.get(reverse('assessments:score-import-errors', args=[imported.pk]))
+
+
+class AdminQueryCountTests(QueryCountTestCase):
+
+    def test_changelists(self):
+        self.assertConstantChangelists('assessments')
+
+
+class EndpointQueryCountTests(QueryCountTestCase):
+
+    def test_read_endpoints(self):
+        self.assertConstantQueries({
+            'marksheet-export': lambda school: school.client.get(
+                reverse('assessments:marksheet-export'), school.params
+            ),
+            'gradebook': lambda school: school.client.get(
+                reverse('assessments:gradebook'), school.params
+            ),
+            'assessment-statistics': lambda school: school.client.get(
+                reverse('assessments:assessment-statistics', args=[school.assessment.pk])
+            ),
+            'score-import-errors': score_import_errors,
+        })
+
+    def test_write_endpoints(self):
+        self.assertConstantQueries({
+            'bulk-score-entry': bulk_score_entry,
+            'score-import': score_import,
+        })
+
+
+class NormalizationTests(TestCase):
+    """Numeric and rubric scores normalized to percentages and weighted together"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SchoolGenerator(SIZES['small']).generate()
+        cohort = Cohort.objects.order_by('pk').first()
+        cls.term = Term.objects.filter(academic_year_id=cohort.academic_year_id).first()
+        cls.subject = Subject.objects.create(curriculum=cohort.curriculum, code='NRM',
+                                             name='Normalization')
+        cls.students = list(cohort.students.order_by('pk').values_list('pk', flat=True)[:3])
+        scale = RubricScale.objects.create(curriculum=cohort.curriculum, name='Three levels')
+        cls.levels = {
+            value: RubricLevel.objects.create(rubric_scale=scale, code=str(value),
+                                              label=f'Level {value}', numeric_value=value,
+                                              sequence=value)
+            for value in (1, 2, 4)
+        }
+        cls.numeric = cls.assessment(EvaluationType.NUMERIC, weight=3, total_marks=50)
+        cls.rubric = cls.assessment(EvaluationType.RUBRIC, weight=1, rubric_scale=scale)
+        cls.descriptive = cls.assessment(EvaluationType.DESCRIPTIVE, weight=5)
+
+    @classmethod
+    def assessment(cls, evaluation_type, **fields):
+        return Assessment.objects.create(
+            term=cls.term, subject=cls.subject, name=evaluation_type.label,
+            assessment_type=AssessmentType.CAT, evaluation_type=evaluation_type, **fields,
+        )
+
+    def score(self, assessment, student, score=None, level=None):
+        AssessmentScore.objects.create(assessment=assessment, student_id=self.students[student],
+                                       score=score, rubric_level=self.levels.get(level))
+
+    def test_mixed_numeric_and_rubric_weighting(self):
+        self.score(self.numeric, 0, score=40)           # 80%
+        self.score(self.rubric, 0, level=2)             # 50%
+        self.score(self.numeric, 1, score=25)           # 50%
+        self.score(self.rubric, 1)                      # neither: ignored
+        self.score(self.rubric, 2, level=4)             # 100%
+        self.score(self.descriptive, 2, score=7)        # no total marks: ignored
+
+        normalized = normalize_subject_term(self.term.pk, self.subject.pk)
+        self.assertEqual(list(normalized.rows()), [
+            (self.students[0], 2, 65.0, 72.5),
+            (self.students[1], 1, 50.0, 50.0),
+            (self.students[2], 1, 100.0, 100.0),
+        ])
+
+    def test_numeric_score_wins_over_level(self):
+        self.numeric.rubric_scale = self.rubric.rubric_scale
+        self.numeric.save()
+        self.score(self.numeric, 0, score=10, level=4)  # 20%, not 100%
+        self.score(self.numeric, 1, level=1)            # 25% from the level
+
+        normalized = normalize_subject_term(self.term.pk, self.subject.pk,
+                                            student_ids=self.students[:2])
+        self.assertEqual([row[2] for row in normalized.rows()], [20.0, 25.0])
+
+
+class ScoreValidationTests(TestCase):
+    """Mark-entry rows, accepted only for students taking the subject"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SchoolGenerator(SIZES['small']).generate()
+        cls.cohort, other = Cohort.objects.order_by('pk')[:2]
+        term = Term.objects.filter(academic_year_id=cls.cohort.academic_year_id).first()
+        subject = Subject.objects.create(curriculum=cls.cohort.curriculum, code='VAL',
+                                         name='Validation')
+        CohortSubject.objects.create(cohort=cls.cohort, subject=subject)
+        cls.assessment = Assessment.objects.create(
+            term=term, subject=subject, name='CAT 1', assessment_type=AssessmentType.CAT,
+            evaluation_type=EvaluationType.NUMERIC, total_marks=20,
+        )
+        cls.taking = cls.cohort.students.order_by('pk').first()
+        cls.other = other.students.order_by('pk').first()
+
+    def test_rows(self):
+        scores, errors = validate_score_entries(self.assessment, [
+            {'student': self.taking.pk, 'score': '12'},
+            {'student': self.other.pk, 'score': 12},
+            {'student': 0, 'score': 12},
+            {'student': self.taking.pk, 'score': 15},
+            {'score': 12},
+        ])
+        self.assertEqual([(score.student_id, score.score) for score in scores],
+                         [(self.taking.pk, 12.0)])
+        self.assertEqual([(error['row'], error['field'], error['message']) for error in errors], [
+            (1, 'student', f"Student {self.other.pk!r} is not in a class taking this subject."),
+            (2, 'student', "Unknown student 0."),
+            (3, 'student', f"Student {self.taking.pk!r} appears more than once."),
+            (4, 'student', "This field is required."),
+        ])
+
+    def test_year_round_assessment(self):
+        assessment = Assessment.objects.create(
+            term=None, subject=self.assessment.subject, name='Portfolio',
+            assessment_type=AssessmentType.CAT, evaluation_type=EvaluationType.NUMERIC,
+            total_marks=20,
+        )
+        scores, errors = validate_score_entries(assessment, [
+            {'student': self.taking.pk, 'score': 12},
+            {'student': self.other.pk, 'score': 12},
+        ])
+        self.assertEqual([score.student_id for score in scores], [self.taking.pk])
+        self.assertEqual([(error['row'], error['field']) for error in errors], [(1, 'student')])
+
+    def test_admission_numbers(self):
+        scores, errors = validate_score_entries(self.assessment, [
+            {'admission_number': f' {self.taking.admission_number} ', 'score': 25},
+            {'admission_number': self.other.admission_number, 'comments': 'Absent'},
+        ], student_field='admission_number')
+        self.assertEqual(scores, [])
+        self.assertEqual([(error['row'], error['field']) for error in errors],
+                         [(0, 'score'), (1, 'admission_number')])
+
+    def test_import_for_a_class_not_taking_the_subject(self):
+        imported = ScoreImport.objects.create(assessment=self.assessment,
+                                              cohort=self.other.cohort)
+        stream = io.StringIO(f'Admission No,Marks\n{self.other.admission_number},12\n')
+        import_scores(imported, stream)
+        self.assertEqual((imported.status, imported.total_rows, imported.imported_rows,
+                          imported.error_count), (ImportStatus.COMPLETED, 1, 0, 1))
+        self.assertFalse(AssessmentScore.objects.filter(assessment=self.assessment).exists())
+
+    def test_import_failing_midway(self):
+        imported = ScoreImport.objects.create(assessment=self.assessment, cohort=self.cohort)
+        numbers = self.cohort.students.order_by('pk').values_list('admission_number', flat=True)
+        rows = [f'{number},{n}' for n, number in enumerate(numbers[:3])] + [
+            'UNKNOWN/1,5', '"' + 'x' * (csv.field_size_limit() + 1) + '",5',
+        ]
+        import_scores(imported, io.StringIO('Admission No,Marks\n' + '\n'.join(rows)),
+                      chunk_size=2)
+        self.assertEqual((imported.status, imported.total_rows, imported.imported_rows,
+                          imported.error_count, len(imported.errors)),
+                         (ImportStatus.FAILED, 0, 0, 1, 1))
+        self.assertIsNone(imported.errors[0]['row'])
+        self.assertFalse(AssessmentScore.objects.filter(assessment=self.assessment).exists())
+
+
+@override_settings(ROOT_URLCONF='apps.academic.query_counts')
+class ScoreSetTestCase(TestCase):
+    """A new subject of one class, with hand-picked scores"""
+
+    scores = [2, 5, 10, 10, 20]          # out of 20
+    levels = ['ME', 'EE', 'ME', None, 'BE']
+
+    @classmethod
+    def setUpTestData(cls):
+        SchoolGenerator(SIZES['large']).generate()
+        cls.cohort = Cohort.objects.order_by('pk').first()
+        cls.term = Term.objects.filter(academic_year_id=cls.cohort.academic_year_id).first()
+        cls.subject = Subject.objects.create(curriculum=cls.cohort.curriculum, code='FIX',
+                                             name='Fixture')
+        CohortSubject.objects.create(cohort=cls.cohort, subject=cls.subject)
+        cls.scale = RubricScale.objects.create(curriculum=cls.cohort.curriculum, name='CBC')
+        for sequence, code in enumerate(['BE', 'AE', 'ME', 'EE'], start=1):
+            RubricLevel.objects.create(rubric_scale=cls.scale, code=code, label=f'Level {code}',
+                                       numeric_value=sequence, sequence=sequence)
+        cls.students = list(cls.cohort.students.order_by('pk')[:len(cls.scores)])
+        cls.numeric = Assessment.objects.create(
+            term=cls.term, subject=cls.subject, name='CAT 1', assessment_type=AssessmentType.CAT,
+            evaluation_type=EvaluationType.NUMERIC, total_marks=20,
+        )
+        cls.rubric = Assessment.objects.create(
+            term=cls.term, subject=cls.subject, name='Project', assessment_type=AssessmentType.CAT,
+            evaluation_type=EvaluationType.RUBRIC, rubric_scale=cls.scale,
+        )
+        codes = {level.code: level for level in cls.scale.levels.all()}
+        for student, score, code in zip(cls.students, cls.scores, cls.levels):
+            AssessmentScore.objects.create(assessment=cls.numeric, student=student, score=score)
+            if code:
+                AssessmentScore.objects.create(assessment=cls.rubric, student=student,
+                                               rubric_level=codes[code])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_login(get_user_model().objects.create_superuser(
+            email='teacher@synthetic.school', password=None, first_name='Score', last_name='Set',
+        ))
+
+
+class StatisticsTests(ScoreSetTestCase):
+
+    def statistics(self, assessment, **params):
+        response = self.client.get(
+            reverse('assessments:assessment-statistics', args=[assessment.pk]), params
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_numeric(self):
+        stats = self.statistics(self.numeric, pass_mark=40, bins=4)
+        self.assertEqual(
+            {key: stats[key] for key in ('count', 'mean', 'minimum', 'maximum', 'pass_score',
+                                         'passed', 'pass_rate')},
+            {'count': 5, 'mean': 9.4, 'minimum': 2, 'maximum': 20, 'pass_score': 8,
+             'passed': 3, 'pass_rate': 60},
+        )
+        self.assertEqual(stats['quartiles'], {'25': 5, '50': 10, '75': 10})
+        self.assertEqual(stats['histogram'], {'edges': [0, 5, 10, 15, 20],
+                                              'counts': [1, 1, 2, 1]})
+
+    def test_interpolated_percentiles(self):
+        AssessmentScore.objects.filter(assessment=self.numeric, score=20).delete()
+        # 2, 5, 10, 10: ranks 0.75, 1.5 and 2.25
+        self.assertEqual(self.statistics(self.numeric)['quartiles'],
+                         {'25': 4.25, '50': 7.5, '75': 10})
+
+    def test_rubric_levels(self):
+        stats = self.statistics(self.rubric)
+        self.assertEqual(stats['count'], 0)
+        self.assertEqual(
+            [(level['code'], level['count'], level['share']) for level in stats['rubric_levels']],
+            [('EE', 1, 25), ('ME', 2, 50), ('AE', 0, 0), ('BE', 1, 25)],
+        )
+
+    def test_score_edit_replaces_cached_statistics(self):
+        self.assertEqual(self.statistics(self.numeric)['maximum'], 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            AssessmentScore.objects.filter(assessment=self.numeric, score=20).update(score=15)
+        stats = self.statistics(self.numeric)
+        self.assertEqual((stats['maximum'], stats['mean']), (15, 8.4))
+
+
+class GradebookTests(ScoreSetTestCase):
+
+    @property
+    def params(self):
+        return {'cohort': self.cohort.pk, 'subject': self.subject.pk, 'term': self.term.pk}
+
+    def test_gradebook(self):
+        response = self.client.get(reverse('assessments:gradebook'), self.params)
+        self.assertEqual(response.status_code, 200)
+        gradebook = response.data
+        self.assertEqual(gradebook['assessments']['ids'], [self.numeric.pk, self.rubric.pk])
+        self.assertEqual(gradebook['students']['ids'], list(
+            self.cohort.students.order_by('admission_number').values_list('pk', flat=True)
+        ))
+
+        expected = {student.pk: [score, code]
+                    for student, score, code in zip(self.students, self.scores, self.levels)}
+        rows = dict(zip(gradebook['students']['ids'], gradebook['scores']))
+        for student_id, cells in rows.items():
+            self.assertEqual(cells, expected.get(student_id, [None, None]))
+        self.assertIn([10, None], rows.values())
+        self.assertEqual(
+            [level['code'] for level in gradebook['rubric_levels'][str(self.scale.pk)]],
+            ['EE', 'ME', 'AE', 'BE'],
+        )
+
+    def test_marksheet_export(self):
+        response = self.client.get(reverse('assessments:marksheet-export'), self.params)
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['Admission No.', 'Name', 'CAT 1 (/20)', 'Project'])
+        self.assertEqual(len(rows), self.cohort.students.count() + 1)
+
+        student = self.students[-1]
+        name = ' '.join(part for part in (student.first_name, student.middle_name,
+                                          student.last_name) if part)
+        self.assertIn([student.admission_number, name, '20.0', 'BE'], rows)
+
+
+class RubricCacheTests(ScoreSetTestCase):
+
+    def setUp(self):
+        super().setUp()
+        rubrics.invalidate()
+
+    def labels(self):
+        return [level.label for level in rubrics.get_scale(self.scale.pk).levels]
+
+    def test_level_edit_reloads_on_commit(self):
+        self.assertEqual(self.labels(), ['Level EE', 'Level ME', 'Level AE', 'Level BE'])
+        level = RubricLevel.objects.get(rubric_scale=self.scale, code='EE')
+        with self.captureOnCommitCallbacks(execute=True):
+            level.label = 'Exceeding'
+            level.save()
+            # Not before the edit commits
+            with self.assertNumQueries(0):
+                self.assertEqual(self.labels()[0], 'Level EE')
+        self.assertEqual(self.labels(), ['Exceeding', 'Level ME', 'Level AE', 'Level BE'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            level.delete()
+        self.assertEqual(self.labels(), ['Level ME', 'Level AE', 'Level BE'])
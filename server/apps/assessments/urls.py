@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'assessments'
+
+urlpatterns = [
+    path('marksheet/', views.MarksheetExportView.as_view(), name='marksheet-export'),
+    path('<int:pk>/scores/', views.BulkScoreEntryView.as_view(), name='bulk-score-entry'),
+    path('<int:pk>/statistics/', views.AssessmentStatisticsView.as_view(),
+         name='assessment-statistics'),
+    path('<int:pk>/imports/', views.ScoreImportView.as_view(), name='score-import'),
+    path('imports/<int:pk>/errors/', views.ScoreImportErrorsView.as_view(),
+         name='score-import-errors'),
+    path('gradebook/', views.GradebookView.as_view(), name='gradebook'),
+]
@@ -1,3 +1,150 @@
-from django.shortcuts import render
+# ============================================================================
+# apps/assessments/views.py
+# Assessment API views
+# ============================================================================
 
-# Create your views here.
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .bulk import save_scores, validate_score_entries
+from .exports import marksheet_assessments, marksheet_csv
+from .gradebook import build_gradebook
+from .imports import error_report_csv, import_scores, open_upload
+from .models import Assessment, ScoreImport
+from .serializers import (
+    AssessmentStatisticsSerializer, BulkScoreEntrySerializer, CohortSubjectTermSerializer,
+    ScoreImportSerializer, ScoreImportUploadSerializer,
+)
+from .statistics import cached_statistics
+
+
+class MarksheetExportView(APIView):
+    """
+    GET ?cohort=<id>&subject=<id>&term=<id>
+
+    Streams the cohort's marksheet for a subject and term as CSV.
+    """
+
+    def get(self, request):
+        params = CohortSubjectTermSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        cohort, subject, term = (
+            params.validated_data[key] for key in ('cohort', 'subject', 'term')
+        )
+
+        assessments = marksheet_assessments(term.pk, subject.pk)
+        response = StreamingHttpResponse(
+            marksheet_csv(cohort.pk, assessments),
+            content_type='text/csv',
+        )
+        filename = f"marksheet-{cohort.name}-{subject.code}-{term.name}.csv".replace(' ', '_')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class GradebookView(APIView):
+    """
+    GET ?cohort=<id>&subject=<id>&term=<id>
+
+    The whole gradebook in one response: student and assessment columns
+    once, then a dense score matrix (null = no score, string = rubric code).
+    """
+
+    def get(self, request):
+        params = CohortSubjectTermSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        return Response(build_gradebook(data['cohort'].pk, data['subject'].pk, data['term'].pk))
+
+
+class BulkScoreEntryView(APIView):
+    """
+    POST {"scores": [{"student": <id>, "score": 42, "rubric_level": "ME",
+    "comments": ""}, ...], "graded_by": "..."}
+
+    Validates every row against the assessment, then inserts or overwrites
+    all of them. Nothing is saved if any row is invalid; the response then
+    lists each problem by row index.
+    """
+
+    def post(self, request, pk):
+        assessment = get_object_or_404(Assessment, pk=pk)
+        payload = BulkScoreEntrySerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+
+        scores, errors = validate_score_entries(assessment, payload.validated_data['scores'])
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        graded_by = payload.validated_data.get('graded_by')
+        if graded_by is None and request.user.is_authenticated:
+            graded_by = request.user.get_username()
+        saved = save_scores(scores, graded_by=graded_by or '')
+        return Response({'assessment': assessment.pk, 'saved': saved})
+
+
+class ScoreImportView(APIView):
+    """
+    POST multipart: file=<marks CSV>, cohort=<id>
+
+    Imports the file into the assessment. The CSV needs an admission number
+    column and any of score/marks, rubric level and comments columns. Rows
+    that fail validation are skipped and listed in the error report.
+    """
+
+    def post(self, request, pk):
+        assessment = get_object_or_404(Assessment, pk=pk)
+        upload = ScoreImportUploadSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        file = upload.validated_data['file']
+
+        score_import = ScoreImport.objects.create(
+            assessment=assessment,
+            cohort=upload.validated_data['cohort'],
+            file_name=file.name[:255],
+            uploaded_by=request.user.get_username() if request.user.is_authenticated else '',
+        )
+        stream = open_upload(file)
+        try:
+            import_scores(score_import, stream)
+        finally:
+            stream.detach()
+
+        data = ScoreImportSerializer(score_import).data
+        data['errors_url'] = request.build_absolute_uri(
+            reverse('assessments:score-import-errors', args=[score_import.pk])
+        ) if score_import.error_count else None
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class ScoreImportErrorsView(APIView):
+    """GET: the rows a marks import skipped, as a CSV download"""
+
+    def get(self, request, pk):
+        score_import = get_object_or_404(ScoreImport, pk=pk)
+        response = StreamingHttpResponse(error_report_csv(score_import), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="import-{pk}-errors.csv"'
+        return response
+
+
+class AssessmentStatisticsView(APIView):
+    """
+    GET ?pass_mark=<percent>&bins=<n>
+
+    Count, mean, spread, quartiles, pass rate and histogram of the
+    assessment's scores, plus the spread across rubric levels.
+    """
+
+    def get(self, request, pk):
+        assessment = get_object_or_404(Assessment, pk=pk)
+        params = AssessmentStatisticsSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(cached_statistics(
+            assessment,
+            pass_mark=params.validated_data.get('pass_mark'),
+            bins=params.validated_data['bins'],
+        ))
@@ -1,34 +1,28 @@
-# apps/academic/admin.py
+# apps/cbc/admin.py
 from django.contrib import admin
-from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject
+from .models import Strand, SubStrand, LearningOutcome, EvidenceRecord
 
-@admin.register(AcademicYear)
-class AcademicYearAdmin(admin.ModelAdmin):
-    list_display = ['name', 'start_date', 'end_date', 'is_current']
-    list_filter = ['is_current']
-
-@admin.register(Term)
-class TermAdmin(admin.ModelAdmin):
-    list_display = ['name', 'academic_year', 'sequence', 'start_date', 'end_date']
-    list_filter = ['academic_year']
-
-@admin.register(Curriculum)
-class CurriculumAdmin(admin.ModelAdmin):
-    list_display = ['name', 'curriculum_type', 'is_active']
-    list_filter = ['curriculum_type', 'is_active']
-
-@admin.register(Subject)
-class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'curriculum']
+@admin.register(Strand)
+class StrandAdmin(admin.ModelAdmin):
+    list_display = ['code', 'name', 'curriculum', 'subject', 'sequence']
     list_filter = ['curriculum']
-    search_fields = ['code', 'name']
+    list_select_related = ['curriculum', 'subject']
+
+@admin.register(SubStrand)
+class SubStrandAdmin(admin.ModelAdmin):
+    list_display = ['code', 'name', 'strand', 'sequence']
+    list_select_related = ['strand']
 
-@admin.register(Cohort)
-class CohortAdmin(admin.ModelAdmin):
-    list_display = ['name', 'level', 'curriculum', 'academic_year']
-    list_filter = ['curriculum', 'academic_year']
+@admin.register(LearningOutcome)
+class LearningOutcomeAdmin(admin.ModelAdmin):
+    list_display = ['code', 'description', 'sub_strand', 'level']
+    list_select_related = ['sub_strand']
+    search_fields = ['code', 'description']
 
-@admin.register(CohortSubject)
-class CohortSubjectAdmin(admin.ModelAdmin):
-    list_display = ['cohort', 'subject', 'is_compulsory']
-    list_filter = ['cohort', 'is_compulsory']
\ No newline at end of file
+@admin.register(EvidenceRecord)
+class EvidenceRecordAdmin(admin.ModelAdmin):
+    list_display = ['student', 'learning_outcome', 'evaluation_type', 'rubric_level',
+                    'numeric_score', 'observed_at']
+    list_filter = ['evaluation_type', 'source_type']
+    list_select_related = ['student', 'learning_outcome', 'rubric_level']
+    raw_id_fields = ['student', 'learning_outcome']
@@ -1,34 +1,28 @@
-# apps/academic/admin.py
+# apps/projects/admin.py
 from django.contrib import admin
-from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject
+from apps.academic.admin import RelatedListFilter
+from .models import Project, ProjectParticipation, ProjectMilestone, MilestoneScore
 
-@admin.register(AcademicYear)
-class AcademicYearAdmin(admin.ModelAdmin):
-    list_display = ['name', 'start_date', 'end_date', 'is_current']
-    list_filter = ['is_current']
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ['name', 'subject', 'term', 'evaluation_type', 'start_date', 'end_date']
+    list_filter = [('term', RelatedListFilter), 'evaluation_type']
+    list_select_related = ['subject', 'term__academic_year']
 
-@admin.register(Term)
-class TermAdmin(admin.ModelAdmin):
-    list_display = ['name', 'academic_year', 'sequence', 'start_date', 'end_date']
-    list_filter = ['academic_year']
+@admin.register(ProjectParticipation)
+class ProjectParticipationAdmin(admin.ModelAdmin):
+    list_display = ['student', 'project', 'final_score', 'rubric_level', 'evaluated_at']
+    list_select_related = ['student', 'project__subject', 'rubric_level']
+    raw_id_fields = ['student', 'project']
 
-@admin.register(Curriculum)
-class CurriculumAdmin(admin.ModelAdmin):
-    list_display = ['name', 'curriculum_type', 'is_active']
-    list_filter = ['curriculum_type', 'is_active']
+@admin.register(ProjectMilestone)
+class ProjectMilestoneAdmin(admin.ModelAdmin):
+    list_display = ['name', 'project', 'sequence', 'due_date', 'max_score']
+    list_select_related = ['project__subject']
 
-@admin.register(Subject)
-class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'curriculum']
-    list_filter = ['curriculum']
-    search_fields = ['code', 'name']
-
-@admin.register(Cohort)
-class CohortAdmin(admin.ModelAdmin):
-    list_display = ['name', 'level', 'curriculum', 'academic_year']
-    list_filter = ['curriculum', 'academic_year']
-
-@admin.register(CohortSubject)
-class CohortSubjectAdmin(admin.ModelAdmin):
-    list_display = ['cohort', 'subject', 'is_compulsory']
-    list_filter = ['cohort', 'is_compulsory']
\ No newline at end of file
+@admin.register(MilestoneScore)
+class MilestoneScoreAdmin(admin.ModelAdmin):
+    list_display = ['participation', 'milestone', 'score', 'evaluated_at']
+    list_select_related = ['participation__student', 'participation__project',
+                           'milestone__project']
+    raw_id_fields = ['participation', 'milestone']
@@ -1,3 +1,7 @@
-from django.test import TestCase
+from apps.academic.query_counts import QueryCountTestCase
 
-# Create your tests here.
+
+class AdminQueryCountTests(QueryCountTestCase):
+
+    def test_changelists(self):
+        self.assertConstantChangelists('projects')
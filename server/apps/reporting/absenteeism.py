@@ -0,0 +1,210 @@
+# ============================================================================
+# apps/reporting/absenteeism.py
+# Rolling-window chronic absence and lateness detection
+# ============================================================================
+#
+# Attendance records are read once, a keyset chunk of students at a time,
+# ordered by student and date, and folded into per-day status counts. Each
+# rule keeps a rolling window over those days (the last N school days, or
+# the last N calendar days) with running totals, so a student's history is
+# scanned once whatever the number of rules. Only one chunk's records are
+# held in memory: MySQL drivers buffer a whole result set, so a single
+# streamed query over every record would not be bounded. Every run of days
+# a window spends over its threshold becomes an AbsenteeismFlag episode,
+# written with chunked upserts.
+
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert
+from apps.learners.models import Student
+from apps.sessions.models import AttendanceRecord, AttendanceStatus
+
+from .models import AbsenteeismFlag
+
+
+SCHOOL_DAYS = 'school_days'
+CALENDAR_DAYS = 'days'
+
+FLUSH_SIZE = 1000
+
+STUDENT_CHUNK_SIZE = 500
+
+FLAG_FIELDS = [
+    'last_seen_on', 'ended_on', 'is_active', 'window_sessions', 'window_hits',
+    'peak_rate', 'refreshed_at',
+]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    Flag a student when ``statuses`` make up at least ``threshold`` of the
+    sessions marked in the window. Windows with fewer than
+    ``min_sessions`` marked sessions are never flagged.
+    """
+    name: str
+    window: int
+    unit: str = SCHOOL_DAYS
+    statuses: tuple = (AttendanceStatus.ABSENT,)
+    threshold: float = 0.2
+    min_sessions: int = 1
+
+
+DEFAULT_RULES = (
+    Rule('absent-10-days', 10, SCHOOL_DAYS, (AttendanceStatus.ABSENT,), 0.2, 10),
+    Rule('missed-4-weeks', 28, CALENDAR_DAYS,
+         (AttendanceStatus.ABSENT, AttendanceStatus.EXCUSED, AttendanceStatus.SICK), 0.1, 20),
+    Rule('late-4-weeks', 28, CALENDAR_DAYS, (AttendanceStatus.LATE,), 0.25, 20),
+)
+
+
+def absenteeism_rules():
+    """Rules from REPORTING_ABSENTEEISM_RULES, Rule instances or dicts of Rule fields"""
+    rules = getattr(settings, 'REPORTING_ABSENTEEISM_RULES', DEFAULT_RULES)
+    return tuple(rule if isinstance(rule, Rule) else Rule(**rule) for rule in rules)
+
+
+class RollingWindow:
+    """One rule's window over one student's school days"""
+
+    def __init__(self, rule, student_id, now):
+        self.rule = rule
+        self.student_id = student_id
+        self.now = now
+        self.days = deque()      # (date, sessions, hits)
+        self.sessions = 0
+        self.hits = 0
+        self.flag = None
+
+    def push(self, day, counts):
+        """Add a school day; returns the episode it ends, if any"""
+        hits = sum(counts[status] for status in self.rule.statuses)
+        sessions = sum(counts.values())
+        self.days.append((day, sessions, hits))
+        self.sessions += sessions
+        self.hits += hits
+        if self.rule.unit == SCHOOL_DAYS:
+            while len(self.days) > self.rule.window:
+                self._evict()
+        else:
+            while self.days[0][0] <= day - timedelta(days=self.rule.window):
+                self._evict()
+
+        if (self.sessions >= self.rule.min_sessions
+                and self.hits >= self.rule.threshold * self.sessions):
+            self._over(day)
+            return None
+        if self.flag is not None:
+            flag, self.flag = self.flag, None
+            flag.ended_on, flag.is_active = day, False
+            return flag
+        return None
+
+    def finish(self):
+        """The episode still open on the student's latest day, if any"""
+        flag, self.flag = self.flag, None
+        return flag
+
+    def _evict(self):
+        _, sessions, hits = self.days.popleft()
+        self.sessions -= sessions
+        self.hits -= hits
+
+    def _over(self, day):
+        if self.flag is None:
+            self.flag = AbsenteeismFlag(
+                student_id=self.student_id, rule=self.rule.name, started_on=day,
+                is_active=True, refreshed_at=self.now,
+            )
+        flag = self.flag
+        flag.last_seen_on = day
+        rate = self.hits / self.sessions
+        if rate >= flag.peak_rate:
+            flag.peak_rate = rate
+            flag.window_sessions, flag.window_hits = self.sessions, self.hits
+
+
+@dataclass
+class DetectionResult:
+    records: int = 0
+    students: int = 0
+    flags: int = 0
+    active: Counter = field(default_factory=Counter)     # rule -> active episodes
+    removed: int = 0
+    seconds: float = 0.0
+
+
+def detect_absenteeism(since, rules=None, chunk_size=STUDENT_CHUNK_SIZE,
+                       using=DEFAULT_DB_ALIAS):
+    """
+    Recompute the absenteeism episodes of every student from the records
+    dated ``since`` onwards, reading the records of ``chunk_size`` students
+    at a time. Windows start empty on ``since``.
+
+    Episodes are upserted on (student, rule, start), so reruns keep their
+    first detection time; episodes starting from ``since`` that the records
+    no longer support are deleted once every student is done. Earlier
+    episodes are left alone. Each flush commits on its own: an interrupted
+    run keeps what it wrote, and the next run finishes it.
+    """
+    rules = absenteeism_rules() if rules is None else tuple(rules)
+    started = time.perf_counter()
+    now = timezone.now()
+    result = DetectionResult()
+    pending = []
+
+    def flush():
+        with transaction.atomic(using=using):
+            bulk_upsert(AbsenteeismFlag, pending, unique_fields=['student', 'rule', 'started_on'],
+                        update_fields=FLAG_FIELDS, using=using)
+        result.flags += len(pending)
+        result.active.update(flag.rule for flag in pending if flag.is_active)
+        pending.clear()
+
+    def emit(flag):
+        if flag is not None:
+            pending.append(flag)
+            if len(pending) >= FLUSH_SIZE:
+                flush()
+
+    last = 0
+    while True:
+        student_ids = list(
+            Student.objects.using(using).filter(pk__gt=last).order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not student_ids:
+            break
+        last = student_ids[-1]
+        records = (
+            AttendanceRecord.objects.using(using)
+            .filter(student_id__in=student_ids, session__session_date__gte=since)
+            .order_by('student_id', 'session__session_date')
+            .values_list('student_id', 'session__session_date', 'status')
+        )
+        for student_id, days in groupby(records, key=itemgetter(0)):
+            result.students += 1
+            windows = [RollingWindow(rule, student_id, now) for rule in rules]
+            for day, rows in groupby(days, key=itemgetter(1)):
+                counts = Counter(row[2] for row in rows)
+                result.records += sum(counts.values())
+                for window in windows:
+                    emit(window.push(day, counts))
+            for window in windows:
+                emit(window.finish())
+    if pending:
+        flush()
+    result.removed, _ = AbsenteeismFlag.objects.using(using).filter(
+        started_on__gte=since, refreshed_at__lt=now,
+    ).delete()
+    result.seconds = time.perf_counter() - started
+    return result
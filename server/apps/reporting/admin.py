@@ -1,34 +1,71 @@
-# apps/academic/admin.py
+# apps/reporting/admin.py
 from django.contrib import admin
-from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject
-
-@admin.register(AcademicYear)
-class AcademicYearAdmin(admin.ModelAdmin):
-    list_display = ['name', 'start_date', 'end_date', 'is_current']
-    list_filter = ['is_current']
-
-@admin.register(Term)
-class TermAdmin(admin.ModelAdmin):
-    list_display = ['name', 'academic_year', 'sequence', 'start_date', 'end_date']
-    list_filter = ['academic_year']
-
-@admin.register(Curriculum)
-class CurriculumAdmin(admin.ModelAdmin):
-    list_display = ['name', 'curriculum_type', 'is_active']
-    list_filter = ['curriculum_type', 'is_active']
-
-@admin.register(Subject)
-class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'curriculum']
-    list_filter = ['curriculum']
-    search_fields = ['code', 'name']
-
-@admin.register(Cohort)
-class CohortAdmin(admin.ModelAdmin):
-    list_display = ['name', 'level', 'curriculum', 'academic_year']
-    list_filter = ['curriculum', 'academic_year']
-
-@admin.register(CohortSubject)
-class CohortSubjectAdmin(admin.ModelAdmin):
-    list_display = ['cohort', 'subject', 'is_compulsory']
-    list_filter = ['cohort', 'is_compulsory']
\ No newline at end of file
+from apps.academic.admin import RelatedListFilter
+from .models import (AttendanceSummary, GradeSummary, TermRanking, SubjectDistribution, StaleSummary,
+                     AttendanceRegister, PackedAttendance, AbsenteeismFlag,
+                     DailyAttendanceRollup)
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'term', 'subject', 'total_sessions', 'present_count',
+                    'attendance_percentage', 'is_stale']
+    list_filter = [('term', RelatedListFilter), 'is_stale']
+    list_select_related = ['student', 'term__academic_year', 'subject']
+    raw_id_fields = ['student']
+
+@admin.register(GradeSummary)
+class GradeSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'term', 'subject', 'weighted_average', 'final_grade',
+                    'subject_position', 'is_stale']
+    list_filter = [('term', RelatedListFilter), 'is_stale']
+    list_select_related = ['student', 'term__academic_year', 'subject']
+    raw_id_fields = ['student']
+
+@admin.register(TermRanking)
+class TermRankingAdmin(admin.ModelAdmin):
+    list_display = ['student', 'term', 'cohort', 'mean_score', 'overall_position', 'out_of']
+    list_filter = [('term', RelatedListFilter), 'cohort']
+    list_select_related = ['student', 'term__academic_year', 'cohort']
+    raw_id_fields = ['student']
+
+@admin.register(SubjectDistribution)
+class SubjectDistributionAdmin(admin.ModelAdmin):
+    list_display = ['cohort', 'subject', 'term', 'student_count', 'mean', 'median', 'pass_rate']
+    list_filter = [('term', RelatedListFilter), 'cohort']
+    list_select_related = ['cohort', 'subject', 'term__academic_year']
+
+@admin.register(StaleSummary)
+class StaleSummaryAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'student_id', 'term_id', 'subject_id', 'priority', 'dirty_at']
+    list_filter = ['kind', 'priority']
+
+@admin.register(AttendanceRegister)
+class AttendanceRegisterAdmin(admin.ModelAdmin):
+    list_display = ['cohort', 'term', 'session_count', 'last_updated']
+    list_filter = [('term', RelatedListFilter), 'cohort']
+    list_select_related = ['cohort', 'term__academic_year']
+    exclude = ['session_ids', 'session_dates']
+
+@admin.register(PackedAttendance)
+class PackedAttendanceAdmin(admin.ModelAdmin):
+    list_display = ['student', 'register']
+    list_select_related = ['student', 'register__cohort', 'register__term']
+    raw_id_fields = ['student', 'register']
+    exclude = ['statuses']
+
+@admin.register(AbsenteeismFlag)
+class AbsenteeismFlagAdmin(admin.ModelAdmin):
+    list_display = ['student', 'rule', 'started_on', 'last_seen_on', 'ended_on', 'peak_rate',
+                    'is_active']
+    list_filter = ['is_active', 'rule']
+    list_select_related = ['student']
+    raw_id_fields = ['student']
+    date_hierarchy = 'started_on'
+
+@admin.register(DailyAttendanceRollup)
+class DailyAttendanceRollupAdmin(admin.ModelAdmin):
+    list_display = ['session_date', 'cohort_id', 'subject', 'total_sessions', 'present_count',
+                    'absent_count', 'late_count']
+    list_filter = ['subject']
+    list_select_related = ['subject']
+    date_hierarchy = 'session_date'
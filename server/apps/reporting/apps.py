@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ReportingConfig(AppConfig):
     name = 'apps.reporting'
+
+    def ready(self):
+        from . import signals  # noqa: F401
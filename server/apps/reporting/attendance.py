@@ -0,0 +1,235 @@
+# ============================================================================
+# apps/reporting/attendance.py
+# Delta maintenance of AttendanceSummary counters
+# ============================================================================
+#
+# Each attendance change becomes +1/-1 deltas on the status counters of two
+# summary rows: the session's subject and the "all subjects" row (subject
+# NULL). Deltas are applied with UPDATE ... SET col = col + n inside the
+# transaction that wrote the records, so marking a register never rescans
+# a student's attendance history.
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Case, Count, ExpressionWrapper, F, FloatField, Q, When
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert, chunked
+from apps.sessions.models import AttendanceRecord, AttendanceStatus, Session
+
+from .models import AttendanceSummary
+
+
+STATUS_COUNTERS = {
+    AttendanceStatus.PRESENT: 'present_count',
+    AttendanceStatus.ABSENT: 'absent_count',
+    AttendanceStatus.LATE: 'late_count',
+    AttendanceStatus.EXCUSED: 'excused_count',
+    AttendanceStatus.SICK: 'sick_count',
+}
+
+ATTENDED_COUNTERS = ('present_count', 'late_count')
+
+COUNTER_FIELDS = ['total_sessions', *STATUS_COUNTERS.values()]
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Ignore attendance writes, e.g. while bulk loading before a full rebuild"""
+    _state.suspended = getattr(_state, 'suspended', 0) + 1
+    try:
+        yield
+    finally:
+        _state.suspended -= 1
+
+
+def is_suspended():
+    return bool(getattr(_state, 'suspended', 0))
+
+
+def attendance_percentage(total, attended):
+    return attended * 100.0 / total if total else None
+
+
+def apply_attendance_changes(changes, using=DEFAULT_DB_ALIAS):
+    """
+    Apply (before, after) attendance changes to AttendanceSummary.
+
+    Each side is a (session_id, student_id, status) tuple or None. Rows that
+    do not exist yet are seeded from the records themselves.
+    """
+    if is_suspended():
+        return
+    session_ids = {side[0] for change in changes for side in change if side}
+    term_subject = {}
+    for ids in chunked(session_ids, 1000):
+        term_subject.update(
+            (pk, (term_id, subject_id))
+            for pk, term_id, subject_id in Session.objects.using(using)
+            .filter(pk__in=ids).values_list('pk', 'term_id', 'subject_id')
+        )
+
+    deltas = defaultdict(Counter)
+    for change in changes:
+        for side, sign in zip(change, (-1, 1)):
+            if side is None or side[0] not in term_subject:
+                continue
+            session_id, student_id, status = side
+            term_id, subject_id = term_subject[session_id]
+            for key in ((student_id, term_id, subject_id), (student_id, term_id, None)):
+                deltas[key]['total_sessions'] += sign
+                deltas[key][STATUS_COUNTERS[status]] += sign
+
+    # Registers are marked a session at a time, so most keys share a delta
+    # and can be applied with one UPDATE per (term, subject, delta).
+    batches = defaultdict(set)
+    for (student_id, term_id, subject_id), delta in deltas.items():
+        delta = frozenset((field, n) for field, n in delta.items() if n)
+        if delta:
+            batches[(term_id, subject_id, delta)].add(student_id)
+
+    now = timezone.now()
+    with transaction.atomic(using=using, savepoint=False):
+        for (term_id, subject_id, delta), student_ids in batches.items():
+            _apply_delta(term_id, subject_id, dict(delta), student_ids, now, using)
+
+
+def _apply_delta(term_id, subject_id, delta, student_ids, now, using):
+    total = F('total_sessions') + delta.get('total_sessions', 0)
+    attended = F('present_count') + F('late_count') + sum(
+        delta.get(field, 0) for field in ATTENDED_COUNTERS
+    )
+    # The percentage is assigned before the counters it reads: MySQL
+    # evaluates SET left to right, so it would otherwise see them updated.
+    values = {'attendance_percentage': Case(
+        When(
+            total_sessions__gt=-delta.get('total_sessions', 0),
+            then=ExpressionWrapper(attended * 100.0 / total, output_field=FloatField()),
+        ),
+        default=None,
+        output_field=FloatField(),
+    )}
+    values.update((field, F(field) + n) for field, n in delta.items())
+    values['last_updated'] = now
+
+    for chunk in chunked(sorted(student_ids), 500):
+        rows = _summaries(term_id, subject_id, using).filter(student_id__in=chunk)
+        if rows.update(**values) == len(chunk):
+            continue
+        # A locking read sees rows committed since the transaction's snapshot,
+        # which a plain re-read would not under REPEATABLE READ. Missing rows
+        # are seeded without this delta through the unique key, so a row a
+        # concurrent first mark inserted meanwhile is kept, and then the
+        # delta is applied to whichever row exists.
+        existing = set(rows.select_for_update().values_list('student_id', flat=True))
+        missing = set(chunk) - existing
+        if missing:
+            seed_attendance_summaries(term_id, subject_id, missing, now, using, delta=delta)
+            rows.filter(student_id__in=missing).update(**values)
+
+
+def _summaries(term_id, subject_id, using):
+    summaries = AttendanceSummary.objects.using(using).filter(term_id=term_id)
+    if subject_id is None:
+        return summaries.filter(subject__isnull=True)
+    return summaries.filter(subject_id=subject_id)
+
+
+def summarize_attendance(queryset, by_subject=True):
+    """GROUP BY (student, term[, subject]) counts over an AttendanceRecord queryset"""
+    keys = ['student_id', 'session__term_id']
+    if by_subject:
+        keys.append('session__subject_id')
+    counts = {
+        field: Count('id', filter=Q(status=status))
+        for status, field in STATUS_COUNTERS.items()
+    }
+    return queryset.values(*keys).annotate(total_sessions=Count('id'), **counts).order_by()
+
+
+def summary_from_row(row, now):
+    """Build an unsaved AttendanceSummary from a ``summarize_attendance()`` row"""
+    counts = {field: row[field] for field in COUNTER_FIELDS}
+    return AttendanceSummary(
+        student_id=row['student_id'],
+        term_id=row['session__term_id'],
+        subject_id=row.get('session__subject_id'),
+        attendance_percentage=attendance_percentage(
+            counts['total_sessions'], sum(counts[field] for field in ATTENDED_COUNTERS)
+        ),
+        last_updated=now,
+        **counts,
+    )
+
+
+def seed_attendance_summaries(term_id, subject_id, student_ids, now, using=DEFAULT_DB_ALIAS,
+                              delta=None):
+    """
+    Create missing summary rows by counting the students' records, less
+    ``delta`` (changes the caller applies afterwards). Rows created
+    concurrently in the meantime are kept as they are.
+    """
+    records = AttendanceRecord.objects.using(using).filter(
+        session__term_id=term_id, student_id__in=student_ids
+    )
+    if subject_id is not None:
+        records = records.filter(session__subject_id=subject_id)
+    counts = {
+        row['student_id']: row
+        for row in summarize_attendance(records, by_subject=subject_id is not None)
+    }
+    delta = delta or {}
+    summaries = []
+    for student_id in sorted(student_ids):
+        row = {field: counts.get(student_id, {}).get(field, 0) - delta.get(field, 0)
+               for field in COUNTER_FIELDS}
+        row.update(student_id=student_id, session__term_id=term_id,
+                   session__subject_id=subject_id)
+        summaries.append(summary_from_row(row, now))
+    bulk_upsert(
+        AttendanceSummary, summaries,
+        unique_fields=['student', 'term', 'subject_key'],
+        update_fields=['last_updated'],
+        using=using,
+    )
+
+
+def replace_attendance_summaries(term_id, student_ids=None, cohort_id=None,
+                                 chunk_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Recount every summary row of a term, optionally narrowed to some
+    students or a cohort, from the attendance records.
+
+    Summary rows carry nothing but counters, so the rows are replaced.
+    Returns (summary rows written, records counted).
+    """
+    now = timezone.now()
+    summaries = AttendanceSummary.objects.using(using).filter(term_id=term_id)
+    records = AttendanceRecord.objects.using(using).filter(session__term_id=term_id)
+    if student_ids is not None:
+        summaries = summaries.filter(student_id__in=student_ids)
+        records = records.filter(student_id__in=student_ids)
+    if cohort_id is not None:
+        summaries = summaries.filter(student__cohort_id=cohort_id)
+        records = records.filter(student__cohort_id=cohort_id)
+
+    written = source = 0
+    with transaction.atomic(using=using):
+        summaries.delete()
+        for by_subject in (True, False):
+            rows = summarize_attendance(records, by_subject=by_subject)
+            for chunk in chunked(rows.iterator(chunk_size=chunk_size), chunk_size):
+                created = [summary_from_row(row, now) for row in chunk]
+                AttendanceSummary.objects.using(using).bulk_create(
+                    created, batch_size=chunk_size
+                )
+                written += len(created)
+                if not by_subject:
+                    source += sum(summary.total_sessions for summary in created)
+    return written, source
@@ -0,0 +1,314 @@
+# ============================================================================
+# apps/reporting/attendance_store.py
+# Packed per-student attendance for analytics
+# ============================================================================
+#
+# Next to the row-per-mark AttendanceRecord table, every (cohort, term) has
+# an AttendanceRegister listing its session columns and one PackedAttendance
+# row per student holding a status code per column in four bits. A term of
+# 400 sessions is 200 bytes per student, and a whole class loads as one
+# (students x sessions) uint8 matrix that rates, streaks and weekday
+# patterns are computed on with numpy.
+#
+# Registers are rebuilt with the reporting shards and patched in place from
+# attendance changes: only the students whose marks changed are rewritten.
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, time
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from apps.academic.db import bulk_upsert, chunked
+from apps.learners.models import Student
+from apps.sessions.models import AttendanceRecord, AttendanceStatus, Session
+
+from . import attendance
+from .models import AttendanceRegister, PackedAttendance
+
+
+UNMARKED = 0
+STATUS_CODES = {
+    AttendanceStatus.PRESENT: 1,
+    AttendanceStatus.ABSENT: 2,
+    AttendanceStatus.LATE: 3,
+    AttendanceStatus.EXCUSED: 4,
+    AttendanceStatus.SICK: 5,
+}
+ATTENDED_CODES = (STATUS_CODES[AttendanceStatus.PRESENT], STATUS_CODES[AttendanceStatus.LATE])
+
+IDS_DTYPE = np.dtype('<i8')
+DATES_DTYPE = np.dtype('<i4')
+
+
+def pack(codes):
+    """Pack a 1-D array of status codes, two per byte, low nibble first"""
+    codes = np.asarray(codes, dtype=np.uint8)
+    if len(codes) % 2:
+        codes = np.append(codes, np.uint8(UNMARKED))
+    return (codes[0::2] | (codes[1::2] << 4)).astype(np.uint8).tobytes()
+
+
+def unpack(data, length):
+    """Status codes of ``length`` columns; columns past the packed data are unmarked"""
+    packed = np.frombuffer(bytes(data), dtype=np.uint8)
+    codes = np.zeros(max(length, len(packed) * 2), dtype=np.uint8)
+    codes[0:len(packed) * 2:2] = packed & 0x0F
+    codes[1:len(packed) * 2:2] = packed >> 4
+    return codes[:length]
+
+
+@dataclass
+class RegisterMatrix:
+    """
+    A class's attendance in a term, columns in register order: by date,
+    start time and id as of the last rebuild, sessions added since at the end.
+    """
+    cohort_id: int
+    term_id: int
+    session_ids: np.ndarray      # int64, one per column
+    dates: np.ndarray            # datetime64[D], one per column
+    student_ids: np.ndarray      # int64, one per row
+    codes: np.ndarray            # uint8 (students x sessions), 0 = not marked
+
+
+# -- rebuild ---------------------------------------------------------------
+
+def rebuild_registers(term_id, cohort_id=None, using=DEFAULT_DB_ALIAS):
+    """
+    Rebuild the registers of a term, optionally of one cohort, from the
+    attendance records. Returns (PackedAttendance rows written, records read).
+    """
+    records = AttendanceRecord.objects.using(using).filter(session__term_id=term_id)
+    sessions = Session.objects.using(using).filter(term_id=term_id, cohort__isnull=False)
+    if cohort_id is not None:
+        records = records.filter(student__cohort_id=cohort_id)
+        sessions = sessions.filter(cohort_id=cohort_id)
+
+    marks = defaultdict(list)
+    for row in records.values_list('student__cohort_id', 'session_id', 'student_id',
+                                   'status').order_by().iterator(chunk_size=10000):
+        if row[0] is not None:
+            marks[row[0]].append(row[1:])
+    columns = defaultdict(set)
+    for cohort, session_id in sessions.values_list('cohort_id', 'pk').order_by():
+        columns[cohort].add(session_id)
+    for cohort, rows in marks.items():
+        columns[cohort].update(row[0] for row in rows)
+
+    written = source = 0
+    with transaction.atomic(using=using):
+        stale = AttendanceRegister.objects.using(using).filter(term_id=term_id)
+        if cohort_id is not None:
+            stale = stale.filter(cohort_id=cohort_id)
+        stale.exclude(cohort_id__in=list(columns)).delete()
+        for cohort, session_ids in columns.items():
+            written += _write_register(cohort, term_id, session_ids, marks[cohort], using)
+            source += len(marks[cohort])
+    return written, source
+
+
+def _write_register(cohort_id, term_id, session_ids, marks, using):
+    ordered = sorted(
+        Session.objects.using(using).filter(pk__in=session_ids)
+        .values_list('session_date', 'start_time', 'pk').order_by(),
+        key=lambda row: (row[0], row[1] or time.min, row[2]),
+    )
+    ids = np.array([row[2] for row in ordered], dtype=IDS_DTYPE)
+    dates = np.array([row[0].toordinal() for row in ordered], dtype=DATES_DTYPE)
+    register, _ = AttendanceRegister.objects.using(using).update_or_create(
+        cohort_id=cohort_id, term_id=term_id,
+        defaults={'session_count': len(ids), 'session_ids': ids.tobytes(),
+                  'session_dates': dates.tobytes()},
+    )
+
+    student_ids = np.array(sorted(
+        {row[1] for row in marks} | set(
+            Student.objects.using(using).filter(cohort_id=cohort_id).values_list('pk', flat=True)
+        )
+    ), dtype=np.int64)
+    codes = np.zeros((len(student_ids), len(ids)), dtype=np.uint8)
+    if marks:
+        session_col, student_col, status = zip(*marks)
+        order = np.argsort(ids)
+        columns = order[np.searchsorted(ids, session_col, sorter=order)]
+        rows = np.searchsorted(student_ids, student_col)
+        codes[rows, columns] = [STATUS_CODES[value] for value in status]
+
+    packed = [
+        PackedAttendance(register=register, student_id=int(student_id), statuses=pack(row))
+        for student_id, row in zip(student_ids, codes)
+    ]
+    for chunk in chunked(packed, 1000):
+        bulk_upsert(PackedAttendance, chunk, unique_fields=['register', 'student'],
+                    update_fields=['statuses'], using=using)
+    register.students.exclude(student_id__in=student_ids.tolist()).delete()
+    return len(packed)
+
+
+# -- incremental -----------------------------------------------------------
+
+def apply_store_changes(changes, using=DEFAULT_DB_ALIAS):
+    """
+    Patch registers with (before, after) attendance changes, each side a
+    (session_id, student_id, status) tuple or None.
+
+    Sessions new to a register become new columns; registers that do not
+    exist yet are built from the records.
+    """
+    if attendance.is_suspended():
+        return
+    marks = {before[:2]: UNMARKED for before, _ in changes if before is not None}
+    marks.update((after[:2], STATUS_CODES[after[2]]) for _, after in changes if after is not None)
+    if not marks:
+        return
+
+    sessions = dict(
+        Session.objects.using(using).filter(pk__in={key[0] for key in marks})
+        .values_list('pk', 'term_id')
+    )
+    cohorts = dict(
+        Student.objects.using(using).filter(pk__in={key[1] for key in marks})
+        .values_list('pk', 'cohort_id')
+    )
+    by_register = defaultdict(dict)
+    for (session_id, student_id), code in marks.items():
+        cohort_id = cohorts.get(student_id)
+        if cohort_id is not None and session_id in sessions:
+            by_register[(cohort_id, sessions[session_id])][(session_id, student_id)] = code
+
+    with transaction.atomic(using=using, savepoint=False):
+        registers = {
+            (register.cohort_id, register.term_id): register
+            for register in AttendanceRegister.objects.using(using).filter(
+                cohort_id__in={key[0] for key in by_register},
+                term_id__in={key[1] for key in by_register},
+            )
+        }
+        for (cohort_id, term_id), register_marks in by_register.items():
+            register = registers.get((cohort_id, term_id))
+            if register is None:
+                rebuild_registers(term_id, cohort_id, using=using)
+            else:
+                _patch_register(register, register_marks, using)
+
+
+def _patch_register(register, marks, using):
+    # Columns are only ever appended, so a register read without a lock
+    # places every column it knows; it is locked and re-read only to
+    # append sessions it does not know yet.
+    session_ids = {session_id for session_id, _ in marks}
+    known = _columns(register)
+    if session_ids - known.keys():
+        register = AttendanceRegister.objects.using(using).select_for_update().get(
+            pk=register.pk
+        )
+        known = _columns(register)
+    new = sorted(session_ids - known.keys())
+    if new:
+        dates = dict(
+            Session.objects.using(using).filter(pk__in=new).values_list('pk', 'session_date')
+        )
+        known.update((session_id, len(known) + n) for n, session_id in enumerate(new))
+        register.session_ids = bytes(register.session_ids) + np.array(
+            new, dtype=IDS_DTYPE).tobytes()
+        register.session_dates = bytes(register.session_dates) + np.array(
+            [dates[session_id].toordinal() for session_id in new], dtype=DATES_DTYPE).tobytes()
+        register.session_count = len(known)
+        register.save(update_fields=['session_ids', 'session_dates', 'session_count',
+                                     'last_updated'])
+
+    students = defaultdict(list)
+    for (session_id, student_id), code in marks.items():
+        students[student_id].append((known[session_id], code))
+    # Only the rows rewritten are locked, in student order.
+    rows = {
+        row.student_id: row
+        for row in PackedAttendance.objects.using(using).filter(
+            register=register, student_id__in=list(students)
+        ).order_by('student_id').select_for_update()
+    }
+    changed = []
+    for student_id, cells in students.items():
+        row = rows.get(student_id) or PackedAttendance(register=register, student_id=student_id)
+        # A concurrent writer may have appended columns this register
+        # copy does not count yet; keep their cells.
+        codes = unpack(row.statuses, max(register.session_count, len(bytes(row.statuses)) * 2))
+        for column, code in cells:
+            codes[column] = code
+        row.statuses = pack(codes)
+        changed.append(row)
+    bulk_upsert(PackedAttendance, changed, unique_fields=['register', 'student'],
+                update_fields=['statuses'], using=using)
+
+
+def _columns(register):
+    ids = np.frombuffer(bytes(register.session_ids), dtype=IDS_DTYPE)
+    return {int(session_id): column for column, session_id in enumerate(ids)}
+
+
+# -- analytics -------------------------------------------------------------
+
+def load_register(cohort_id, term_id, using=DEFAULT_DB_ALIAS):
+    """The RegisterMatrix of a class's term, or None before it is built"""
+    register = AttendanceRegister.objects.using(using).filter(
+        cohort_id=cohort_id, term_id=term_id
+    ).first()
+    if register is None:
+        return None
+    rows = list(
+        register.students.using(using).order_by('student_id')
+        .values_list('student_id', 'statuses')
+    )
+    count = register.session_count
+    ids = np.frombuffer(bytes(register.session_ids), dtype=IDS_DTYPE)
+    ordinals = np.frombuffer(bytes(register.session_dates), dtype=DATES_DTYPE)
+    codes = np.zeros((len(rows), count), dtype=np.uint8)
+    for n, (_, statuses) in enumerate(rows):
+        codes[n] = unpack(statuses, count)
+
+    epoch = date(1970, 1, 1).toordinal()
+    return RegisterMatrix(
+        cohort_id=cohort_id,
+        term_id=term_id,
+        session_ids=ids.copy(),
+        dates=(ordinals.astype(np.int64) - epoch).astype('datetime64[D]'),
+        student_ids=np.array([row[0] for row in rows], dtype=np.int64),
+        codes=codes,
+    )
+
+
+def attendance_rates(matrix):
+    """Per student: sessions marked, sessions attended and attended percentage"""
+    marked = (matrix.codes != UNMARKED).sum(axis=1)
+    attended = np.isin(matrix.codes, ATTENDED_CODES).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(marked > 0, attended * 100.0 / marked, np.nan)
+    return marked, attended, percentage
+
+
+def absence_streaks(matrix, status=AttendanceStatus.ABSENT):
+    """
+    Per student: the longest and the current run of consecutive marked
+    sessions with ``status``. Unmarked sessions neither extend nor break a run.
+    """
+    code = STATUS_CODES[status]
+    longest = np.zeros(len(matrix.student_ids), dtype=np.int64)
+    run = np.zeros_like(longest)
+    for column in matrix.codes.T:
+        marked = column != UNMARKED
+        run = np.where(marked, np.where(column == code, run + 1, 0), run)
+        np.maximum(longest, run, out=longest)
+    return longest, run
+
+
+def weekday_rates(matrix, status=AttendanceStatus.ABSENT):
+    """Share of marked sessions with ``status`` per weekday, Monday first; NaN without sessions"""
+    weekdays = (matrix.dates.astype(np.int64) + 3) % 7     # 1970-01-01 was a Thursday
+    marked = matrix.codes != UNMARKED
+    hits = matrix.codes == STATUS_CODES[status]
+    totals = np.bincount(weekdays, weights=marked.sum(axis=0), minlength=7)
+    counts = np.bincount(weekdays, weights=hits.sum(axis=0), minlength=7)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(totals > 0, counts / totals, np.nan)
@@ -0,0 +1,236 @@
+# ============================================================================
+# apps/reporting/benchmarks.py
+# Benchmark suite for the core read and write paths
+# ============================================================================
+#
+# Every dataset size gets a fresh test database (created and destroyed the
+# way the test runner does it) filled by the synthetic school generator, so
+# runs are repeatable on whatever backend the settings point at: SQLite
+# locally, MySQL through a settings module for the stand-in server.
+#
+# Each scenario is timed over several runs without instrumentation, then
+# run once more under CaptureQueriesContext and tracemalloc for its query
+# count and peak Python memory. Results are plain dicts for JSON.
+
+import platform
+import statistics
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, replace
+
+import django
+import numpy as np
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.academic.db import bulk_upsert
+from apps.academic.models import Cohort, CohortSubject, CurriculumType
+from apps.academic.synthetic import SchoolGenerator, SchoolSpec
+from apps.assessments.bulk import save_scores, validate_score_entries
+from apps.assessments.exports import marksheet_assessments, marksheet_csv
+from apps.assessments.gradebook import build_gradebook
+from apps.assessments.models import Assessment, EvaluationType
+from apps.learners.models import Student
+from apps.sessions.models import AttendanceRecord, AttendanceStatus, Session
+
+from . import rebuild
+from .models import AttendanceSummary, GradeSummary, TermRanking
+
+
+SIZES = {
+    'small': SchoolSpec(cohorts=2, students=40, subjects=6, weeks=4, evidence=2),
+    'medium': SchoolSpec(cohorts=4, students=150, subjects=8, weeks=12),
+    'large': SchoolSpec(cohorts=8, students=300, subjects=10, weeks=12),
+}
+
+REGISTERS_PER_RUN = 10
+PROFILES_PER_RUN = 50
+
+# Slower by more than this factor, or more queries, counts as a regression
+DEFAULT_TOLERANCE = 1.25
+
+
+@dataclass
+class Result:
+    scenario: str
+    size: str
+    vendor: str
+    seconds: float
+    min_seconds: float
+    queries: int
+    peak_kib: int
+    rows: int
+
+    @property
+    def key(self):
+        return (self.vendor, self.size, self.scenario)
+
+
+class Workload:
+    """The rows the scenarios read and write, picked once per dataset"""
+
+    def __init__(self, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.cohort = Cohort.objects.filter(
+            curriculum__curriculum_type=CurriculumType.EIGHT_FOUR_FOUR
+        ).order_by('pk').first() or Cohort.objects.order_by('pk').first()
+        self.subject_id = CohortSubject.objects.filter(
+            cohort=self.cohort
+        ).order_by('pk').values_list('subject_id', flat=True).first()
+        self.term_id = Assessment.objects.filter(
+            subject_id=self.subject_id
+        ).order_by('term_id').values_list('term_id', flat=True).first()
+        self.assessment = Assessment.objects.filter(
+            term_id=self.term_id, subject_id=self.subject_id,
+            evaluation_type=EvaluationType.NUMERIC,
+        ).order_by('pk').first()
+        self.students = list(
+            Student.objects.filter(cohort=self.cohort).order_by('pk').values_list('pk', flat=True)
+        )
+        self.sessions = list(
+            Session.objects.filter(term_id=self.term_id, subject_id=self.subject_id,
+                                   attendance_records__student__cohort=self.cohort)
+            .order_by('pk').values_list('pk', flat=True).distinct()[:REGISTERS_PER_RUN]
+        )
+
+    # Scenarios return the number of rows they read or wrote.
+
+    def bulk_score_entry(self):
+        total = self.assessment.total_marks or 100
+        marks = np.round(self.rng.uniform(0, total, size=len(self.students)), 1)
+        entries = [{'student': pk, 'score': mark}
+                   for pk, mark in zip(self.students, marks.tolist())]
+        scores, errors = validate_score_entries(self.assessment, entries)
+        return save_scores(scores, graded_by='benchmark')
+
+    def attendance_marking(self):
+        statuses = np.array(AttendanceStatus.values, dtype=object)
+        written = 0
+        for session_id in self.sessions:
+            picks = self.rng.choice(len(statuses), size=len(self.students),
+                                    p=[0.9, 0.05, 0.03, 0.01, 0.01])
+            records = [
+                AttendanceRecord(session_id=session_id, student_id=pk, status=status,
+                                 marked_by='benchmark')
+                for pk, status in zip(self.students, statuses[picks])
+            ]
+            bulk_upsert(AttendanceRecord, records, unique_fields=['session', 'student'],
+                        update_fields=['status', 'marked_by'])
+            written += len(records)
+        return written
+
+    def summary_rebuild(self):
+        result = rebuild.rebuild_shard(self.term_id, self.cohort.pk)
+        return result.source_rows
+
+    def gradebook_read(self):
+        gradebook = build_gradebook(self.cohort.pk, self.subject_id, self.term_id)
+        return len(gradebook['students']['ids']) * len(gradebook['assessments']['ids'])
+
+    def student_profile_read(self):
+        picks = self.rng.choice(self.students, size=min(PROFILES_PER_RUN, len(self.students)),
+                                replace=False)
+        rows = 0
+        for student_id in picks.tolist():
+            student = Student.objects.select_related('cohort').get(pk=student_id)
+            rows += 1 + len(list(
+                GradeSummary.objects.filter(student=student).select_related('term', 'subject')
+            ))
+            rows += len(list(AttendanceSummary.objects.filter(student=student, subject=None)))
+            rows += len(list(TermRanking.objects.filter(student=student)))
+        return rows
+
+    def marksheet_export(self):
+        assessments = marksheet_assessments(self.term_id, self.subject_id)
+        return sum(1 for _ in marksheet_csv(self.cohort.pk, assessments)) - 1
+
+
+SCENARIOS = [
+    'bulk_score_entry', 'attendance_marking', 'summary_rebuild',
+    'gradebook_read', 'student_profile_read', 'marksheet_export',
+]
+
+
+def measure(name, size, call, repeat):
+    """Time ``call`` ``repeat`` times, then count its queries and peak memory"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            rows = call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return Result(
+        scenario=name, size=size, vendor=connection.vendor,
+        seconds=statistics.median(timings), min_seconds=min(timings),
+        queries=len(queries), peak_kib=peak // 1024, rows=rows,
+    )
+
+
+def run_size(size, scenarios=SCENARIOS, repeat=3, seed=0, log=None):
+    """Generate one dataset size in a fresh test database and benchmark it"""
+    log = log or (lambda message: None)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True,
+                                                  serialize=False)
+    try:
+        started = time.perf_counter()
+        SchoolGenerator(replace(SIZES[size], seed=seed)).generate()
+        for term_id, cohort_id in rebuild.plan_shards(shard_by='term'):
+            rebuild.rebuild_shard(term_id, cohort_id)
+        log(f"{size}: dataset ready in {time.perf_counter() - started:.1f}s")
+
+        workload = Workload(seed)
+        results = []
+        for name in scenarios:
+            result = measure(name, size, getattr(workload, name), repeat)
+            log(f"{size}: {name:<22} {result.seconds:>8.3f}s {result.queries:>6} queries "
+                f"{result.peak_kib:>8} KiB")
+            results.append(result)
+        return results
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def report(results):
+    """JSON-ready document of a run"""
+    return {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'vendor': connection.vendor,
+        'results': [asdict(result) for result in results],
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results with a baseline document.
+
+    Returns ``(rows, regressions)``: one row per result found in the
+    baseline with its time ratio and query delta, and the subset that
+    got slower than ``tolerance`` or issued more queries.
+    """
+    previous = {
+        (row['vendor'], row['size'], row['scenario']): row
+        for row in baseline.get('results', [])
+    }
+    rows, regressions = [], []
+    for result in results:
+        before = previous.get(result.key)
+        if before is None:
+            continue
+        row = {
+            'result': result,
+            'ratio': result.seconds / before['seconds'] if before['seconds'] else 1.0,
+            'query_delta': result.queries - before['queries'],
+        }
+        rows.append(row)
+        if row['ratio'] > tolerance or row['query_delta'] > 0:
+            regressions.append(row)
+    return rows, regressions
@@ -0,0 +1,132 @@
+# ============================================================================
+# apps/reporting/distributions.py
+# Cohort/subject/term score distributions built from GradeSummary
+# ============================================================================
+
+import math
+import statistics
+from collections import defaultdict
+from itertools import groupby
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert
+from apps.academic.models import CohortSubject
+from apps.assessments.statistics import default_pass_mark
+from apps.learners.models import Student
+
+from .models import GradeSummary, SubjectDistribution
+
+
+HISTOGRAM_BINS = 10
+
+DISTRIBUTION_FIELDS = [
+    'student_count', 'mean', 'median', 'std_dev', 'percentiles', 'pass_rate', 'histogram',
+    'last_updated',
+]
+
+
+def distribution_percentiles():
+    return getattr(settings, 'REPORTING_DISTRIBUTION_PERCENTILES', (10, 25, 75, 90))
+
+
+def distribution_pass_mark():
+    """Weighted average counted as a pass; the statistics endpoint's default"""
+    return getattr(settings, 'REPORTING_DISTRIBUTION_PASS_MARK', default_pass_mark())
+
+
+def percentile(ordered, p):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * p / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def histogram(ordered, bins=HISTOGRAM_BINS):
+    """Counts per equal-width bin over 0-100; 100 falls in the last bin"""
+    counts = [0] * bins
+    for value in ordered:
+        index = min(max(int(value * bins // 100), 0), bins - 1)
+        counts[index] += 1
+    return counts
+
+
+def pass_rate(ordered, pass_mark):
+    """Percentage of values at or above pass_mark"""
+    if not ordered:
+        return None
+    return sum(value >= pass_mark for value in ordered) / len(ordered) * 100
+
+
+def build_distribution(cohort_id, subject_id, term_id, ordered, now):
+    """Build an unsaved SubjectDistribution from sorted weighted averages"""
+    return SubjectDistribution(
+        cohort_id=cohort_id,
+        subject_id=subject_id,
+        term_id=term_id,
+        student_count=len(ordered),
+        mean=statistics.fmean(ordered) if ordered else None,
+        median=statistics.median(ordered) if ordered else None,
+        std_dev=statistics.pstdev(ordered) if ordered else None,
+        percentiles={str(p): percentile(ordered, p) for p in distribution_percentiles()},
+        pass_rate=pass_rate(ordered, distribution_pass_mark()),
+        histogram=histogram(ordered),
+        last_updated=now,
+    )
+
+
+def refresh_distributions(term_id, cohort_id, subject_ids=None, using=DEFAULT_DB_ALIAS):
+    """
+    Rebuild SubjectDistribution rows of one cohort and term.
+
+    Only subjects the cohort takes (CohortSubject) are materialised. One
+    query reads the cohort's weighted averages for all requested subjects.
+    """
+    subjects = CohortSubject.objects.using(using).filter(cohort_id=cohort_id)
+    if subject_ids is not None:
+        subjects = subjects.filter(subject_id__in=subject_ids)
+    subject_ids = set(subjects.values_list('subject_id', flat=True))
+    if not subject_ids:
+        return 0
+
+    rows = (
+        GradeSummary.objects.using(using)
+        .filter(term_id=term_id, subject_id__in=subject_ids,
+                student__cohort_id=cohort_id, weighted_average__isnull=False)
+        .order_by('subject_id', 'weighted_average')
+        .values_list('subject_id', 'weighted_average')
+    )
+    scores = {
+        subject_id: [value for _, value in group]
+        for subject_id, group in groupby(rows.iterator(), key=lambda row: row[0])
+    }
+    now = timezone.now()
+    distributions = [
+        build_distribution(cohort_id, subject_id, term_id, scores.get(subject_id, []), now)
+        for subject_id in sorted(subject_ids)
+    ]
+    bulk_upsert(
+        SubjectDistribution, distributions,
+        unique_fields=['cohort', 'subject', 'term'],
+        update_fields=DISTRIBUTION_FIELDS,
+        using=using,
+    )
+    return len(distributions)
+
+
+def refresh_for_triples(triples, using=DEFAULT_DB_ALIAS):
+    """Refresh the distributions touched by changed GradeSummary triples"""
+    students = {student_id for student_id, _, _ in triples}
+    cohort_of = dict(
+        Student.objects.using(using).filter(pk__in=students).values_list('pk', 'cohort_id')
+    )
+    targets = defaultdict(set)
+    for student_id, term_id, subject_id in triples:
+        if student_id in cohort_of:
+            targets[(term_id, cohort_of[student_id])].add(subject_id)
+    for (term_id, cohort_id), subject_ids in targets.items():
+        refresh_distributions(term_id, cohort_id, subject_ids, using=using)
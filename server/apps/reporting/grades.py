@@ -0,0 +1,296 @@
+# ============================================================================
+# apps/reporting/grades.py
+# Incremental GradeSummary maintenance
+# ============================================================================
+#
+# Score writes only mark (student, assessment) pairs dirty. When the
+# surrounding transaction commits, the pairs are resolved to
+# (student, term, subject) triples and only those GradeSummary rows are
+# recomputed through the normalization pipeline, so the cost follows the
+# size of the change rather than the size of the score table. The affected
+# cohort distributions follow; the cohorts' positions are queued for the
+# scheduler. Bursts larger than REPORTING_SYNC_RECOMPUTE_LIMIT triples are
+# handed to the scheduler whole.
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Sum
+from django.utils import timezone
+
+from apps.academic import grading
+from apps.academic.db import bulk_upsert, chunked
+from apps.academic.models import Subject
+from apps.assessments.models import Assessment, AssessmentScore
+from apps.assessments.normalization import normalize_subject_term
+
+from . import distributions, ranking, scheduler
+from .models import GradeSummary, SummaryKind
+
+
+STUDENT_CHUNK_SIZE = 500
+
+SUMMARY_FIELDS = [
+    'total_assessments', 'average_score', 'weighted_average', 'final_grade',
+    'grade_points', 'is_stale', 'stale_since', 'last_updated',
+]
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Ignore score writes, e.g. while bulk loading before a full rebuild"""
+    _state.suspended = getattr(_state, 'suspended', 0) + 1
+    try:
+        yield
+    finally:
+        _state.suspended -= 1
+
+
+def mark_pairs_dirty(pairs, using=DEFAULT_DB_ALIAS):
+    """Queue (student_id, assessment_id) pairs for recompute on commit"""
+    _mark(using, pairs=pairs)
+
+
+def mark_triples_dirty(triples, using=DEFAULT_DB_ALIAS):
+    """Queue (student_id, term_id, subject_id) triples for recompute on commit"""
+    _mark(using, triples=[t for t in triples if t[1] is not None])
+
+
+def _mark(using, pairs=(), triples=()):
+    if getattr(_state, 'suspended', 0):
+        return
+    if not connections[using].in_atomic_block:
+        _recompute(using, set(pairs), set(triples))
+        return
+    buffer = _buffer_for(using)
+    buffer['pairs'].update(pairs)
+    buffer['triples'].update(triples)
+
+
+def _buffer_for(using):
+    if not hasattr(_state, 'buffers'):
+        _state.buffers = {}
+    buffer = _state.buffers.get(using)
+    # A rollback drops our on_commit hook together with the writes it covers,
+    # so start a fresh buffer whenever the hook is no longer registered.
+    hooks = connections[using].run_on_commit
+    if buffer is None or not any(hook[1] is buffer['flush'] for hook in hooks):
+        buffer = {'pairs': set(), 'triples': set()}
+        buffer['flush'] = lambda: _flush(using, buffer)
+        _state.buffers[using] = buffer
+        transaction.on_commit(buffer['flush'], using=using)
+    return buffer
+
+
+def _flush(using, buffer):
+    if _state.buffers.get(using) is buffer:
+        del _state.buffers[using]
+    _recompute(using, buffer['pairs'], buffer['triples'])
+
+
+def _recompute(using, pairs, triples):
+    triples = triples | resolve_pairs(pairs, using=using)
+    if not triples:
+        return
+    if len(triples) > scheduler.sync_recompute_limit():
+        # Large bursts are absorbed by the background scheduler.
+        scheduler.mark_stale(SummaryKind.GRADE, triples, using=using)
+        return
+    refresh_grade_summaries(triples, using=using)
+    distributions.refresh_for_triples(triples, using=using)
+    # Positions cost the whole cohort; they are re-ranked in the background.
+    scheduler.mark_stale(SummaryKind.RANKING, ranking.touched_cohorts(triples, using=using),
+                         using=using)
+
+
+def resolve_pairs(pairs, using=DEFAULT_DB_ALIAS):
+    """Map (student_id, assessment_id) pairs to GradeSummary triples"""
+    assessment_ids = {assessment_id for _, assessment_id in pairs}
+    if not assessment_ids:
+        return set()
+    term_subject = {}
+    for ids in chunked(assessment_ids, STUDENT_CHUNK_SIZE):
+        term_subject.update(
+            (pk, (term_id, subject_id))
+            for pk, term_id, subject_id in Assessment.objects.using(using)
+            .filter(pk__in=ids, term__isnull=False)
+            .values_list('pk', 'term_id', 'subject_id')
+        )
+    return {
+        (student_id,) + term_subject[assessment_id]
+        for student_id, assessment_id in pairs
+        if assessment_id in term_subject
+    }
+
+
+def percentage_expression():
+    """A numeric score as a percentage of the assessment's total marks"""
+    return ExpressionWrapper(
+        F('score') * 100.0 / F('assessment__total_marks'),
+        output_field=FloatField()
+    )
+
+
+def graded_scores(using=DEFAULT_DB_ALIAS):
+    """Numeric scores that count towards a GradeSummary"""
+    return AssessmentScore.objects.using(using).filter(
+        score__isnull=False,
+        assessment__term__isnull=False,
+        assessment__total_marks__gt=0,
+    )
+
+
+def summarize(queryset):
+    """
+    GROUP BY (student, term, subject) over a numeric score queryset. Agrees
+    with ``normalize_subject_term()`` for subject-terms without rubric
+    assessments.
+    """
+    percentage = percentage_expression()
+    return (
+        queryset
+        .values('student_id', 'assessment__term_id', 'assessment__subject_id')
+        .annotate(
+            total_assessments=Count('id'),
+            percentage_sum=Sum(percentage),
+            weighted_sum=Sum(percentage * F('assessment__weight')),
+            weight_sum=Sum('assessment__weight'),
+        )
+        .order_by()
+    )
+
+
+def summary_from_row(row, table, now):
+    """Build an unsaved GradeSummary from a ``summarize()`` row, graded with ``table``"""
+    total = row['total_assessments']
+    weight_sum = row['weight_sum']
+    weighted = row['weighted_sum'] / weight_sum if weight_sum else None
+    letter, points = table.grade(weighted)
+    return GradeSummary(
+        student_id=row['student_id'],
+        term_id=row['assessment__term_id'],
+        subject_id=row['assessment__subject_id'],
+        total_assessments=total,
+        average_score=row['percentage_sum'] / total if total else None,
+        weighted_average=weighted,
+        final_grade=letter,
+        grade_points=points,
+        is_stale=False,
+        stale_since=None,
+        last_updated=now,
+    )
+
+
+def summaries_from_scores(normalized, now, using=DEFAULT_DB_ALIAS):
+    """
+    Build unsaved GradeSummary rows from ``normalize_subject_term()`` output,
+    graded on the weighted average with the subject's curriculum table
+    """
+    table = grading.table_for_subject(normalized.subject_id, using=using)
+    letters, points = table.grade_array(normalized.weighted_averages)
+    return [
+        GradeSummary(
+            student_id=student_id,
+            term_id=normalized.term_id,
+            subject_id=normalized.subject_id,
+            total_assessments=count,
+            average_score=average,
+            weighted_average=weighted,
+            final_grade=letter,
+            grade_points=None if np.isnan(point) else point,
+            is_stale=False,
+            stale_since=None,
+            last_updated=now,
+        )
+        for (student_id, count, average, weighted), letter, point
+        in zip(normalized.rows(), letters.tolist(), points.tolist())
+    ]
+
+
+def refresh_grade_summaries(triples, using=DEFAULT_DB_ALIAS):
+    """
+    Recompute the GradeSummary rows for the given
+    (student_id, term_id, subject_id) triples.
+
+    Triples that no longer have any graded score lose their summary row.
+    Returns the number of rows written.
+    """
+    groups = defaultdict(set)
+    for student_id, term_id, subject_id in triples:
+        groups[(term_id, subject_id)].add(student_id)
+
+    now = timezone.now()
+    written = 0
+    with transaction.atomic(using=using):
+        for (term_id, subject_id), student_ids in groups.items():
+            for chunk in chunked(sorted(student_ids), STUDENT_CHUNK_SIZE):
+                summaries = summaries_from_scores(
+                    normalize_subject_term(term_id, subject_id, student_ids=chunk,
+                                           using=using),
+                    now, using=using,
+                )
+                if summaries:
+                    bulk_upsert(
+                        GradeSummary, summaries,
+                        unique_fields=['student', 'term', 'subject'],
+                        update_fields=SUMMARY_FIELDS,
+                        using=using,
+                    )
+                    written += len(summaries)
+
+                missing = set(chunk) - {s.student_id for s in summaries}
+                if missing:
+                    GradeSummary.objects.using(using).filter(
+                        term_id=term_id,
+                        subject_id=subject_id,
+                        student_id__in=missing,
+                    ).delete()
+    return written
+
+
+def regrade_summaries(curriculum_id=None, chunk_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Re-derive final_grade and grade_points of existing GradeSummary rows
+    from their weighted averages, e.g. after grade boundaries changed.
+
+    Returns the number of rows written.
+    """
+    subjects = Subject.objects.using(using).order_by('pk')
+    if curriculum_id is not None:
+        subjects = subjects.filter(curriculum_id=curriculum_id)
+    written = 0
+    with transaction.atomic(using=using):
+        for subject_id in subjects.values_list('pk', flat=True):
+            rows = list(
+                GradeSummary.objects.using(using).filter(subject_id=subject_id)
+                .values_list('student_id', 'term_id', 'weighted_average')
+            )
+            if not rows:
+                continue
+            student_ids, term_ids, averages = zip(*rows)
+            table = grading.table_for_subject(subject_id, using=using)
+            letters, points = table.grade_array(
+                [np.nan if a is None else a for a in averages]
+            )
+            summaries = [
+                GradeSummary(student_id=student_id, term_id=term_id, subject_id=subject_id,
+                             final_grade=letter,
+                             grade_points=None if np.isnan(point) else point)
+                for student_id, term_id, letter, point
+                in zip(student_ids, term_ids, letters.tolist(), points.tolist())
+            ]
+            for chunk in chunked(summaries, chunk_size):
+                bulk_upsert(
+                    GradeSummary, chunk,
+                    unique_fields=['student', 'term', 'subject'],
+                    update_fields=['final_grade', 'grade_points'],
+                    batch_size=chunk_size,
+                    using=using,
+                )
+            written += len(summaries)
+    return written
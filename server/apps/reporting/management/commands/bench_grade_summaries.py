@@ -0,0 +1,123 @@
+# ============================================================================
+# apps/reporting/management/commands/bench_grade_summaries.py
+# Show that the inline recompute after score writes follows the change, not
+# the size of the table or of the classes
+# ============================================================================
+
+import random
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.academic.models import AcademicYear, Cohort, Curriculum, CurriculumType, Subject, Term
+from apps.assessments.models import Assessment, AssessmentScore, AssessmentType
+from apps.learners.models import Student
+from apps.reporting import grades, scheduler
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the inline recompute run after score writes (summaries, "
+        "distributions, queued positions) against several score table sizes "
+        "and class sizes. All data is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table-sizes', type=int, nargs='+',
+                            default=[10_000, 100_000, 500_000],
+                            help="Number of AssessmentScore rows in the table")
+        parser.add_argument('--change-sizes', type=int, nargs='+',
+                            default=[1, 40, 1_000],
+                            help="Number of scores changed per measurement")
+        parser.add_argument('--cohorts', type=int, nargs='+', default=[1, 10],
+                            help="Number of classes the students are spread across")
+        parser.add_argument('--assessments', type=int, default=50,
+                            help="Assessments the scores are spread across")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.stdout.write(f"{'table rows':>12} {'class size':>10} {'changed':>8} "
+                          f"{'triples':>8} {'path':>7} {'queries':>8} {'seconds':>10}")
+        for table_size in options['table_sizes']:
+            for cohort_count in options['cohorts']:
+                try:
+                    with transaction.atomic():
+                        scores, class_size = self._populate(
+                            table_size, cohort_count, options['assessments'], rng
+                        )
+                        for change_size in options['change_sizes']:
+                            self._measure(scores, class_size, change_size, rng)
+                        raise Rollback
+                except Rollback:
+                    pass
+
+    def _populate(self, table_size, cohort_count, assessment_count, rng):
+        student_count = max(1, table_size // assessment_count)
+        curriculum = Curriculum.objects.create(
+            name="Benchmark", curriculum_type=CurriculumType.EIGHT_FOUR_FOUR
+        )
+        year = AcademicYear.objects.create(
+            name=f"bench-{table_size}-{cohort_count}",
+            start_date=date(2000, 1, 1), end_date=date(2000, 12, 31)
+        )
+        term = Term.objects.create(
+            academic_year=year, name="Term 1", sequence=1,
+            start_date=date(2000, 1, 1), end_date=date(2000, 4, 30)
+        )
+        cohorts = Cohort.objects.bulk_create(
+            Cohort(name=f"Benchmark {i}", curriculum=curriculum, academic_year=year)
+            for i in range(cohort_count)
+        )
+        subjects = Subject.objects.bulk_create(
+            Subject(curriculum=curriculum, code=f"S{i}", name=f"Subject {i}")
+            for i in range(10)
+        )
+        students = Student.objects.bulk_create(
+            (Student(admission_number=f"BENCH-{table_size}-{i}", first_name="B",
+                     last_name=str(i), cohort=cohorts[i % cohort_count])
+             for i in range(student_count)),
+            batch_size=5_000,
+        )
+        assessments = Assessment.objects.bulk_create(
+            Assessment(term=term, subject=subjects[i % len(subjects)],
+                       name=f"CAT {i}", assessment_type=AssessmentType.CAT,
+                       total_marks=rng.choice([30, 50, 100]),
+                       weight=rng.choice([1.0, 2.0]))
+            for i in range(assessment_count)
+        )
+        with grades.suspended():
+            scores = AssessmentScore.objects.bulk_create(
+                (AssessmentScore(assessment=assessment, student=student,
+                                 score=rng.randint(0, int(assessment.total_marks)))
+                 for assessment in assessments for student in students),
+                batch_size=5_000,
+            )
+        return scores, -(-student_count // cohort_count)
+
+    def _measure(self, scores, class_size, change_size, rng):
+        changed = rng.sample(scores, min(change_size, len(scores)))
+        for score in changed:
+            score.score = rng.randint(0, 30)
+
+        with grades.suspended():
+            AssessmentScore.objects.bulk_update(changed, ['score'], batch_size=1_000)
+
+        # What a score write's on_commit hook runs; larger bursts are only queued.
+        pairs = {(s.student_id, s.assessment_id) for s in changed}
+        triples = grades.resolve_pairs(pairs)
+        path = 'queued' if len(triples) > scheduler.sync_recompute_limit() else 'inline'
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            grades._recompute(connection.alias, pairs, set())
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{len(scores):>12} {class_size:>10} {len(changed):>8} "
+                          f"{len(triples):>8} {path:>7} {len(queries):>8} {elapsed:>10.4f}")
@@ -0,0 +1,56 @@
+# ============================================================================
+# apps/reporting/management/commands/generate_report_cards.py
+# Render end-of-term report cards for a cohort into a zip archive
+# ============================================================================
+
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.reporting.report_cards import FORMATS, PDF, collect_report_cards, write_report_cards
+
+
+class Command(BaseCommand):
+    help = "Render one report card per active student of a cohort for a term."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cohort', type=int, required=True, help="Cohort id")
+        parser.add_argument('--term', type=int, required=True, help="Term id")
+        parser.add_argument('--format', choices=FORMATS, default='html', dest='fmt')
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Rendering processes; 1 renders in this process")
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Cards handed to a worker at a time")
+        parser.add_argument('--output', help="Archive path "
+                            "(default: report-cards-<cohort>-<term>.zip)")
+
+    def handle(self, *args, **options):
+        if options['fmt'] == PDF:
+            try:
+                import weasyprint  # noqa: F401
+            except ImportError:
+                raise CommandError("PDF output needs WeasyPrint installed; "
+                                   "use --format html or pip install weasyprint.")
+
+        output = Path(options['output'] or
+                      f"report-cards-{options['cohort']}-{options['term']}.zip")
+
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            contexts = collect_report_cards(options['cohort'], options['term'])
+        collected = time.perf_counter()
+
+        written = write_report_cards(
+            contexts, output, fmt=options['fmt'],
+            workers=options['workers'], batch_size=options['batch_size'],
+        )
+        finished = time.perf_counter()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} report cards to {output} "
+            f"(data: {len(queries)} queries in {collected - started:.1f}s, "
+            f"rendering: {finished - collected:.1f}s)"
+        ))
@@ -0,0 +1,55 @@
+# ============================================================================
+# apps/reporting/management/commands/process_summary_queue.py
+# Background worker for stale GradeSummary/AttendanceSummary rows
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reporting.scheduler import DEFAULT_BATCH_SIZE, process_batch, queue_status
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute queued stale summaries in batches, highest priority and "
+        "oldest first. Use --loop to keep running as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling instead of exiting when the queue is empty")
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help="Seconds to sleep when the queue is empty (--loop)")
+        parser.add_argument('--status', action='store_true',
+                            help="Print queue depth and lag, then exit")
+
+    def handle(self, *args, **options):
+        if options['status']:
+            self._print_status()
+            return
+
+        while True:
+            processed = 0
+            started = time.perf_counter()
+            while claimed := process_batch(options['batch_size']):
+                processed += claimed
+            if processed:
+                self.stdout.write(
+                    f"Recomputed {processed} queued summaries "
+                    f"in {time.perf_counter() - started:.1f}s"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self._print_status()
+
+    def _print_status(self):
+        status = queue_status()
+        self.stdout.write(
+            f"Pending: {status['pending']}, lag: {status['lag_seconds']:.0f}s"
+        )
+        for kind, row in status['by_kind'].items():
+            self.stdout.write(f"  {kind}: {row['pending']} pending, "
+                              f"lag {row['lag_seconds']:.0f}s")
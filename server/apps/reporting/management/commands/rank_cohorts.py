@@ -0,0 +1,37 @@
+# ============================================================================
+# apps/reporting/management/commands/rank_cohorts.py
+# Compute subject and overall class positions
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.learners.models import Student
+from apps.reporting.ranking import TIE_RULES, default_tie_rule, rank_cohort
+
+
+class Command(BaseCommand):
+    help = "Store subject positions and overall class positions for a term."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, required=True, help="Term id")
+        parser.add_argument('--cohort', type=int, action='append', dest='cohorts',
+                            help="Cohort id (repeatable); defaults to every "
+                                 "cohort with grade summaries in the term")
+        parser.add_argument('--ties', choices=TIE_RULES, default=None,
+                            help=f"Tie rule (default: {default_tie_rule()})")
+
+    def handle(self, *args, **options):
+        term_id = options['term']
+        cohorts = options['cohorts'] or list(
+            Student.objects.filter(grade_summaries__term_id=term_id)
+            .order_by().values_list('cohort_id', flat=True).distinct()
+        )
+        for cohort_id in cohorts:
+            started = time.perf_counter()
+            ranked = rank_cohort(cohort_id, term_id, tie_rule=options['ties'])
+            self.stdout.write(
+                f"cohort {cohort_id}: ranked {ranked} students "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
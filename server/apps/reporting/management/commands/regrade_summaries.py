@@ -0,0 +1,27 @@
+# ============================================================================
+# apps/reporting/management/commands/regrade_summaries.py
+# Re-apply grade boundaries to stored GradeSummary rows
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.reporting.grades import regrade_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh GradeSummary.final_grade and grade_points from the current "
+        "grade boundaries, without recomputing averages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--curriculum', type=int, help="Curriculum id (default: all)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = regrade_summaries(options['curriculum'])
+        self.stdout.write(
+            f"Regraded {written} summaries in {time.perf_counter() - started:.2f}s"
+        )
@@ -0,0 +1,71 @@
+# ============================================================================
+# apps/reporting/management/commands/run_benchmarks.py
+# Benchmark the core read and write paths and compare with a baseline
+# ============================================================================
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.reporting import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic schools of several sizes in a throwaway test "
+        "database and time score entry, attendance marking, summary rebuilds, "
+        "gradebook and profile reads and marksheet exports. Use --settings to "
+        "run against MySQL instead of SQLite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', choices=list(benchmarks.SIZES),
+                            default=['small', 'medium'])
+        parser.add_argument('--scenarios', nargs='+', choices=benchmarks.SCENARIOS,
+                            default=benchmarks.SCENARIOS)
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Timed runs per scenario; the median is reported")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="Write results as JSON to this file")
+        parser.add_argument('--baseline', help="JSON results of an earlier run to compare with")
+        parser.add_argument('--tolerance', type=float, default=benchmarks.DEFAULT_TOLERANCE,
+                            help="Time ratio above which a scenario counts as a regression")
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help="Exit with an error when a regression is found")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as handle:
+                baseline = json.load(handle)
+
+        results = []
+        for size in options['sizes']:
+            results += benchmarks.run_size(
+                size, options['scenarios'], repeat=options['repeat'],
+                seed=options['seed'], log=self.stdout.write,
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(benchmarks.report(results), handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is None:
+            return
+        rows, regressions = benchmarks.compare(results, baseline, options['tolerance'])
+        self.stdout.write(f"{'size':<8} {'scenario':<22} {'ratio':>7} {'queries':>8}")
+        for row in rows:
+            result = row['result']
+            line = (f"{result.size:<8} {result.scenario:<22} {row['ratio']:>7.2f} "
+                    f"{row['query_delta']:>+8}")
+            self.stdout.write(self.style.ERROR(line) if row in regressions else line)
+        if regressions:
+            message = f"{len(regressions)} scenario(s) regressed against {options['baseline']}"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='sick_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
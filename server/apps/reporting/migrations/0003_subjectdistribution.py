@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0001_initial'),
+        ('reporting', '0002_attendancesummary_sick_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectDistribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_count', models.IntegerField(default=0)),
+                ('mean', models.FloatField(blank=True, null=True)),
+                ('median', models.FloatField(blank=True, null=True)),
+                ('std_dev', models.FloatField(blank=True, null=True)),
+                ('percentiles', models.JSONField(default=dict, help_text='{"25": 48.5, ...}')),
+                ('histogram', models.JSONField(default=list, help_text='Counts per fixed-width bin over 0-100')),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_distributions', to='academic.cohort')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_distributions', to='academic.subject')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_distributions', to='academic.term')),
+            ],
+            options={
+                'verbose_name': 'Subject Distribution',
+                'verbose_name_plural': 'Subject Distributions',
+                'unique_together': {('cohort', 'subject', 'term')},
+            },
+        ),
+    ]
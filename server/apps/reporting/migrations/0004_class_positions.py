@@ -0,0 +1,48 @@
+# Generated by Django 6.0.1 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0001_initial'),
+        ('learners', '0001_initial'),
+        ('reporting', '0003_subjectdistribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradesummary',
+            name='subject_position',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gradesummary',
+            name='subject_position_out_of',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TermRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subjects_counted', models.IntegerField(default=0)),
+                ('total_score', models.FloatField(blank=True, null=True)),
+                ('mean_score', models.FloatField(blank=True, null=True)),
+                ('overall_position', models.FloatField(blank=True, null=True)),
+                ('out_of', models.IntegerField(default=0)),
+                ('tie_rule', models.CharField(blank=True, max_length=20)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_rankings', to='academic.cohort')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_rankings', to='learners.student')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_rankings', to='academic.term')),
+            ],
+            options={
+                'verbose_name': 'Term Ranking',
+                'verbose_name_plural': 'Term Rankings',
+                'indexes': [models.Index(fields=['cohort', 'term', 'overall_position'], name='reporting_t_cohort__102aa2_idx')],
+                'unique_together': {('student', 'term')},
+            },
+        ),
+    ]
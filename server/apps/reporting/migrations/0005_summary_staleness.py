@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0004_class_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='is_stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='stale_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gradesummary',
+            name='is_stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='gradesummary',
+            name='stale_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='StaleSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('GRADE', 'Grade summary'), ('ATTENDANCE', 'Attendance summary')], max_length=20)),
+                ('student_id', models.BigIntegerField()),
+                ('term_id', models.BigIntegerField()),
+                ('subject_id', models.BigIntegerField(default=0)),
+                ('priority', models.SmallIntegerField(choices=[(0, 'Low'), (5, 'Normal'), (10, 'High')], default=5)),
+                ('first_marked_at', models.DateTimeField()),
+                ('dirty_at', models.DateTimeField(help_text='Latest mark; newer than a claim means re-dirtied')),
+            ],
+            options={
+                'verbose_name': 'Stale Summary',
+                'verbose_name_plural': 'Stale Summaries',
+                'indexes': [models.Index(fields=['-priority', 'first_marked_at'], name='reporting_s_priorit_072291_idx')],
+                'unique_together': {('kind', 'student_id', 'term_id', 'subject_id')},
+            },
+        ),
+    ]
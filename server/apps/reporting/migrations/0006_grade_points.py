@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0005_summary_staleness'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gradesummary',
+            name='grade_points',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
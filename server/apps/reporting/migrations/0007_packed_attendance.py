@@ -0,0 +1,47 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_grade_boundaries'),
+        ('learners', '0001_initial'),
+        ('reporting', '0006_grade_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceRegister',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_count', models.IntegerField(default=0)),
+                ('session_ids', models.BinaryField(default=bytes)),
+                ('session_dates', models.BinaryField(default=bytes)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_registers', to='academic.cohort')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_registers', to='academic.term')),
+            ],
+            options={
+                'verbose_name': 'Attendance Register',
+                'verbose_name_plural': 'Attendance Registers',
+                'unique_together': {('cohort', 'term')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PackedAttendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statuses', models.BinaryField(default=bytes, help_text='Low nibble first; 0 = not marked')),
+                ('register', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='students', to='reporting.attendanceregister')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='packed_attendance', to='learners.student')),
+            ],
+            options={
+                'verbose_name': 'Packed Attendance',
+                'verbose_name_plural': 'Packed Attendance',
+                'unique_together': {('register', 'student')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learners', '0001_initial'),
+        ('reporting', '0007_packed_attendance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AbsenteeismFlag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rule', models.CharField(max_length=50)),
+                ('started_on', models.DateField()),
+                ('last_seen_on', models.DateField(help_text='Last school day the window was over the threshold')),
+                ('ended_on', models.DateField(blank=True, help_text='First school day back under the threshold', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('window_sessions', models.IntegerField(default=0)),
+                ('window_hits', models.IntegerField(default=0)),
+                ('peak_rate', models.FloatField(default=0)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+                ('refreshed_at', models.DateTimeField()),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='absenteeism_flags', to='learners.student')),
+            ],
+            options={
+                'verbose_name': 'Absenteeism Flag',
+                'verbose_name_plural': 'Absenteeism Flags',
+                'indexes': [models.Index(fields=['is_active', 'rule', '-last_seen_on'], name='reporting_a_is_acti_03009a_idx')],
+                'unique_together': {('student', 'rule', 'started_on')},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+STATUS_COUNTERS = {
+    'PRESENT': 'present_count',
+    'ABSENT': 'absent_count',
+    'LATE': 'late_count',
+    'EXCUSED': 'excused_count',
+    'SICK': 'sick_count',
+}
+
+
+def backfill_rollup(apps, schema_editor):
+    """Count the existing records per (date, class, subject) in one grouped query"""
+    AttendanceRecord = apps.get_model('sch_sessions', 'AttendanceRecord')
+    DailyAttendanceRollup = apps.get_model('reporting', 'DailyAttendanceRollup')
+    alias = schema_editor.connection.alias
+    counts = {field: Count('id', filter=Q(status=status))
+              for status, field in STATUS_COUNTERS.items()}
+    rows = AttendanceRecord.objects.using(alias).values(
+        'session__session_date', 'student__cohort_id', 'session__subject_id'
+    ).annotate(total_sessions=Count('id'), **counts).order_by()
+    batch = []
+    for row in rows.iterator(chunk_size=5000):
+        batch.append(DailyAttendanceRollup(
+            session_date=row['session__session_date'],
+            cohort_id=row['student__cohort_id'] or 0,
+            subject_id=row['session__subject_id'],
+            total_sessions=row['total_sessions'],
+            **{field: row[field] for field in STATUS_COUNTERS.values()},
+        ))
+        if len(batch) == 5000:
+            DailyAttendanceRollup.objects.using(alias).bulk_create(batch)
+            batch = []
+    DailyAttendanceRollup.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_grade_boundaries'),
+        ('reporting', '0008_absenteeism_flags'),
+        ('sch_sessions', '0004_typed_times_instructor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_date', models.DateField()),
+                ('cohort_id', models.BigIntegerField(default=0)),
+                ('total_sessions', models.IntegerField(default=0)),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('late_count', models.IntegerField(default=0)),
+                ('excused_count', models.IntegerField(default=0)),
+                ('sick_count', models.IntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendance_rollups', to='academic.subject')),
+            ],
+            options={
+                'verbose_name': 'Daily Attendance Rollup',
+                'verbose_name_plural': 'Daily Attendance Rollups',
+                'indexes': [models.Index(fields=['cohort_id', 'session_date'], name='reporting_d_cohort__6beca4_idx'), models.Index(fields=['subject', 'session_date'], name='reporting_d_subject_806309_idx')],
+                'unique_together': {('session_date', 'cohort_id', 'subject')},
+            },
+        ),
+        migrations.RunPython(backfill_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0009_daily_attendance_rollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stalesummary',
+            name='kind',
+            field=models.CharField(choices=[('GRADE', 'Grade summary'), ('ATTENDANCE', 'Attendance summary'), ('RANKING', 'Cohort ranking')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0010_stalesummary_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subjectdistribution',
+            name='pass_rate',
+            field=models.FloatField(blank=True, help_text='Percentage of students at or above the pass mark', null=True),
+        ),
+    ]
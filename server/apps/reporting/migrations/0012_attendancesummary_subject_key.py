@@ -0,0 +1,56 @@
+# Generated by Django 6.0.1 on 2026-10-17 01:40
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def drop_duplicate_totals(apps, schema_editor):
+    """Keep the first all-subjects row of each (student, term), flagged stale for a recount"""
+    AttendanceSummary = apps.get_model('reporting', 'AttendanceSummary')
+    alias = schema_editor.connection.alias
+    seen, duplicates, kept = set(), [], set()
+    for pk, student_id, term_id in (
+        AttendanceSummary.objects.using(alias).filter(subject__isnull=True)
+        .order_by('student_id', 'term_id', 'pk')
+        .values_list('pk', 'student_id', 'term_id').iterator()
+    ):
+        if (student_id, term_id) in seen:
+            duplicates.append(pk)
+            kept.add((student_id, term_id))
+        seen.add((student_id, term_id))
+    for start in range(0, len(duplicates), 1000):
+        AttendanceSummary.objects.using(alias).filter(
+            pk__in=duplicates[start:start + 1000]
+        ).delete()
+    now = timezone.now()
+    for student_id, term_id in kept:
+        AttendanceSummary.objects.using(alias).filter(
+            student_id=student_id, term_id=term_id, subject__isnull=True
+        ).update(is_stale=True, stale_since=now)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_grade_boundaries'),
+        ('learners', '0001_initial'),
+        ('reporting', '0011_subjectdistribution_pass_rate'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='attendancesummary',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='attendancesummary',
+            name='subject_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('subject', 0), output_field=models.IntegerField()),
+        ),
+        migrations.RunPython(drop_duplicate_totals, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='attendancesummary',
+            unique_together={('student', 'term', 'subject_key')},
+        ),
+    ]
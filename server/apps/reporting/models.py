@@ -4,10 +4,17 @@
 # ============================================================================
 
 from django.db import models
+from django.db.models.functions import Coalesce
 
 
 class AttendanceSummary(models.Model):
-    """Pre-computed attendance statistics"""
+    """
+    Pre-computed attendance statistics.
+    
+    Rows with a null subject cover all subjects for the term. Every marked
+    session counts towards total_sessions; present and late count as
+    attended for attendance_percentage.
+    """
     student = models.ForeignKey(
         'learners.Student',
         on_delete=models.CASCADE,
@@ -25,19 +32,31 @@ class AttendanceSummary(models.Model):
         blank=True,
         related_name='attendance_summaries'
     )
+    # The subject with 0 for the all-subjects row, so that the unique key
+    # also covers it (NULLs never collide in a unique index)
+    subject_key = models.GeneratedField(
+        expression=Coalesce('subject', 0),
+        output_field=models.IntegerField(),
+        db_persist=True,
+    )
     
     total_sessions = models.IntegerField(default=0)
     present_count = models.IntegerField(default=0)
     absent_count = models.IntegerField(default=0)
     late_count = models.IntegerField(default=0)
     excused_count = models.IntegerField(default=0)
+    sick_count = models.IntegerField(default=0)
     
     attendance_percentage = models.FloatField(null=True, blank=True)
     
+    # Set when source rows changed in a way the counters cannot follow
+    is_stale = models.BooleanField(default=False)
+    stale_since = models.DateTimeField(null=True, blank=True)
+    
     last_updated = models.DateTimeField(auto_now=True)
     
     class Meta:
-        unique_together = [['student', 'term', 'subject']]
+        unique_together = [['student', 'term', 'subject_key']]
         verbose_name = "Attendance Summary"
         verbose_name_plural = "Attendance Summaries"
     
@@ -68,6 +87,15 @@ class GradeSummary(models.Model):
     average_score = models.FloatField(null=True, blank=True)
     weighted_average = models.FloatField(null=True, blank=True)
     final_grade = models.CharField(max_length=10, blank=True)
+    grade_points = models.FloatField(null=True, blank=True)
+    
+    # Filled by the ranking engine; fractional tie rules give .5 positions
+    subject_position = models.FloatField(null=True, blank=True)
+    subject_position_out_of = models.IntegerField(null=True, blank=True)
+    
+    # Set while a recompute is queued for this row
+    is_stale = models.BooleanField(default=False)
+    stale_since = models.DateTimeField(null=True, blank=True)
     
     last_updated = models.DateTimeField(auto_now=True)
     
@@ -77,4 +105,269 @@ class GradeSummary(models.Model):
         verbose_name_plural = "Grade Summaries"
     
     def __str__(self):
-        return f"{self.student.admission_number} - {self.term.name} - {self.subject.name}"
\ No newline at end of file
+        return f"{self.student.admission_number} - {self.term.name} - {self.subject.name}"
+
+
+class TermRanking(models.Model):
+    """Overall class position of a student for a term"""
+    student = models.ForeignKey(
+        'learners.Student',
+        on_delete=models.CASCADE,
+        related_name='term_rankings'
+    )
+    term = models.ForeignKey(
+        'academic.Term',
+        on_delete=models.CASCADE,
+        related_name='term_rankings'
+    )
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.CASCADE,
+        related_name='term_rankings'
+    )
+    
+    subjects_counted = models.IntegerField(default=0)
+    total_score = models.FloatField(null=True, blank=True)
+    mean_score = models.FloatField(null=True, blank=True)
+    overall_position = models.FloatField(null=True, blank=True)
+    out_of = models.IntegerField(default=0)
+    tie_rule = models.CharField(max_length=20, blank=True)
+    
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['student', 'term']]
+        indexes = [
+            models.Index(fields=['cohort', 'term', 'overall_position']),
+        ]
+        verbose_name = "Term Ranking"
+        verbose_name_plural = "Term Rankings"
+    
+    def __str__(self):
+        return f"{self.student.admission_number} - {self.term.name} - {self.overall_position}"
+
+
+class SubjectDistribution(models.Model):
+    """Pre-computed score distribution of a cohort in one subject per term"""
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.CASCADE,
+        related_name='subject_distributions'
+    )
+    subject = models.ForeignKey(
+        'academic.Subject',
+        on_delete=models.CASCADE,
+        related_name='subject_distributions'
+    )
+    term = models.ForeignKey(
+        'academic.Term',
+        on_delete=models.CASCADE,
+        related_name='subject_distributions'
+    )
+    
+    student_count = models.IntegerField(default=0)
+    mean = models.FloatField(null=True, blank=True)
+    median = models.FloatField(null=True, blank=True)
+    std_dev = models.FloatField(null=True, blank=True)
+    percentiles = models.JSONField(default=dict, help_text='{"25": 48.5, ...}')
+    pass_rate = models.FloatField(null=True, blank=True,
+                                  help_text="Percentage of students at or above the pass mark")
+    histogram = models.JSONField(default=list, help_text="Counts per fixed-width bin over 0-100")
+    
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['cohort', 'subject', 'term']]
+        verbose_name = "Subject Distribution"
+        verbose_name_plural = "Subject Distributions"
+    
+    def __str__(self):
+        return f"{self.cohort.name} - {self.subject.name} - {self.term.name}"
+
+
+class SummaryKind(models.TextChoices):
+    """Aggregates the recompute scheduler knows how to rebuild"""
+    GRADE = "GRADE", "Grade summary"
+    ATTENDANCE = "ATTENDANCE", "Attendance summary"
+    RANKING = "RANKING", "Cohort ranking"
+
+
+class RecomputePriority(models.IntegerChoices):
+    """Queue order of stale summaries: terms in progress first, ended terms last"""
+    LOW = 0, "Low"
+    NORMAL = 5, "Normal"
+    HIGH = 10, "High"
+
+
+class StaleSummary(models.Model):
+    """
+    Queued recompute of one summary key.
+    
+    GRADE entries are keyed by (student, term, subject); ATTENDANCE entries
+    by (student, term) with subject_id 0 and rebuild every subject row and
+    the all-subjects row. RANKING entries re-rank a (cohort, term) and hold
+    the cohort in subject_id with student_id 0. Plain integer keys let the
+    unique constraint coalesce repeated marks without NULL subjects
+    slipping through.
+    """
+    kind = models.CharField(max_length=20, choices=SummaryKind.choices)
+    student_id = models.BigIntegerField()
+    term_id = models.BigIntegerField()
+    subject_id = models.BigIntegerField(default=0)
+    
+    priority = models.SmallIntegerField(
+        choices=RecomputePriority.choices,
+        default=RecomputePriority.NORMAL
+    )
+    first_marked_at = models.DateTimeField()
+    dirty_at = models.DateTimeField(help_text="Latest mark; newer than a claim means re-dirtied")
+    
+    class Meta:
+        unique_together = [['kind', 'student_id', 'term_id', 'subject_id']]
+        indexes = [
+            models.Index(fields=['-priority', 'first_marked_at']),
+        ]
+        verbose_name = "Stale Summary"
+        verbose_name_plural = "Stale Summaries"
+    
+    def __str__(self):
+        return f"{self.kind} {self.student_id}/{self.term_id}/{self.subject_id}"
+
+
+class AttendanceRegister(models.Model):
+    """
+    Session columns of one cohort's term in the packed attendance store.
+    
+    Sessions keep the ordinal they were first seen with, so marking a new
+    session appends a column without rewriting any student's statuses.
+    ``session_ids`` and ``session_dates`` are little-endian int64 ids and
+    int32 date ordinals, one per column.
+    """
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.CASCADE,
+        related_name='attendance_registers'
+    )
+    term = models.ForeignKey(
+        'academic.Term',
+        on_delete=models.CASCADE,
+        related_name='attendance_registers'
+    )
+    
+    session_count = models.IntegerField(default=0)
+    session_ids = models.BinaryField(default=bytes)
+    session_dates = models.BinaryField(default=bytes)
+    
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['cohort', 'term']]
+        verbose_name = "Attendance Register"
+        verbose_name_plural = "Attendance Registers"
+    
+    def __str__(self):
+        return f"{self.cohort.name} - {self.term.name} ({self.session_count} sessions)"
+
+
+class PackedAttendance(models.Model):
+    """One student's statuses on a register, four bits per session column"""
+    register = models.ForeignKey(
+        AttendanceRegister,
+        on_delete=models.CASCADE,
+        related_name='students'
+    )
+    student = models.ForeignKey(
+        'learners.Student',
+        on_delete=models.CASCADE,
+        related_name='packed_attendance'
+    )
+    
+    statuses = models.BinaryField(default=bytes, help_text="Low nibble first; 0 = not marked")
+    
+    class Meta:
+        unique_together = [['register', 'student']]
+        verbose_name = "Packed Attendance"
+        verbose_name_plural = "Packed Attendance"
+    
+    def __str__(self):
+        return f"{self.student.admission_number} - register {self.register_id}"
+
+
+class AbsenteeismFlag(models.Model):
+    """
+    One episode of a student over an absence or lateness rule.
+    
+    An episode starts on the first school day the rule's rolling window
+    crosses its threshold and lasts while it stays over; ``is_active`` means
+    the window was still over on the student's latest marked day. Rates and
+    counts are those of the worst window of the episode.
+    """
+    student = models.ForeignKey(
+        'learners.Student',
+        on_delete=models.CASCADE,
+        related_name='absenteeism_flags'
+    )
+    rule = models.CharField(max_length=50)
+    
+    started_on = models.DateField()
+    last_seen_on = models.DateField(help_text="Last school day the window was over the threshold")
+    ended_on = models.DateField(null=True, blank=True,
+                                help_text="First school day back under the threshold")
+    is_active = models.BooleanField(default=True)
+    
+    window_sessions = models.IntegerField(default=0)
+    window_hits = models.IntegerField(default=0)
+    peak_rate = models.FloatField(default=0)
+    
+    detected_at = models.DateTimeField(auto_now_add=True)
+    refreshed_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = [['student', 'rule', 'started_on']]
+        indexes = [
+            models.Index(fields=['is_active', 'rule', '-last_seen_on']),
+        ]
+        verbose_name = "Absenteeism Flag"
+        verbose_name_plural = "Absenteeism Flags"
+    
+    def __str__(self):
+        return f"{self.student.admission_number} - {self.rule} from {self.started_on}"
+
+
+class DailyAttendanceRollup(models.Model):
+    """
+    Attendance marks per day, class and subject, for long-range trends.
+    
+    ``cohort_id`` is the class of the marked students when counted, 0 for
+    students without one; a plain integer like StaleSummary's keys, so the
+    unique key holds for students without a class. Counters count marks,
+    not sessions, like AttendanceSummary.
+    """
+    session_date = models.DateField()
+    cohort_id = models.BigIntegerField(default=0)
+    subject = models.ForeignKey(
+        'academic.Subject',
+        on_delete=models.CASCADE,
+        related_name='daily_attendance_rollups'
+    )
+    
+    total_sessions = models.IntegerField(default=0)
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    late_count = models.IntegerField(default=0)
+    excused_count = models.IntegerField(default=0)
+    sick_count = models.IntegerField(default=0)
+    
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = [['session_date', 'cohort_id', 'subject']]
+        indexes = [
+            models.Index(fields=['cohort_id', 'session_date']),
+            models.Index(fields=['subject', 'session_date']),
+        ]
+        verbose_name = "Daily Attendance Rollup"
+        verbose_name_plural = "Daily Attendance Rollups"
+    
+    def __str__(self):
+        return f"{self.session_date} - cohort {self.cohort_id} - {self.subject.name}"
@@ -0,0 +1,196 @@
+# ============================================================================
+# apps/reporting/ranking.py
+# Whole-cohort subject and overall positions
+# ============================================================================
+#
+# A cohort's GradeSummary rows for a term are read in one query and pivoted
+# into a students x subjects matrix. Every column is ranked at once with
+# NumPy, then positions are written back in bulk. Ranking costs a whole
+# cohort, so inline summary recomputes only queue the cohorts they touch;
+# the scheduler re-ranks them with the tie rule last used for them.
+
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert
+from apps.learners.models import Student
+
+from .models import GradeSummary, TermRanking
+
+
+DENSE = 'dense'
+COMPETITION = 'competition'
+FRACTIONAL = 'fractional'
+TIE_RULES = (DENSE, COMPETITION, FRACTIONAL)
+
+RANK_BATCH_SIZE = 500
+
+RANKING_FIELDS = [
+    'cohort', 'subjects_counted', 'total_score', 'mean_score',
+    'overall_position', 'out_of', 'tie_rule', 'last_updated',
+]
+
+
+def default_tie_rule():
+    return getattr(settings, 'REPORTING_RANKING_TIES', COMPETITION)
+
+
+def rank_columns(matrix, tie_rule=COMPETITION):
+    """
+    Rank every column of ``matrix`` from highest to lowest.
+
+    NaN cells are left unranked (NaN). Ties are resolved with ``tie_rule``:
+    dense (1, 2, 2, 3), competition (1, 2, 2, 4) or fractional
+    (1, 2.5, 2.5, 4).
+    """
+    if tie_rule not in TIE_RULES:
+        raise ValueError(f"Unknown tie rule {tie_rule!r}; expected one of {TIE_RULES}")
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.ndim == 1:
+        return rank_columns(matrix[:, None], tie_rule)[:, 0]
+
+    missing = np.isnan(matrix)
+    values = np.where(missing, -np.inf, matrix)
+    order = np.argsort(-values, axis=0, kind='stable')
+    ordered = np.take_along_axis(values, order, axis=0)
+
+    rows = matrix.shape[0]
+    ordinal = np.broadcast_to(np.arange(1, rows + 1)[:, None], matrix.shape)
+    starts = np.ones(matrix.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+
+    if tie_rule == DENSE:
+        ranks = np.cumsum(starts, axis=0)
+    else:
+        first = np.maximum.accumulate(np.where(starts, ordinal, 0), axis=0)
+        ranks = first
+        if tie_rule == FRACTIONAL:
+            ends = np.ones(matrix.shape, dtype=bool)
+            ends[:-1] = starts[1:]
+            last = np.minimum.accumulate(
+                np.where(ends, ordinal, rows + 1)[::-1], axis=0
+            )[::-1]
+            ranks = (first + last) / 2
+
+    result = np.empty(matrix.shape, dtype=float)
+    np.put_along_axis(result, order, ranks, axis=0)
+    result[missing] = np.nan
+    return result
+
+
+def _nullable(value):
+    return None if np.isnan(value) else float(value)
+
+
+def rank_cohort(cohort_id, term_id, tie_rule=None, using=DEFAULT_DB_ALIAS):
+    """
+    Store subject positions on GradeSummary and overall positions on
+    TermRanking for every student of a cohort in a term.
+
+    The overall score is the mean of a student's subject weighted averages.
+    Returns the number of students ranked.
+    """
+    tie_rule = tie_rule or default_tie_rule()
+    rows = list(
+        GradeSummary.objects.using(using)
+        .filter(term_id=term_id, student__cohort_id=cohort_id)
+        .values_list('pk', 'student_id', 'subject_id', 'weighted_average')
+    )
+
+    with transaction.atomic(using=using):
+        TermRanking.objects.using(using).filter(term_id=term_id, cohort_id=cohort_id).exclude(
+            student_id__in={row[1] for row in rows}
+        ).delete()
+        if not rows:
+            return 0
+
+        pks, student_ids, subject_ids, averages = zip(*rows)
+        averages = np.array([np.nan if a is None else a for a in averages], dtype=float)
+        students, student_index = np.unique(student_ids, return_inverse=True)
+        subjects, subject_index = np.unique(subject_ids, return_inverse=True)
+
+        matrix = np.full((len(students), len(subjects)), np.nan)
+        matrix[student_index, subject_index] = averages
+
+        subject_ranks = rank_columns(matrix, tie_rule)
+        subject_out_of = (~np.isnan(matrix)).sum(axis=0)
+
+        counted = (~np.isnan(matrix)).sum(axis=1)
+        totals = np.where(counted > 0, np.nansum(matrix, axis=1), np.nan)
+        means = totals / np.where(counted > 0, counted, 1)
+        overall = rank_columns(means, tie_rule)
+        out_of = int((counted > 0).sum())
+
+        # Rows deleted since they were read are skipped, not re-inserted.
+        GradeSummary.objects.using(using).bulk_update(
+            [
+                GradeSummary(
+                    pk=pk,
+                    subject_position=_nullable(subject_ranks[s, j]),
+                    subject_position_out_of=int(subject_out_of[j]),
+                )
+                for pk, s, j in zip(pks, student_index, subject_index)
+            ],
+            ['subject_position', 'subject_position_out_of'],
+            batch_size=RANK_BATCH_SIZE,
+        )
+
+        now = timezone.now()
+        bulk_upsert(
+            TermRanking,
+            [
+                TermRanking(
+                    student_id=int(student_id),
+                    term_id=term_id,
+                    cohort_id=cohort_id,
+                    subjects_counted=int(counted[s]),
+                    total_score=_nullable(totals[s]),
+                    mean_score=_nullable(means[s]),
+                    overall_position=_nullable(overall[s]),
+                    out_of=out_of,
+                    tie_rule=tie_rule,
+                    last_updated=now,
+                )
+                for s, student_id in enumerate(students)
+            ],
+            unique_fields=['student', 'term'],
+            update_fields=RANKING_FIELDS,
+            using=using,
+        )
+    return len(students)
+
+
+def touched_cohorts(triples, using=DEFAULT_DB_ALIAS):
+    """(cohort_id, term_id) pairs of the students of GradeSummary triples"""
+    students = {student_id for student_id, _, _ in triples}
+    cohort_of = dict(
+        Student.objects.using(using).filter(pk__in=students, cohort__isnull=False)
+        .values_list('pk', 'cohort_id')
+    )
+    return {
+        (cohort_of[student_id], term_id)
+        for student_id, term_id, _ in triples if student_id in cohort_of
+    }
+
+
+def rerank_cohorts(pairs, using=DEFAULT_DB_ALIAS):
+    """Re-rank (cohort_id, term_id) pairs with the tie rule last used for them"""
+    cohorts = defaultdict(set)
+    for cohort_id, term_id in pairs:
+        cohorts[term_id].add(cohort_id)
+    for term_id, cohort_ids in cohorts.items():
+        rules = dict(
+            TermRanking.objects.using(using).filter(term_id=term_id, cohort_id__in=cohort_ids)
+            .values_list('cohort_id', 'tie_rule').distinct()
+        )
+        for cohort_id in sorted(cohort_ids):
+            rank_cohort(cohort_id, term_id, tie_rule=rules.get(cohort_id) or None, using=using)
+
+
+def rerank_for_triples(triples, using=DEFAULT_DB_ALIAS):
+    """Re-rank the (cohort, term) pairs touched by changed GradeSummary triples"""
+    rerank_cohorts(touched_cohorts(triples, using), using=using)
@@ -0,0 +1,156 @@
+# ============================================================================
+# apps/reporting/rebuild.py
+# Set-based rebuild of reporting aggregates
+# ============================================================================
+#
+# A rebuild is split into shards of one term, optionally narrowed to one
+# cohort. Each shard is a handful of GROUP BY queries whose results are
+# streamed and written back in chunked upserts, so memory stays bounded by
+# the chunk size rather than the size of the source tables. Only subjects
+# with rubric assessments, whose levels must be normalized against their
+# scale, go through the normalization pipeline, one subject at a time.
+
+import time
+from dataclasses import dataclass
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apps.academic import grading
+from apps.academic.db import bulk_upsert, chunked
+from apps.academic.models import Cohort, Term
+from apps.assessments.models import Assessment
+from apps.assessments.normalization import normalize_subject_term
+from apps.learners.models import Student
+
+from . import attendance, attendance_store, distributions, grades
+from .models import GradeSummary
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+@dataclass
+class ShardResult:
+    term_id: int
+    cohort_id: int | None
+    grade_rows: int = 0
+    attendance_rows: int = 0
+    distribution_rows: int = 0
+    packed_rows: int = 0
+    source_rows: int = 0
+    seconds: float = 0.0
+
+
+def plan_shards(terms=None, cohorts=None, academic_years=None, shard_by='term'):
+    """
+    Resolve a rebuild scope to (term_id, cohort_id) shards.
+
+    ``cohort_id`` is None when the shard covers every student of the term.
+    """
+    term_qs = Term.objects.all()
+    if terms:
+        term_qs = term_qs.filter(pk__in=terms)
+    if academic_years:
+        term_qs = term_qs.filter(academic_year__in=academic_years)
+    if cohorts and not (terms or academic_years):
+        term_qs = term_qs.filter(academic_year__cohorts__in=cohorts).distinct()
+    term_ids = list(term_qs.order_by('academic_year__start_date', 'sequence')
+                    .values_list('pk', flat=True))
+
+    if cohorts:
+        cohort_ids = list(cohorts)
+    elif shard_by == 'cohort':
+        cohort_ids = list(Cohort.objects.filter(students__isnull=False)
+                          .distinct().values_list('pk', flat=True))
+    else:
+        cohort_ids = [None]
+    return [(term_id, cohort_id) for term_id in term_ids for cohort_id in cohort_ids]
+
+
+def rebuild_shard(term_id, cohort_id=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                  using=DEFAULT_DB_ALIAS):
+    """
+    Rebuild GradeSummary, AttendanceSummary, SubjectDistribution and packed
+    attendance rows for one shard
+    """
+    started = time.perf_counter()
+    result = ShardResult(term_id=term_id, cohort_id=cohort_id)
+
+    with transaction.atomic(using=using):
+        result.grade_rows, scores = _rebuild_grades(term_id, cohort_id, chunk_size, using)
+        result.attendance_rows, records = attendance.replace_attendance_summaries(
+            term_id, cohort_id=cohort_id, chunk_size=chunk_size, using=using
+        )
+        result.distribution_rows = _rebuild_distributions(term_id, cohort_id, using)
+        result.packed_rows, _ = attendance_store.rebuild_registers(
+            term_id, cohort_id, using=using
+        )
+    result.source_rows = scores + records
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _rebuild_grades(term_id, cohort_id, chunk_size, using):
+    now = timezone.now()
+    rubric_subjects = list(
+        Assessment.objects.using(using).filter(term_id=term_id, rubric_scale__isnull=False)
+        .order_by().values_list('subject_id', flat=True).distinct()
+    )
+    scores = grades.graded_scores(using).filter(assessment__term_id=term_id).exclude(
+        assessment__subject_id__in=rubric_subjects
+    )
+    if cohort_id:
+        scores = scores.filter(student__cohort_id=cohort_id)
+
+    written = source = 0
+    tables = {}
+    for rows in chunked(grades.summarize(scores).iterator(chunk_size=chunk_size), chunk_size):
+        summaries = []
+        for row in rows:
+            subject_id = row['assessment__subject_id']
+            if subject_id not in tables:
+                tables[subject_id] = grading.table_for_subject(subject_id, using=using)
+            summaries.append(grades.summary_from_row(row, tables[subject_id], now))
+        written += _write_summaries(summaries, chunk_size, using)
+        source += sum(summary.total_assessments for summary in summaries)
+
+    for subject_id in rubric_subjects:
+        normalized = normalize_subject_term(term_id, subject_id, cohort_id=cohort_id,
+                                            using=using)
+        written += _write_summaries(
+            grades.summaries_from_scores(normalized, now, using=using), chunk_size, using
+        )
+        source += int(normalized.counts.sum())
+
+    # Rows not touched above have lost all their graded scores.
+    stale = GradeSummary.objects.using(using).filter(term_id=term_id, last_updated__lt=now)
+    if cohort_id:
+        stale = stale.filter(student__cohort_id=cohort_id)
+    stale.delete()
+    return written, source
+
+
+def _write_summaries(summaries, chunk_size, using):
+    for chunk in chunked(summaries, chunk_size):
+        bulk_upsert(
+            GradeSummary, chunk,
+            unique_fields=['student', 'term', 'subject'],
+            update_fields=grades.SUMMARY_FIELDS,
+            batch_size=chunk_size,
+            using=using,
+        )
+    return len(summaries)
+
+
+def _rebuild_distributions(term_id, cohort_id, using):
+    if cohort_id:
+        cohort_ids = [cohort_id]
+    else:
+        cohort_ids = Student.objects.using(using).filter(
+            grade_summaries__term_id=term_id
+        ).order_by().values_list('cohort_id', flat=True).distinct()
+    return sum(
+        distributions.refresh_distributions(term_id, cohort, using=using)
+        for cohort in cohort_ids
+    )
@@ -0,0 +1,207 @@
+# ============================================================================
+# apps/reporting/report_cards.py
+# End-of-term report cards for a whole cohort
+# ============================================================================
+#
+# All data for a cohort is read with a fixed number of queries and turned
+# into plain, picklable dicts. Rendering then fans out over worker
+# processes, each of which compiles the template once.
+
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.academic.models import Cohort, Term
+from apps.assessments import rubrics
+from apps.cbc.models import EvidenceRecord
+from apps.learners.models import Student, StudentStatus
+from apps.projects.models import ProjectParticipation
+
+from .models import AttendanceSummary, GradeSummary, TermRanking
+
+
+TEMPLATE_NAME = 'reporting/report_card.html'
+
+HTML = 'html'
+PDF = 'pdf'
+FORMATS = (HTML, PDF)
+
+
+def collect_report_cards(cohort_id, term_id, using=DEFAULT_DB_ALIAS):
+    """
+    Build one template context per active student of the cohort.
+
+    Runs eight queries however large the cohort is, plus two while the
+    rubric scales of the evidence and projects are not in the process cache
+    yet.
+    """
+    cohort = Cohort.objects.using(using).select_related(
+        'curriculum', 'academic_year'
+    ).get(pk=cohort_id)
+    term = Term.objects.using(using).select_related('academic_year').get(pk=term_id)
+    students = list(
+        Student.objects.using(using)
+        .filter(cohort_id=cohort_id, status=StudentStatus.ACTIVE)
+        .order_by('admission_number')
+    )
+    student_ids = [student.pk for student in students]
+
+    grades = defaultdict(list)
+    for summary in (
+        GradeSummary.objects.using(using)
+        .filter(term_id=term_id, student_id__in=student_ids)
+        .select_related('subject')
+        .order_by('subject__name')
+    ):
+        grades[summary.student_id].append({
+            'subject': summary.subject.name,
+            'code': summary.subject.code,
+            'assessments': summary.total_assessments,
+            'average': summary.average_score,
+            'weighted_average': summary.weighted_average,
+            'grade': summary.final_grade,
+            'position': summary.subject_position,
+            'out_of': summary.subject_position_out_of,
+        })
+
+    attendance = {
+        row['student_id']: row
+        for row in AttendanceSummary.objects.using(using)
+        .filter(term_id=term_id, subject__isnull=True, student_id__in=student_ids)
+        .values('student_id', 'total_sessions', 'present_count', 'absent_count',
+                'late_count', 'excused_count', 'sick_count', 'attendance_percentage')
+    }
+
+    rankings = {
+        row['student_id']: row
+        for row in TermRanking.objects.using(using)
+        .filter(term_id=term_id, student_id__in=student_ids)
+        .values('student_id', 'mean_score', 'overall_position', 'out_of')
+    }
+
+    records = list(
+        EvidenceRecord.objects.using(using)
+        .filter(student_id__in=student_ids,
+                observed_at__range=(term.start_date, term.end_date))
+        .select_related('learning_outcome')
+        .order_by('learning_outcome__code', 'observed_at')
+    )
+    participations = list(
+        ProjectParticipation.objects.using(using)
+        .filter(project__term_id=term_id, student_id__in=student_ids)
+        .select_related('project')
+        .order_by('project__name')
+    )
+    levels = rubrics.get_levels(
+        {record.rubric_level_id for record in records}
+        | {participation.rubric_level_id for participation in participations},
+        using=using,
+    )
+    evidence = defaultdict(list)
+    for record in records:
+        level = levels.get(record.rubric_level_id)
+        evidence[record.student_id].append({
+            'outcome': record.learning_outcome.code,
+            'description': record.learning_outcome.description,
+            'level': level.label if level else '',
+            'score': record.numeric_score,
+            'narrative': record.narrative,
+            'observed_at': record.observed_at,
+        })
+
+    projects = defaultdict(list)
+    for participation in participations:
+        level = levels.get(participation.rubric_level_id)
+        projects[participation.student_id].append({
+            'project': participation.project.name,
+            'level': level.label if level else '',
+            'score': participation.final_score,
+            'out_of': participation.project.total_marks,
+            'comments': participation.comments,
+        })
+
+    school = {
+        'cohort': cohort.name,
+        'level': cohort.level,
+        'curriculum': str(cohort.curriculum),
+        'academic_year': cohort.academic_year.name,
+        'term': term.name,
+        'term_start': term.start_date,
+        'term_end': term.end_date,
+        'generated_at': timezone.now(),
+    }
+    return [
+        {
+            **school,
+            'student': {
+                'id': student.pk,
+                'admission_number': student.admission_number,
+                'name': student.get_full_name(),
+            },
+            'grades': grades.get(student.pk, []),
+            'attendance': attendance.get(student.pk),
+            'ranking': rankings.get(student.pk),
+            'evidence': evidence.get(student.pk, []),
+            'projects': projects.get(student.pk, []),
+        }
+        for student in students
+    ]
+
+
+_template = None
+
+
+def _init_worker(template_name=TEMPLATE_NAME):
+    global _template
+    django.setup()
+    _template = get_template(template_name)
+
+
+def render_cards(contexts, fmt=HTML):
+    """Render a batch of report card contexts to (filename, bytes) pairs"""
+    if _template is None:
+        _init_worker()
+    rendered = []
+    for context in contexts:
+        html = _template.render(context)
+        name = f"{context['student']['admission_number']}.{fmt}".replace('/', '-')
+        if fmt == PDF:
+            from weasyprint import HTML as WeasyHTML
+            rendered.append((name, WeasyHTML(string=html).write_pdf()))
+        else:
+            rendered.append((name, html.encode('utf-8')))
+    return rendered
+
+
+def write_report_cards(contexts, archive_path, fmt=HTML, workers=1, batch_size=50):
+    """
+    Render contexts into a zip archive at ``archive_path``.
+
+    With more than one worker, batches of cards are rendered in separate
+    processes while this process writes finished batches to the archive.
+    Returns the number of cards written.
+    """
+    batches = [contexts[i:i + batch_size] for i in range(0, len(contexts), batch_size)]
+    written = 0
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        if workers > 1:
+            # Workers must not share this process's database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                results = pool.map(render_cards, batches, [fmt] * len(batches))
+                for cards in results:
+                    for name, content in cards:
+                        archive.writestr(name, content)
+                        written += 1
+        else:
+            _init_worker()
+            for batch in batches:
+                for name, content in render_cards(batch, fmt):
+                    archive.writestr(name, content)
+                    written += 1
+    return written
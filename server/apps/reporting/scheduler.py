@@ -0,0 +1,185 @@
+# ============================================================================
+# apps/reporting/scheduler.py
+# Staleness tracking and batched background recompute of summaries
+# ============================================================================
+#
+# Writers that cannot (or should not) recompute inline queue the affected
+# summary keys in StaleSummary and flag the existing rows is_stale. Keys of
+# a term in progress are queued at high priority, those of ended terms at
+# low priority. Marks coalesce on the queue's unique key, keeping the
+# highest priority and the first mark time. A worker
+# (``process_summary_queue``) claims batches by priority then age,
+# recomputes them and drops entries that were not re-marked meanwhile.
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Min
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.academic.db import chunked
+from apps.academic.models import Term
+
+from . import attendance, distributions, grades, ranking
+from .models import (
+    AttendanceSummary, GradeSummary, RecomputePriority, StaleSummary, SummaryKind,
+)
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def sync_recompute_limit():
+    """Changes touching more summary keys than this are queued, not recomputed inline"""
+    return getattr(settings, 'REPORTING_SYNC_RECOMPUTE_LIMIT', 200)
+
+
+def term_priorities(term_ids, today=None, using=DEFAULT_DB_ALIAS):
+    """``{term_id: RecomputePriority}``: HIGH while a term runs, LOW once it ended"""
+    today = today or timezone.localdate()
+    priorities = {}
+    for pk, start_date, end_date in Term.objects.using(using).filter(
+        pk__in=term_ids
+    ).values_list('pk', 'start_date', 'end_date'):
+        if end_date < today:
+            priorities[pk] = RecomputePriority.LOW
+        elif start_date <= today:
+            priorities[pk] = RecomputePriority.HIGH
+        else:
+            priorities[pk] = RecomputePriority.NORMAL
+    return priorities
+
+
+def mark_stale(kind, keys, priority=None, using=DEFAULT_DB_ALIAS):
+    """
+    Queue summary keys for recompute and flag their rows stale.
+
+    GRADE keys are (student_id, term_id, subject_id) triples; ATTENDANCE
+    keys are (student_id, term_id) pairs and RANKING keys (cohort_id,
+    term_id) pairs. Without ``priority`` each key is queued at the priority
+    of its term.
+    """
+    now = timezone.now()
+    groups = defaultdict(set)
+    for key in keys:
+        if kind == SummaryKind.RANKING:
+            groups[(key[1], key[0])].add(0)
+            continue
+        student_id, term_id = key[0], key[1]
+        subject_id = key[2] if kind == SummaryKind.GRADE else 0
+        groups[(term_id, subject_id)].add(student_id)
+    if not groups:
+        return
+    if priority is None:
+        priorities = term_priorities({term_id for term_id, _ in groups}, using=using)
+    else:
+        priorities = {term_id: priority for term_id, _ in groups}
+
+    with transaction.atomic(using=using):
+        queue = StaleSummary.objects.using(using)
+        for (term_id, subject_id), student_ids in groups.items():
+            term_priority = priorities.get(term_id, RecomputePriority.NORMAL)
+            for chunk in chunked(sorted(student_ids), 500):
+                queue.filter(
+                    kind=kind, term_id=term_id, subject_id=subject_id, student_id__in=chunk
+                ).update(dirty_at=now, priority=Greatest('priority', term_priority))
+                queue.bulk_create(
+                    [
+                        StaleSummary(kind=kind, student_id=student_id, term_id=term_id,
+                                     subject_id=subject_id, priority=term_priority,
+                                     first_marked_at=now, dirty_at=now)
+                        for student_id in chunk
+                    ],
+                    ignore_conflicts=True,
+                )
+                _flag_stale(kind, term_id, subject_id, chunk, now, using)
+
+
+def _flag_stale(kind, term_id, subject_id, student_ids, now, using):
+    if kind == SummaryKind.RANKING:
+        return
+    _summary_rows(kind, term_id, subject_id, using).filter(
+        student_id__in=student_ids, is_stale=False
+    ).update(is_stale=True, stale_since=now)
+
+
+def _summary_rows(kind, term_id, subject_id, using):
+    if kind == SummaryKind.GRADE:
+        return GradeSummary.objects.using(using).filter(term_id=term_id, subject_id=subject_id)
+    return AttendanceSummary.objects.using(using).filter(term_id=term_id)
+
+
+def process_batch(batch_size=DEFAULT_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Recompute one batch of queued summaries, highest priority and oldest
+    first. Returns the number of queue entries claimed.
+    """
+    claimed_at = timezone.now()
+    with transaction.atomic(using=using):
+        queue = StaleSummary.objects.using(using).order_by('-priority', 'first_marked_at')
+        if connections[using].features.has_select_for_update_skip_locked:
+            # Lets several workers drain the queue without waiting on each other.
+            queue = queue.select_for_update(skip_locked=True)
+        entries = list(queue.values_list(
+            'pk', 'kind', 'student_id', 'term_id', 'subject_id'
+        )[:batch_size])
+        if not entries:
+            return 0
+
+        triples, cohorts = set(), set()
+        attendance_terms = defaultdict(set)
+        for _, kind, student_id, term_id, subject_id in entries:
+            if kind == SummaryKind.GRADE:
+                triples.add((student_id, term_id, subject_id))
+            elif kind == SummaryKind.RANKING:
+                cohorts.add((subject_id, term_id))
+            else:
+                attendance_terms[term_id].add(student_id)
+
+        if triples:
+            grades.refresh_grade_summaries(triples, using=using)
+            distributions.refresh_for_triples(triples, using=using)
+            cohorts |= ranking.touched_cohorts(triples, using=using)
+        ranking.rerank_cohorts(cohorts, using=using)
+        for term_id, student_ids in attendance_terms.items():
+            attendance.replace_attendance_summaries(term_id, student_ids=student_ids,
+                                                    using=using)
+
+        # Entries marked again after the claim stay queued for another pass.
+        claimed = StaleSummary.objects.using(using).filter(pk__in=[entry[0] for entry in entries])
+        claimed.filter(dirty_at__lte=claimed_at).delete()
+        # The recompute above cleared their rows' stale flag; set it again.
+        requeued = defaultdict(list)
+        for kind, student_id, term_id, subject_id in claimed.values_list(
+            'kind', 'student_id', 'term_id', 'subject_id'
+        ):
+            requeued[(kind, term_id, subject_id)].append(student_id)
+        now = timezone.now()
+        for (kind, term_id, subject_id), student_ids in requeued.items():
+            _flag_stale(kind, term_id, subject_id, student_ids, now, using)
+    return len(entries)
+
+
+def queue_status(using=DEFAULT_DB_ALIAS):
+    """How far behind the scheduler is, for dashboards and alerting"""
+    now = timezone.now()
+    by_kind = {
+        row['kind']: row
+        for row in StaleSummary.objects.using(using).values('kind')
+        .annotate(pending=Count('id'), oldest=Min('first_marked_at')).order_by()
+    }
+    oldest = min((row['oldest'] for row in by_kind.values()), default=None)
+    return {
+        'pending': sum(row['pending'] for row in by_kind.values()),
+        'oldest_marked_at': oldest,
+        'lag_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+        'by_kind': {
+            kind: {
+                'pending': row['pending'],
+                'lag_seconds': (now - row['oldest']).total_seconds(),
+            }
+            for kind, row in by_kind.items()
+        },
+    }
@@ -0,0 +1,40 @@
+# ============================================================================
+# apps/reporting/serializers.py
+# ============================================================================
+
+from rest_framework import serializers
+
+from apps.academic.models import Cohort, Subject
+from apps.learners.models import Student
+
+from .timeseries import BUCKETS, ROLLUP, SOURCES, WEEK
+
+
+MAX_SERIES_DAYS = 3700
+
+
+class AttendanceSeriesSerializer(serializers.Serializer):
+    """Query parameters of an attendance time series; no scope is the whole school"""
+    bucket = serializers.ChoiceField(choices=BUCKETS, default=WEEK)
+    start = serializers.DateField()
+    end = serializers.DateField()
+    cohort = serializers.PrimaryKeyRelatedField(queryset=Cohort.objects.all(), required=False)
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), required=False)
+    student = serializers.PrimaryKeyRelatedField(queryset=Student.objects.all(), required=False)
+    source = serializers.ChoiceField(
+        choices=SOURCES, required=False,
+        help_text="Force the records or the daily rollup; chosen by range length otherwise",
+    )
+
+    def validate(self, data):
+        if data['end'] < data['start']:
+            raise serializers.ValidationError({'end': "End is before start."})
+        if (data['end'] - data['start']).days >= MAX_SERIES_DAYS:
+            raise serializers.ValidationError(
+                {'end': f"Ranges are limited to {MAX_SERIES_DAYS} days."}
+            )
+        if data.get('student') is not None and data.get('source') == ROLLUP:
+            raise serializers.ValidationError(
+                {'source': "The daily rollup has no per-student rows."}
+            )
+        return data
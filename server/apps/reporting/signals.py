@@ -0,0 +1,179 @@
+# ============================================================================
+# apps/reporting/signals.py
+# Keep pre-computed aggregates in step with their source rows
+# ============================================================================
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.assessments.models import Assessment, AssessmentScore
+from apps.assessments.signals import scores_changed
+from apps.learners.models import Student
+from apps.sessions.models import AttendanceRecord, Session
+from apps.sessions.signals import attendance_changed
+
+from . import attendance, attendance_store, grades, scheduler, timeseries
+from .models import AttendanceRegister, SummaryKind
+
+
+@receiver(post_save, sender=AssessmentScore)
+@receiver(post_delete, sender=AssessmentScore)
+def score_written(sender, instance, using, **kwargs):
+    grades.mark_pairs_dirty([(instance.student_id, instance.assessment_id)], using=using)
+
+
+@receiver(scores_changed, sender=AssessmentScore)
+def scores_bulk_written(sender, pairs, using, **kwargs):
+    grades.mark_pairs_dirty(pairs, using=using)
+
+
+def _assessment_triples(assessment, term_id, subject_id, using):
+    student_ids = AssessmentScore.objects.using(using).filter(
+        assessment=assessment
+    ).values_list('student_id', flat=True)
+    return [(student_id, term_id, subject_id) for student_id in student_ids]
+
+
+@receiver(pre_save, sender=Assessment)
+def assessment_changing(sender, instance, using, raw=False, **kwargs):
+    instance._summary_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._summary_previous = Assessment.objects.using(using).filter(
+        pk=instance.pk
+    ).values('term_id', 'subject_id', 'weight', 'total_marks').first()
+
+
+@receiver(post_save, sender=Assessment)
+def assessment_changed(sender, instance, using, created, raw=False, **kwargs):
+    # Weight, total marks, term or subject changes move every score
+    # of the assessment, including the triples it is leaving.
+    previous = getattr(instance, '_summary_previous', None)
+    if raw or created or previous is None:
+        return
+    current = {
+        'term_id': instance.term_id,
+        'subject_id': instance.subject_id,
+        'weight': instance.weight,
+        'total_marks': instance.total_marks,
+    }
+    if previous == current:
+        return
+    triples = _assessment_triples(
+        instance, previous['term_id'], previous['subject_id'], using
+    )
+    triples += [(student_id, instance.term_id, instance.subject_id)
+                for student_id, _, _ in triples]
+    grades.mark_triples_dirty(triples, using=using)
+
+
+@receiver(pre_delete, sender=Assessment)
+def assessment_deleting(sender, instance, using, **kwargs):
+    # The scores go with the assessment, so their triples must be resolved
+    # while the assessment row still exists.
+    grades.mark_triples_dirty(
+        _assessment_triples(instance, instance.term_id, instance.subject_id, using),
+        using=using,
+    )
+
+
+@receiver(attendance_changed, sender=AttendanceRecord)
+def attendance_written(sender, changes, using, **kwargs):
+    attendance.apply_attendance_changes(changes, using=using)
+    attendance_store.apply_store_changes(changes, using=using)
+    timeseries.apply_rollup_changes(changes, using=using)
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def attendance_deleted(sender, instance, using, **kwargs):
+    changes = [((instance.session_id, instance.student_id, instance.status), None)]
+    attendance.apply_attendance_changes(changes, using=using)
+    attendance_store.apply_store_changes(changes, using=using)
+    timeseries.apply_rollup_changes(changes, using=using)
+
+
+@receiver(pre_save, sender=Student)
+def student_changing(sender, instance, using, raw=False, **kwargs):
+    instance._rollup_cohort = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_cohort = Student.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('cohort_id', flat=True).first()
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, using, created, raw=False, **kwargs):
+    # The daily rollup counts marks under the student's current class.
+    previous = getattr(instance, '_rollup_cohort', None)
+    if raw or created or previous == instance.cohort_id:
+        return
+    timeseries.move_student_rollups(instance.pk, previous, instance.cohort_id, using=using)
+
+
+@receiver(pre_save, sender=Session)
+def session_changing(sender, instance, using, raw=False, **kwargs):
+    instance._summary_previous = instance._rollup_previous = None
+    instance._register_previous = None
+    if raw or instance.pk is None:
+        return
+    previous = Session.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('term_id', 'subject_id', 'session_date', 'cohort_id', 'start_time').first()
+    if previous is not None:
+        instance._summary_previous = previous[:2]
+        instance._rollup_previous = previous[1:3]
+        instance._register_previous = (previous[0], previous[3], previous[2], previous[4])
+
+
+@receiver(post_save, sender=Session)
+def session_changed(sender, instance, using, created, raw=False, **kwargs):
+    # Moving a marked session to another term or subject shifts counters
+    # between summary rows; leave that to the scheduler.
+    previous = getattr(instance, '_summary_previous', None)
+    if raw or created or previous is None:
+        return
+    _session_moved(instance, using)
+    _session_rescheduled(instance, using)
+    if previous == (instance.term_id, instance.subject_id):
+        return
+    student_ids = AttendanceRecord.objects.using(using).filter(
+        session=instance
+    ).values_list('student_id', flat=True)
+    terms = {previous[0], instance.term_id}
+    scheduler.mark_stale(
+        SummaryKind.ATTENDANCE,
+        [(student_id, term_id) for student_id in student_ids for term_id in terms],
+        using=using,
+    )
+
+
+def _session_moved(instance, using):
+    # The daily rollup is keyed by date and subject: recount both days.
+    previous = instance._rollup_previous
+    if previous == (instance.subject_id, instance.session_date):
+        return
+    if not AttendanceRecord.objects.using(using).filter(session=instance).exists():
+        return
+    for day in {previous[1], instance.session_date}:
+        timeseries.rebuild_daily_rollup(start=day, end=day, using=using)
+
+
+def _session_rescheduled(instance, using):
+    # A register's columns are the sessions of its class and term in date
+    # and start-time order, holding the marks of its students. Rebuild the
+    # built registers the session leaves and joins; the others are built
+    # from the records on their first mark.
+    previous = instance._register_previous
+    current = (instance.term_id, instance.cohort_id, instance.session_date, instance.start_time)
+    if previous == current:
+        return
+    cohort_ids = {previous[1], instance.cohort_id} | set(
+        AttendanceRecord.objects.using(using).filter(session=instance)
+        .values_list('student__cohort_id', flat=True).distinct()
+    )
+    registers = AttendanceRegister.objects.using(using).filter(
+        term_id__in={previous[0], instance.term_id}, cohort_id__in=cohort_ids - {None}
+    ).values_list('term_id', 'cohort_id')
+    for term_id, cohort_id in list(registers):
+        attendance_store.rebuild_registers(term_id, cohort_id, using=using)
@@ -1,3 +1,653 @@
-from django.test import TestCase
+import io
+import tempfile
+import zipfile
+from collections import Counter
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.academic.models import Cohort, CohortSubject, Subject, Term
+from apps.academic.query_counts import SIZES, QueryCountTestCase
+from apps.academic.synthetic import SchoolGenerator
+from apps.assessments.models import Assessment, AssessmentScore, AssessmentType, EvaluationType
+from apps.cbc.models import EvidenceRecord
+from apps.learners.models import Student, StudentStatus
+from apps.sessions.models import AttendanceRecord, AttendanceStatus, Session, SessionType
+
+from . import attendance, grades
+from .absenteeism import CALENDAR_DAYS, SCHOOL_DAYS, RollingWindow, Rule, detect_absenteeism
+from .attendance import COUNTER_FIELDS as ATTENDANCE_COUNTERS, replace_attendance_summaries
+from .attendance_store import STATUS_CODES, load_register, rebuild_registers
+from .models import (
+    AbsenteeismFlag, AttendanceSummary, DailyAttendanceRollup, GradeSummary, RecomputePriority, StaleSummary,
+    SubjectDistribution, SummaryKind, TermRanking,
+)
+from .ranking import COMPETITION, DENSE, FRACTIONAL, rank_cohort, rank_columns
+from .rebuild import rebuild_shard
+from .report_cards import collect_report_cards
+from .scheduler import mark_stale, process_batch, term_priorities
+from .timeseries import rebuild_daily_rollup
+
+
+def attendance_series(source, by_cohort=False):
+    def request(school):
+        term = Term.objects.get(pk=school.term_id)
+        params = {'start': term.start_date, 'end': term.end_date, 'bucket': 'week',
+                  'source': source}
+        if by_cohort:
+            params['cohort'] = school.cohort.pk
+        return school.client.get(reverse('reporting:attendance-series'), params)
+    return request
+
+
+def report_cards(school):
+    collect_report_cards(school.cohort.pk, school.term_id)
+
+
+class GeneratedSchoolTestCase(TestCase):
+    """A generated school with every reporting table rebuilt"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.generator = SchoolGenerator(SIZES['large'])
+        cls.generator.generate()
+        for term_id in cls.generator.term_ids:
+            rebuild_shard(term_id)
+        cls.term_id = cls.generator.term_ids[0]
+        cls.cohort = Cohort.objects.filter(
+            academic_year__terms=cls.term_id
+        ).order_by('pk').first()
+        cls.subject_ids = list(CohortSubject.objects.filter(cohort=cls.cohort).order_by(
+            'subject_id'
+        ).values_list('subject_id', flat=True))
+        cls.student_ids = list(cls.cohort.students.order_by('pk').values_list('pk', flat=True))
+
+
+def attendance_summaries(term_id):
+    return sorted(
+        (row[0], row[1] or 0, *row[2:-1], None if row[-1] is None else round(row[-1], 9))
+        for row in AttendanceSummary.objects.filter(term_id=term_id).values_list(
+            'student_id', 'subject_id', *ATTENDANCE_COUNTERS, 'attendance_percentage'
+        )
+    )
+
+
+class AttendanceSummaryTests(GeneratedSchoolTestCase):
+    """Incremental AttendanceSummary maintenance agrees with a full recount"""
+
+    def new_session(self, subject_id):
+        return Session.objects.create(
+            term_id=self.term_id, subject_id=subject_id, cohort=self.cohort,
+            session_type=SessionType.LESSON, session_date=date(2024, 2, 1),
+        )
+
+    def test_mixed_writes_match_recount(self):
+        first, second, third, *rest = self.student_ids
+        session = self.new_session(self.subject_ids[0])
+        record = AttendanceRecord.objects.create(session=session, student_id=first,
+                                                 status=AttendanceStatus.ABSENT)
+        record.status = AttendanceStatus.LATE
+        record.save()
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(session=session, student_id=pk, status=AttendanceStatus.PRESENT)
+            for pk in (second, third, *rest)
+        ])
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(session=session, student_id=pk, status=AttendanceStatus.SICK)
+            for pk in (second, third)
+        ], update_conflicts=True, unique_fields=['session', 'student'],
+            update_fields=['status'])
+        AttendanceRecord.objects.filter(session=session, student_id__in=rest).update(
+            status=AttendanceStatus.EXCUSED
+        )
+        AttendanceRecord.objects.filter(session=session, student_id=third).delete()
+        existing = AttendanceRecord.objects.filter(session__term_id=self.term_id).exclude(
+            session=session
+        ).first()
+        existing.delete()
+
+        # A student without summary rows yet is seeded from the records.
+        newcomer = Student.objects.create(
+            admission_number='NEW-1', first_name='New', last_name='Student', cohort=self.cohort,
+        )
+        AttendanceRecord.objects.create(session=session, student=newcomer,
+                                        status=AttendanceStatus.PRESENT)
+        self.assertTrue(AttendanceSummary.objects.filter(
+            student=newcomer, term_id=self.term_id, subject__isnull=True
+        ).exists())
+
+        incremental = attendance_summaries(self.term_id)
+        replace_attendance_summaries(self.term_id)
+        self.assertEqual(incremental, attendance_summaries(self.term_id))
+
+    def test_concurrent_first_marks(self):
+        newcomer = Student.objects.create(
+            admission_number='NEW-1', first_name='New', last_name='Student', cohort=self.cohort,
+        )
+        ours, theirs = (self.new_session(pk) for pk in self.subject_ids[:2])
+        upsert = attendance.bulk_upsert
+
+        def concurrent_upsert(model, objs, **kwargs):
+            # Another register commits the newcomer's first rows between our
+            # locking read and the seed.
+            if any(obj.subject_id is None for obj in objs):
+                with attendance.suspended():
+                    AttendanceRecord.objects.create(session=theirs, student=newcomer,
+                                                    status=AttendanceStatus.ABSENT)
+                AttendanceSummary.objects.bulk_create([
+                    AttendanceSummary(student=newcomer, term_id=self.term_id, subject_id=subject_id,
+                                      total_sessions=1, absent_count=1, attendance_percentage=0)
+                    for subject_id in (None, theirs.subject_id)
+                ])
+            return upsert(model, objs, **kwargs)
+
+        with mock.patch.object(attendance, 'bulk_upsert', side_effect=concurrent_upsert):
+            AttendanceRecord.objects.create(session=ours, student=newcomer,
+                                            status=AttendanceStatus.PRESENT)
+        total = AttendanceSummary.objects.get(student=newcomer, term_id=self.term_id,
+                                              subject__isnull=True)
+        self.assertEqual((total.total_sessions, total.present_count, total.absent_count,
+                          total.attendance_percentage), (2, 1, 1, 50))
+
+        incremental = attendance_summaries(self.term_id)
+        replace_attendance_summaries(self.term_id)
+        self.assertEqual(incremental, attendance_summaries(self.term_id))
+
+    def test_percentage_assigned_before_counters(self):
+        # MySQL evaluates SET left to right; the percentage must read the
+        # counters from before the update.
+        record = AttendanceRecord.objects.filter(session__term_id=self.term_id).first()
+        with CaptureQueriesContext(connection) as queries:
+            record.status = (AttendanceStatus.ABSENT if record.status == AttendanceStatus.PRESENT
+                             else AttendanceStatus.PRESENT)
+            record.save()
+        table = AttendanceSummary._meta.db_table
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith(f'UPDATE "{table}"')]
+        self.assertTrue(updates)
+        for sql in updates:
+            counters = [sql.index(f'"{field}" =') for field in ATTENDANCE_COUNTERS
+                        if f'"{field}" =' in sql]
+            self.assertTrue(counters)
+            self.assertLess(sql.index('"attendance_percentage" ='), min(counters))
+
+
+def grade_summaries(term_id):
+    return sorted(
+        (*row[:3], *(None if value is None else round(value, 9) for value in row[3:5]),
+         *row[5:])
+        for row in GradeSummary.objects.filter(term_id=term_id).values_list(
+            'student_id', 'subject_id', 'total_assessments', 'average_score',
+            'weighted_average', 'final_grade', 'grade_points', 'is_stale',
+        )
+    )
+
+
+def daily_rollups():
+    return sorted(DailyAttendanceRollup.objects.exclude(total_sessions=0).values_list(
+        'session_date', 'cohort_id', 'subject_id', 'total_sessions', 'present_count',
+        'absent_count', 'late_count', 'excused_count', 'sick_count',
+    ))
+
+
+class DailyRollupTests(GeneratedSchoolTestCase):
+    """Incremental DailyAttendanceRollup maintenance agrees with a rebuild"""
+
+    def test_class_change_then_edits(self):
+        rebuild_daily_rollup()
+        student = Student.objects.get(pk=self.student_ids[0])
+        other = Cohort.objects.exclude(pk=self.cohort.pk).filter(
+            academic_year_id=self.cohort.academic_year_id
+        ).order_by('pk').first()
+        student.cohort = other
+        student.save()
+
+        records = AttendanceRecord.objects.filter(student=student).order_by('pk')
+        self.assertGreater(records.count(), 2)
+        edited, deleted = records[:2]
+        edited.status = (AttendanceStatus.ABSENT if edited.status == AttendanceStatus.PRESENT
+                         else AttendanceStatus.PRESENT)
+        edited.save()
+        deleted.delete()
+        student.cohort = self.cohort
+        student.save()
+        records.first().delete()
+
+        incremental = daily_rollups()
+        rebuild_daily_rollup()
+        self.assertEqual(incremental, daily_rollups())
+        self.assertFalse(DailyAttendanceRollup.objects.filter(total_sessions__lt=0).exists())
+
+
+class GradeSummaryTests(GeneratedSchoolTestCase):
+    """Incremental GradeSummary maintenance agrees with a full rebuild"""
+
+    def scores(self, subject_id):
+        assessments = list(Assessment.objects.filter(
+            term_id=self.term_id, subject_id=subject_id, rubric_scale__isnull=True,
+        ).order_by('pk').values_list('pk', flat=True))
+        return assessments, AssessmentScore.objects.filter(
+            assessment_id__in=assessments, student__cohort=self.cohort,
+        ).order_by('pk')
+
+    def write_scores(self):
+        first, second, third = self.subject_ids[:3]
+        assessments, scores = self.scores(first)
+        with self.captureOnCommitCallbacks(execute=True):
+            score = scores.first()
+            score.score = 1
+            score.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            AssessmentScore.objects.bulk_create(
+                [AssessmentScore(assessment_id=assessments[-1], student_id=student_id,
+                                 score=n % 7) for n, student_id in enumerate(self.student_ids)],
+                update_conflicts=True, unique_fields=['assessment', 'student'],
+                update_fields=['score'],
+            )
+
+        assessments, scores = self.scores(second)
+        with self.captureOnCommitCallbacks(execute=True):
+            scores.filter(assessment_id=assessments[0]).update(score=F('score') / 2)
+            scores.filter(student_id=self.student_ids[0]).update(score=None)
+        # Every graded score of one student in the third subject goes.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scores(third)[1].filter(student_id=self.student_ids[1]).delete()
+            self.scores(third)[1].filter(student_id=self.student_ids[2]).first().delete()
+
+    def test_score_writes_match_rebuild(self):
+        self.write_scores()
+        incremental = grade_summaries(self.term_id)
+        self.assertFalse(GradeSummary.objects.filter(
+            term_id=self.term_id, subject_id=self.subject_ids[2],
+            student_id=self.student_ids[1],
+        ).exists())
+        rebuild_shard(self.term_id)
+        self.assertEqual(incremental, grade_summaries(self.term_id))
+
+    @override_settings(REPORTING_SYNC_RECOMPUTE_LIMIT=0)
+    def test_queued_writes_match_rebuild(self):
+        self.write_scores()
+        self.assertTrue(GradeSummary.objects.filter(term_id=self.term_id, is_stale=True).exists())
+        while process_batch():
+            pass
+        incremental = grade_summaries(self.term_id)
+        rebuild_shard(self.term_id)
+        self.assertEqual(incremental, grade_summaries(self.term_id))
+
+
+class DistributionTests(GeneratedSchoolTestCase):
+    """Stored distributions of a new subject with hand-picked scores"""
+
+    scores = [35, 50, 62, 80, 95]       # out of 100
+
+    def setUp(self):
+        self.subject = Subject.objects.create(curriculum=self.cohort.curriculum, code='FIX',
+                                              name='Fixture')
+        CohortSubject.objects.create(cohort=self.cohort, subject=self.subject)
+        self.assessment = Assessment.objects.create(
+            term_id=self.term_id, subject=self.subject, name='CAT 1',
+            assessment_type=AssessmentType.CAT, evaluation_type=EvaluationType.NUMERIC,
+            total_marks=100,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for student_id, score in zip(self.student_ids, self.scores):
+                AssessmentScore.objects.create(assessment=self.assessment,
+                                               student_id=student_id, score=score)
+
+    def distribution(self):
+        return SubjectDistribution.objects.get(cohort=self.cohort, subject=self.subject,
+                                               term_id=self.term_id)
+
+    @override_settings(REPORTING_DISTRIBUTION_PASS_MARK=50)
+    def test_fixed_scores(self):
+        distribution = self.distribution()
+        self.assertEqual(
+            (distribution.student_count, distribution.mean, distribution.median),
+            (5, 64.4, 62),
+        )
+        # Ranks 0.4, 1, 3 and 3.6 of the sorted scores
+        self.assertEqual(distribution.percentiles, {'10': 41, '25': 50, '75': 80, '90': 89})
+        self.assertEqual(distribution.pass_rate, 80)
+        self.assertEqual(distribution.histogram, [0, 0, 0, 1, 0, 1, 1, 0, 1, 1])
+
+    @override_settings(REPORTING_DISTRIBUTION_PASS_MARK=50)
+    def test_score_edit(self):
+        score = AssessmentScore.objects.get(assessment=self.assessment, score=95)
+        with self.captureOnCommitCallbacks(execute=True):
+            score.score = 20
+            score.save()
+        distribution = self.distribution()
+        # 20, 35, 50, 62, 80
+        self.assertEqual((distribution.student_count, distribution.median), (5, 50))
+        self.assertAlmostEqual(distribution.mean, 49.4)
+        self.assertEqual(distribution.percentiles, {'10': 26, '25': 35, '75': 62, '90': 72.8})
+        self.assertEqual(distribution.pass_rate, 60)
+        self.assertEqual(distribution.histogram, [0, 0, 1, 1, 0, 1, 1, 0, 1, 0])
+
+
+class SchedulerTests(GeneratedSchoolTestCase):
+
+    def triple(self):
+        return GradeSummary.objects.filter(term_id=self.term_id).order_by('pk').values_list(
+            'student_id', 'term_id', 'subject_id'
+        ).first()
+
+    def test_priority_follows_term(self):
+        term = Term.objects.get(pk=self.term_id)
+        self.assertEqual(
+            [term_priorities([term.pk], today=day)[term.pk]
+             for day in (term.start_date - timedelta(days=1), term.start_date, term.end_date,
+                         term.end_date + timedelta(days=1))],
+            [RecomputePriority.NORMAL, RecomputePriority.HIGH, RecomputePriority.HIGH,
+             RecomputePriority.LOW],
+        )
+        mark_stale(SummaryKind.GRADE, [self.triple()])
+        self.assertEqual(StaleSummary.objects.get().priority,
+                         term_priorities([term.pk])[term.pk])
+        mark_stale(SummaryKind.GRADE, [self.triple()], priority=RecomputePriority.HIGH)
+        self.assertEqual(StaleSummary.objects.get().priority, RecomputePriority.HIGH)
+
+    def test_entries_marked_during_a_claim_stay_stale(self):
+        triple = self.triple()
+        summary = GradeSummary.objects.filter(
+            student_id=triple[0], term_id=triple[1], subject_id=triple[2]
+        )
+        mark_stale(SummaryKind.GRADE, [triple])
+        refresh = grades.refresh_grade_summaries
+
+        def mark_and_refresh(triples, using):
+            # A writer marks the key again before the worker writes it back.
+            mark_stale(SummaryKind.GRADE, triples, using=using)
+            return refresh(triples, using=using)
+
+        with mock.patch.object(grades, 'refresh_grade_summaries', mark_and_refresh):
+            self.assertEqual(process_batch(), 1)
+        self.assertEqual(StaleSummary.objects.count(), 1)
+        self.assertTrue(summary.get().is_stale)
+
+        self.assertEqual(process_batch(), 1)
+        self.assertFalse(StaleSummary.objects.exists())
+        self.assertFalse(summary.get().is_stale)
+
+
+class RankColumnsTests(SimpleTestCase):
+
+    scores = [70, 90, np.nan, 80, 80]
+
+    def assertRanks(self, tie_rule, expected):
+        np.testing.assert_array_equal(rank_columns(self.scores, tie_rule), expected)
+
+    def test_dense(self):
+        self.assertRanks(DENSE, [3, 1, np.nan, 2, 2])
+
+    def test_competition(self):
+        self.assertRanks(COMPETITION, [4, 1, np.nan, 2, 2])
+
+    def test_fractional(self):
+        self.assertRanks(FRACTIONAL, [4, 1, np.nan, 2.5, 2.5])
+
+    def test_columns_are_ranked_independently(self):
+        matrix = np.array([[50, 60], [50, 40], [40, 60], [60, 60]], dtype=float)
+        np.testing.assert_array_equal(rank_columns(matrix, FRACTIONAL),
+                                      [[2.5, 2], [2.5, 4], [4, 2], [1, 2]])
+
+    def test_unknown_rule(self):
+        with self.assertRaises(ValueError):
+            rank_columns(self.scores, 'olympic')
+
+
+ABSENT, PRESENT = Counter([AttendanceStatus.ABSENT]), Counter([AttendanceStatus.PRESENT])
+
+
+class RollingWindowTests(SimpleTestCase):
+    """Episodes of hand-built day sequences, one session a day"""
+
+    def window(self, unit, window):
+        return RollingWindow(Rule('test', window, unit, threshold=0.5, min_sessions=2), 1, None)
+
+    def push(self, window, days):
+        """Push ``{day of month: counts}``; returns the episodes ended, by day"""
+        return {day: flag for day, counts in days.items()
+                if (flag := window.push(date(2024, 5, day), counts)) is not None}
+
+    def test_school_days(self):
+        window = self.window(SCHOOL_DAYS, 3)
+        ended = self.push(window, {1: ABSENT, 2: ABSENT, 3: PRESENT, 6: PRESENT})
+        self.assertEqual(list(ended), [6])
+        flag = ended[6]
+        self.assertEqual((flag.started_on, flag.last_seen_on, flag.ended_on),
+                         (date(2024, 5, 2), date(2024, 5, 3), date(2024, 5, 6)))
+        self.assertFalse(flag.is_active)
+        self.assertEqual((flag.peak_rate, flag.window_sessions, flag.window_hits), (1, 2, 2))
+        # The 1st left the window on the 6th, the 2nd on the 7th
+        self.assertEqual([day.day for day, _, _ in window.days], [2, 3, 6])
+
+        self.assertEqual(self.push(window, {7: ABSENT, 8: ABSENT}), {})
+        self.assertEqual([day.day for day, _, _ in window.days], [6, 7, 8])
+        flag = window.finish()
+        self.assertEqual((flag.started_on, flag.last_seen_on, flag.ended_on, flag.is_active),
+                         (date(2024, 5, 8), date(2024, 5, 8), None, True))
+        self.assertEqual((flag.window_sessions, flag.window_hits), (3, 2))
+        self.assertIsNone(window.finish())
+
+    def test_calendar_days(self):
+        window = self.window(CALENDAR_DAYS, 7)
+        self.assertEqual(self.push(window, {1: ABSENT, 2: ABSENT, 3: PRESENT}), {})
+        self.assertEqual((window.sessions, window.hits), (3, 2))
+        # A week later the 1st and 2nd have left the window, however few
+        # school days came in between
+        ended = self.push(window, {9: PRESENT})
+        self.assertEqual([day.day for day, _, _ in window.days], [3, 9])
+        self.assertEqual((window.sessions, window.hits), (2, 0))
+        flag = ended[9]
+        self.assertEqual((flag.started_on, flag.last_seen_on, flag.ended_on),
+                         (date(2024, 5, 2), date(2024, 5, 3), date(2024, 5, 9)))
+
+        self.assertEqual(self.push(window, {10: ABSENT}), {})
+        self.assertEqual(window.finish().started_on, date(2024, 5, 10))
+
+    def test_min_sessions(self):
+        window = self.window(CALENDAR_DAYS, 7)
+        self.assertEqual(self.push(window, {1: ABSENT}), {})
+        self.assertIsNone(window.finish())
+
+
+class DetectAbsenteeismTests(GeneratedSchoolTestCase):
+
+    rules = (Rule('absent', 5, SCHOOL_DAYS, threshold=0.1),
+             Rule('late', 14, CALENDAR_DAYS, (AttendanceStatus.LATE,), 0.1))
+
+    def flags(self):
+        return sorted(AbsenteeismFlag.objects.values_list(
+            'student_id', 'rule', 'started_on', 'last_seen_on', 'ended_on', 'is_active',
+            'window_sessions', 'window_hits', 'peak_rate',
+        ))
+
+    def test_student_chunks_agree(self):
+        since = Term.objects.get(pk=self.term_id).start_date
+        result = detect_absenteeism(since, self.rules, chunk_size=7)
+        self.assertEqual(result.records, AttendanceRecord.objects.filter(
+            session__session_date__gte=since
+        ).count())
+        self.assertEqual(result.flags, AbsenteeismFlag.objects.count())
+        self.assertGreater(result.flags, 0)
+        chunked = self.flags()
+
+        result = detect_absenteeism(since, self.rules, chunk_size=10000)
+        self.assertEqual(result.removed, 0)
+        self.assertEqual(self.flags(), chunked)
+
+
+def positions(term_id):
+    return (
+        sorted(TermRanking.objects.filter(term_id=term_id).values_list(
+            'student_id', 'subjects_counted', 'mean_score', 'overall_position', 'out_of',
+            'tie_rule',
+        )),
+        sorted(GradeSummary.objects.filter(term_id=term_id).values_list(
+            'student_id', 'subject_id', 'subject_position', 'subject_position_out_of',
+        )),
+    )
+
+
+class RankingTests(GeneratedSchoolTestCase):
+
+    def test_recompute_queues_rerank_with_stored_tie_rule(self):
+        rank_cohort(self.cohort.pk, self.term_id, tie_rule=DENSE)
+        ranked = positions(self.term_id)
+        scores = AssessmentScore.objects.filter(
+            assessment__term_id=self.term_id, assessment__subject_id=self.subject_ids[0],
+            assessment__rubric_scale__isnull=True, student_id=self.student_ids[-1],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            scores.update(score=0)
+        self.assertEqual(positions(self.term_id), ranked)
+        self.assertEqual(
+            list(StaleSummary.objects.values_list('kind', 'student_id', 'term_id', 'subject_id')),
+            [(SummaryKind.RANKING, 0, self.term_id, self.cohort.pk)],
+        )
+
+        self.assertEqual(process_batch(), 1)
+        reranked = positions(self.term_id)
+        self.assertNotEqual(reranked, ranked)
+        self.assertEqual({row[-1] for row in reranked[0]}, {DENSE})
+
+        rank_cohort(self.cohort.pk, self.term_id, tie_rule=DENSE)
+        self.assertEqual(reranked, positions(self.term_id))
+
+
+class AttendanceStoreTests(GeneratedSchoolTestCase):
+    """Packed registers follow attendance writes and rescheduled sessions"""
+
+    def register(self, term_id=None):
+        matrix = load_register(self.cohort.pk, term_id or self.term_id)
+        cells = {
+            (int(student_id), int(session_id)): int(code)
+            for student_id, row in zip(matrix.student_ids, matrix.codes)
+            for session_id, code in zip(matrix.session_ids, row) if code
+        }
+        return list(matrix.session_ids), cells
+
+    def rebuilt(self, term_id=None):
+        rebuild_registers(term_id or self.term_id, self.cohort.pk)
+        return self.register(term_id)
+
+    def marked_session(self):
+        return Session.objects.filter(
+            term_id=self.term_id, cohort=self.cohort, attendance_records__isnull=False
+        ).order_by('session_date', 'pk').first()
+
+    def test_new_sessions_are_appended(self):
+        columns, cells = self.register()
+        session = Session.objects.create(
+            term_id=self.term_id, subject_id=self.subject_ids[0], cohort=self.cohort,
+            session_type=SessionType.LESSON,
+            session_date=Term.objects.get(pk=self.term_id).start_date,
+        )
+        AttendanceRecord.objects.create(session=session, student_id=self.student_ids[0],
+                                        status=AttendanceStatus.ABSENT)
+
+        after, after_cells = self.register()
+        self.assertEqual(after, columns + [session.pk])
+        self.assertEqual(after_cells, {
+            **cells, (self.student_ids[0], session.pk): STATUS_CODES[AttendanceStatus.ABSENT]
+        })
+        rebuilt, rebuilt_cells = self.rebuilt()
+        self.assertEqual(rebuilt[0], session.pk)
+        self.assertEqual(rebuilt_cells, after_cells)
+
+    def test_rescheduled_session_moves_column(self):
+        session = self.marked_session()
+        columns, cells = self.register()
+        session.session_date = Term.objects.get(pk=self.term_id).end_date
+        session.save()
+        after, after_cells = self.register()
+        self.assertNotEqual(after.index(session.pk), columns.index(session.pk))
+        self.assertEqual(after_cells, cells)
+        self.assertEqual((after, after_cells), self.rebuilt())
+
+    def test_session_moved_to_another_term(self):
+        session = self.marked_session()
+        other = self.generator.term_ids[1]
+        before = self.register(other)
+        session.term_id = other
+        session.save()
+        self.assertNotIn(session.pk, self.register()[0])
+        self.assertIn(session.pk, self.register(other)[0])
+        self.assertNotEqual(self.register(other), before)
+        self.assertEqual(self.register(other), self.rebuilt(other))
+
+
+class AdminQueryCountTests(QueryCountTestCase):
+
+    def test_changelists(self):
+        self.assertConstantChangelists('reporting')
+
+
+class EndpointQueryCountTests(QueryCountTestCase):
+
+    def test_summary_queue(self):
+        url = reverse('reporting:summary-queue')
+        self.assertConstantQueries({
+            'summary-queue': lambda school: school.client.get(url),
+        })
+
+    def test_attendance_series(self):
+        self.assertConstantQueries({
+            'attendance-series-records': attendance_series('records', by_cohort=True),
+            'attendance-series-rollup': attendance_series('rollup', by_cohort=True),
+            'attendance-series-school': attendance_series('rollup'),
+        })
+
+    def test_report_cards(self):
+        self.assertConstantQueries({'collect-report-cards': report_cards})
+
+
+class ReportCardTests(GeneratedSchoolTestCase):
+
+    def test_render(self):
+        term = Term.objects.get(pk=self.term_id)
+        record = EvidenceRecord.objects.filter(
+            observed_at__range=(term.start_date, term.end_date),
+            student__status=StudentStatus.ACTIVE,
+        ).select_related('student', 'learning_outcome').order_by('pk').first()
+        student = record.student
+        summary = GradeSummary.objects.filter(
+            term_id=term.pk, student=student
+        ).select_related('subject').order_by('subject__name').first()
+        attendance = AttendanceSummary.objects.get(term_id=term.pk, student=student,
+                                                   subject__isnull=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = f'{directory}/cards.zip'
+            call_command('generate_report_cards', cohort=student.cohort_id, term=term.pk,
+                         output=output, stdout=io.StringIO())
+            with zipfile.ZipFile(output) as archive:
+                self.assertEqual(len(archive.namelist()), Student.objects.filter(
+                    cohort_id=student.cohort_id, status=StudentStatus.ACTIVE
+                ).count())
+                name = f"{student.admission_number}.html".replace('/', '-')
+                html = archive.read(name).decode()
+
+        self.assertIn(student.get_full_name(), html)
+        self.assertIn(f'<td>{summary.subject.name}</td>', html)
+        self.assertIn(f'<td>{summary.final_grade}</td>', html)
+        self.assertIn(f'{attendance.attendance_percentage:.1f}%', html)
+        self.assertIn(f'<td class="num">{attendance.total_sessions}</td>', html)
+        self.assertIn(f'<td>{record.learning_outcome.code}</td>', html)
+
+    def test_query_count(self):
+        collect_report_cards(self.cohort.pk, self.term_id)
+        # Rubric scales are cached by now
+        with self.assertNumQueries(8):
+            contexts = collect_report_cards(self.cohort.pk, self.term_id)
+        self.assertEqual(len(contexts), self.cohort.students.filter(
+            status=StudentStatus.ACTIVE
+        ).count())
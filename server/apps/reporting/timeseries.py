@@ -0,0 +1,256 @@
+# ============================================================================
+# apps/reporting/timeseries.py
+# Attendance rates bucketed by day, week or month
+# ============================================================================
+#
+# Series are grouped in the database: marks are truncated to their period
+# with Trunc over the session date and counted per period, so a trend of
+# a whole school is one GROUP BY and a few dozen rows on the wire. Long
+# ranges without a student are read from DailyAttendanceRollup, which holds
+# one row per (day, class, subject) and is kept in step with attendance
+# changes like the attendance summaries. A student changing class takes
+# their marks along to the new class's rows, as the records source would.
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert, chunked
+from apps.learners.models import Student
+from apps.sessions.models import AttendanceRecord, Session
+
+from .attendance import (
+    ATTENDED_COUNTERS, COUNTER_FIELDS, STATUS_COUNTERS, attendance_percentage, is_suspended,
+)
+from .models import DailyAttendanceRollup
+
+
+DAY, WEEK, MONTH = 'day', 'week', 'month'
+BUCKETS = (DAY, WEEK, MONTH)
+
+RECORDS, ROLLUP = 'records', 'rollup'
+SOURCES = (RECORDS, ROLLUP)
+
+
+def rollup_min_days():
+    """Ranges at least this many days long are read from the daily rollup"""
+    return getattr(settings, 'REPORTING_ROLLUP_MIN_DAYS', 92)
+
+
+def _status_counts():
+    counts = {field: Count('id', filter=Q(status=status))
+              for status, field in STATUS_COUNTERS.items()}
+    return {'total_sessions': Count('id'), **counts}
+
+
+# -- rollup maintenance ----------------------------------------------------
+
+def summarize_daily(records):
+    """GROUP BY (date, class, subject) counts over an AttendanceRecord queryset"""
+    return records.values(
+        'session__session_date', 'student__cohort_id', 'session__subject_id'
+    ).annotate(**_status_counts()).order_by()
+
+
+def rollup_from_row(row):
+    """Build an unsaved DailyAttendanceRollup from a ``summarize_daily()`` row"""
+    return DailyAttendanceRollup(
+        session_date=row['session__session_date'],
+        cohort_id=row['student__cohort_id'] or 0,
+        subject_id=row['session__subject_id'],
+        **{field: row[field] for field in COUNTER_FIELDS},
+    )
+
+
+def rebuild_daily_rollup(start=None, end=None, chunk_size=5000, using=DEFAULT_DB_ALIAS):
+    """
+    Recount the rollup rows of a date range, by default every date, from
+    the attendance records. Returns (rollup rows written, records counted).
+    """
+    rollups = DailyAttendanceRollup.objects.using(using)
+    records = AttendanceRecord.objects.using(using)
+    if start is not None:
+        rollups = rollups.filter(session_date__gte=start)
+        records = records.filter(session__session_date__gte=start)
+    if end is not None:
+        rollups = rollups.filter(session_date__lte=end)
+        records = records.filter(session__session_date__lte=end)
+
+    written = source = 0
+    with transaction.atomic(using=using):
+        rollups.delete()
+        for chunk in chunked(summarize_daily(records).iterator(chunk_size=chunk_size),
+                             chunk_size):
+            created = [rollup_from_row(row) for row in chunk]
+            DailyAttendanceRollup.objects.using(using).bulk_create(created, batch_size=chunk_size)
+            written += len(created)
+            source += sum(rollup.total_sessions for rollup in created)
+    return written, source
+
+
+def apply_rollup_changes(changes, using=DEFAULT_DB_ALIAS):
+    """
+    Apply (before, after) attendance changes to the daily rollup, each side
+    a (session_id, student_id, status) tuple or None. Rows that do not exist
+    yet are counted from the records.
+    """
+    if is_suspended():
+        return
+    session_ids = {side[0] for change in changes for side in change if side}
+    student_ids = {side[1] for change in changes for side in change if side}
+    sessions, cohorts = {}, {}
+    for ids in chunked(session_ids, 1000):
+        sessions.update(
+            (pk, (session_date, subject_id))
+            for pk, session_date, subject_id in Session.objects.using(using)
+            .filter(pk__in=ids).values_list('pk', 'session_date', 'subject_id')
+        )
+    for ids in chunked(student_ids, 1000):
+        cohorts.update(
+            Student.objects.using(using).filter(pk__in=ids).values_list('pk', 'cohort_id')
+        )
+
+    deltas = defaultdict(Counter)
+    for change in changes:
+        for side, sign in zip(change, (-1, 1)):
+            if side is None or side[0] not in sessions:
+                continue
+            session_id, student_id, status = side
+            session_date, subject_id = sessions[session_id]
+            key = (session_date, cohorts.get(student_id) or 0, subject_id)
+            deltas[key]['total_sessions'] += sign
+            deltas[key][STATUS_COUNTERS[status]] += sign
+    _apply_deltas(deltas, using)
+
+
+def move_student_rollups(student_id, from_cohort_id, to_cohort_id, using=DEFAULT_DB_ALIAS):
+    """Move a student's marks from the rollup rows of one class to another's"""
+    if is_suspended():
+        return
+    deltas = defaultdict(Counter)
+    for session_date, subject_id, status, n in (
+        AttendanceRecord.objects.using(using).filter(student_id=student_id)
+        .values_list('session__session_date', 'session__subject_id', 'status')
+        .annotate(n=Count('id')).order_by()
+    ):
+        for cohort_id, sign in ((from_cohort_id, -1), (to_cohort_id, 1)):
+            key = (session_date, cohort_id or 0, subject_id)
+            deltas[key]['total_sessions'] += sign * n
+            deltas[key][STATUS_COUNTERS[status]] += sign * n
+    _apply_deltas(deltas, using)
+
+
+def _apply_deltas(deltas, using):
+    now = timezone.now()
+    missing = []
+    with transaction.atomic(using=using, savepoint=False):
+        for (session_date, cohort_id, subject_id), delta in deltas.items():
+            values = {field: F(field) + n for field, n in delta.items() if n}
+            if not values:
+                continue
+            updated = DailyAttendanceRollup.objects.using(using).filter(
+                session_date=session_date, cohort_id=cohort_id, subject_id=subject_id,
+            ).update(last_updated=now, **values)
+            if not updated:
+                missing.append((session_date, cohort_id, subject_id))
+        if missing:
+            _seed_rollups(missing, using)
+
+
+def _seed_rollups(keys, using):
+    records = AttendanceRecord.objects.using(using).filter(
+        session__session_date__in={key[0] for key in keys},
+        session__subject_id__in={key[2] for key in keys},
+    )
+    keys = set(keys)
+    rollups = [
+        rollup for rollup in map(rollup_from_row, summarize_daily(records))
+        if (rollup.session_date, rollup.cohort_id, rollup.subject_id) in keys
+    ]
+    bulk_upsert(DailyAttendanceRollup, rollups,
+                unique_fields=['session_date', 'cohort_id', 'subject'],
+                update_fields=[*COUNTER_FIELDS, 'last_updated'], using=using)
+
+
+# -- series ----------------------------------------------------------------
+
+def period_start(bucket, day):
+    """First day of the period containing ``day``; weeks start on Monday"""
+    if bucket == WEEK:
+        return day - timedelta(days=day.weekday())
+    if bucket == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def periods(bucket, start, end):
+    """Start date of every period overlapping ``start``..``end``"""
+    period = period_start(bucket, start)
+    while period <= end:
+        yield period
+        if bucket == MONTH:
+            period = (period + timedelta(days=32)).replace(day=1)
+        else:
+            period += timedelta(days=7 if bucket == WEEK else 1)
+
+
+def choose_source(start, end, student_id=None):
+    """The rollup for long ranges, the records for short ones and for a student"""
+    if student_id is None and (end - start).days + 1 >= rollup_min_days():
+        return ROLLUP
+    return RECORDS
+
+
+def attendance_series(bucket, start, end, cohort_id=None, subject_id=None, student_id=None,
+                      source=None, using=DEFAULT_DB_ALIAS):
+    """
+    Status counts and attended percentage per period between ``start`` and
+    ``end``, every period included, of the whole school or one class,
+    subject or student. Returns (source read, rows).
+    """
+    source = source or choose_source(start, end, student_id)
+    if source == ROLLUP:
+        if student_id is not None:
+            raise ValueError("The daily rollup has no per-student rows")
+        rows = DailyAttendanceRollup.objects.using(using).filter(
+            session_date__range=(start, end)
+        )
+        if cohort_id is not None:
+            rows = rows.filter(cohort_id=cohort_id)
+        if subject_id is not None:
+            rows = rows.filter(subject_id=subject_id)
+        date_field, counts = 'session_date', {field: Sum(field) for field in COUNTER_FIELDS}
+    else:
+        rows = AttendanceRecord.objects.using(using).filter(
+            session__session_date__range=(start, end)
+        )
+        if cohort_id is not None:
+            rows = rows.filter(student__cohort_id=cohort_id)
+        if subject_id is not None:
+            rows = rows.filter(session__subject_id=subject_id)
+        if student_id is not None:
+            rows = rows.filter(student_id=student_id)
+        date_field, counts = 'session__session_date', _status_counts()
+
+    found = {
+        row['period']: row
+        for row in rows.annotate(period=Trunc(date_field, bucket, output_field=DateField()))
+        .values('period').annotate(**counts).order_by('period')
+    }
+    series = []
+    for period in periods(bucket, start, end):
+        row = found.get(period, {})
+        values = {field: row.get(field) or 0 for field in COUNTER_FIELDS}
+        series.append({
+            'period': period,
+            **values,
+            'attendance_percentage': attendance_percentage(
+                values['total_sessions'], sum(values[field] for field in ATTENDED_COUNTERS)
+            ),
+        })
+    return source, series
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'reporting'
+
+urlpatterns = [
+    path('attendance/series/', views.AttendanceSeriesView.as_view(), name='attendance-series'),
+    path('summaries/queue/', views.SummaryQueueStatusView.as_view(), name='summary-queue'),
+]
@@ -1,3 +1,48 @@
-from django.shortcuts import render
+# ============================================================================
+# apps/reporting/views.py
+# Reporting API views
+# ============================================================================
 
-# Create your views here.
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .scheduler import queue_status
+from .serializers import AttendanceSeriesSerializer
+from .timeseries import attendance_series
+
+
+class SummaryQueueStatusView(APIView):
+    """GET: pending summary recomputes and how far behind the scheduler is"""
+
+    def get(self, request):
+        return Response(queue_status())
+
+
+class AttendanceSeriesView(APIView):
+    """
+    GET ?start=YYYY-MM-DD&end=YYYY-MM-DD&bucket=day|week|month
+    [&cohort=<id>][&subject=<id>][&student=<id>][&source=records|rollup]
+
+    Attendance counts and rate per day, week or month for the whole school
+    or one class, subject or student, grouped in the database. Long ranges
+    are read from the daily rollup.
+    """
+
+    def get(self, request):
+        params = AttendanceSeriesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        scope = {name: data[name].pk for name in ('cohort', 'subject', 'student') if name in data}
+        source, series = attendance_series(
+            data['bucket'], data['start'], data['end'],
+            cohort_id=scope.get('cohort'), subject_id=scope.get('subject'),
+            student_id=scope.get('student'), source=data.get('source'),
+        )
+        return Response({
+            'bucket': data['bucket'],
+            'start': data['start'],
+            'end': data['end'],
+            **scope,
+            'source': source,
+            'series': series,
+        })
@@ -1,34 +1,42 @@
-# apps/academic/admin.py
+# apps/sessions/admin.py
 from django.contrib import admin
-from .models import AcademicYear, Term, Curriculum, Subject, Cohort, CohortSubject
+from apps.academic.admin import RelatedListFilter
+from .models import (Session, AttendanceRecord, TimetableSlot, SessionExclusion,
+                     SessionAttendanceCounts)
 
-@admin.register(AcademicYear)
-class AcademicYearAdmin(admin.ModelAdmin):
-    list_display = ['name', 'start_date', 'end_date', 'is_current']
-    list_filter = ['is_current']
+@admin.register(Session)
+class SessionAdmin(admin.ModelAdmin):
+    list_display = ['session_date', 'start_time', 'end_time', 'subject', 'cohort', 'term',
+                    'session_type', 'venue', 'instructor', 'timetable_slot']
+    list_filter = [('term', RelatedListFilter), 'session_type']
+    list_select_related = ['subject', 'cohort', 'term__academic_year', 'instructor',
+                           'timetable_slot__cohort', 'timetable_slot__subject']
+    raw_id_fields = ['timetable_slot', 'instructor']
 
-@admin.register(Term)
-class TermAdmin(admin.ModelAdmin):
-    list_display = ['name', 'academic_year', 'sequence', 'start_date', 'end_date']
-    list_filter = ['academic_year']
+@admin.register(AttendanceRecord)
+class AttendanceRecordAdmin(admin.ModelAdmin):
+    list_display = ['student', 'session', 'status', 'marked_by', 'marked_at']
+    list_filter = ['status']
+    list_select_related = ['student', 'session__subject']
+    raw_id_fields = ['student', 'session']
 
-@admin.register(Curriculum)
-class CurriculumAdmin(admin.ModelAdmin):
-    list_display = ['name', 'curriculum_type', 'is_active']
-    list_filter = ['curriculum_type', 'is_active']
+@admin.register(TimetableSlot)
+class TimetableSlotAdmin(admin.ModelAdmin):
+    list_display = ['cohort', 'subject', 'weekday', 'start_time', 'end_time', 'venue',
+                    'instructor', 'session_type', 'is_active']
+    list_filter = ['cohort', 'weekday', 'is_active']
+    list_select_related = ['cohort', 'subject', 'instructor']
+    raw_id_fields = ['instructor']
 
-@admin.register(Subject)
-class SubjectAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name', 'curriculum']
-    list_filter = ['curriculum']
-    search_fields = ['code', 'name']
+@admin.register(SessionExclusion)
+class SessionExclusionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'start_date', 'end_date', 'cohort']
+    list_filter = ['cohort']
+    list_select_related = ['cohort']
 
-@admin.register(Cohort)
-class CohortAdmin(admin.ModelAdmin):
-    list_display = ['name', 'level', 'curriculum', 'academic_year']
-    list_filter = ['curriculum', 'academic_year']
-
-@admin.register(CohortSubject)
-class CohortSubjectAdmin(admin.ModelAdmin):
-    list_display = ['cohort', 'subject', 'is_compulsory']
-    list_filter = ['cohort', 'is_compulsory']
\ No newline at end of file
+@admin.register(SessionAttendanceCounts)
+class SessionAttendanceCountsAdmin(admin.ModelAdmin):
+    list_display = ['session', 'expected_count', 'marked_count', 'unmarked_count',
+                    'present_count', 'absent_count', 'late_count', 'last_updated']
+    list_select_related = ['session__subject']
+    raw_id_fields = ['session']
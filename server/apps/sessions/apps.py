@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SessionsConfig(AppConfig):
     name = 'apps.sessions'
     label = 'sch_sessions'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
@@ -0,0 +1,172 @@
+# ============================================================================
+# apps/sessions/clashes.py
+# Venue and instructor double-booking detection
+# ============================================================================
+#
+# Bookings are grouped by (date, venue) and (date, instructor) and swept in
+# start-time order with a heap of the intervals still open, so a whole
+# term is checked in O(n log n + clashes) from one query instead of
+# comparing every pair of sessions of a day. A single edit asks the
+# database for the few sessions overlapping it on the (date, venue key) and
+# (date, instructor) indexes; the venue key is stored normalized the way the
+# sweep compares venues.
+
+import heapq
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from .models import Session, venue_key
+
+
+VENUE = 'venue'
+INSTRUCTOR = 'instructor'
+
+BOOKING_FIELDS = ('pk', 'session_date', 'start_time', 'end_time', 'venue', 'instructor_id')
+
+
+@dataclass(frozen=True)
+class Booking:
+    """A session's place in time; ``pk`` is None for one not saved yet"""
+    pk: int | None
+    session_date: object
+    start_time: object
+    end_time: object
+    venue: str = ''
+    instructor_id: int | None = None
+    slot_id: int | None = None
+
+    @classmethod
+    def of(cls, session):
+        return cls(session.pk, session.session_date, session.start_time, session.end_time,
+                   session.venue, session.instructor_id, session.timetable_slot_id)
+
+    @property
+    def label(self):
+        if self.pk is not None:
+            return f"session {self.pk}"
+        if self.slot_id is not None:
+            return f"slot {self.slot_id} on {self.session_date}"
+        return f"new session on {self.session_date}"
+
+
+@dataclass(frozen=True)
+class Clash:
+    kind: str            # VENUE or INSTRUCTOR
+    resource: object     # normalized venue or instructor id
+    first: Booking
+    second: Booking
+
+    @property
+    def session_date(self):
+        return self.first.session_date
+
+    @property
+    def overlap(self):
+        return (max(self.first.start_time, self.second.start_time),
+                min(self.first.end_time, self.second.end_time))
+
+    def message(self):
+        start, end = self.overlap
+        what = f"Venue {self.first.venue.strip()}" if self.kind == VENUE else (
+            f"Instructor {self.resource}"
+        )
+        return (f"{what} is double-booked on {self.session_date} {start:%H:%M}-{end:%H:%M} "
+                f"by {self.first.label} and {self.second.label}")
+
+    def as_dict(self):
+        start, end = self.overlap
+        return {
+            'kind': self.kind,
+            'resource': self.resource,
+            'date': self.session_date,
+            'start': start,
+            'end': end,
+            'sessions': [self.first.pk, self.second.pk],
+            'slots': [self.first.slot_id, self.second.slot_id],
+            'message': self.message(),
+        }
+
+
+def _resources(booking):
+    venue = venue_key(booking.venue)
+    if venue:
+        yield VENUE, venue
+    if booking.instructor_id is not None:
+        yield INSTRUCTOR, booking.instructor_id
+
+
+def find_clashes(bookings):
+    """Every pair of bookings sharing a venue or instructor at overlapping times"""
+    groups = defaultdict(list)
+    for booking in bookings:
+        if booking.start_time is None or booking.end_time is None:
+            continue
+        for kind, resource in _resources(booking):
+            groups[(booking.session_date, kind, resource)].append(booking)
+
+    clashes = []
+    for (_, kind, resource), group in groups.items():
+        if len(group) < 2:
+            continue
+        group.sort(key=lambda booking: (booking.start_time, booking.end_time))
+        open_bookings = []      # heap of (end_time, sequence, booking)
+        for sequence, booking in enumerate(group):
+            # Back-to-back sessions do not clash: one ends when the next starts.
+            while open_bookings and open_bookings[0][0] <= booking.start_time:
+                heapq.heappop(open_bookings)
+            clashes.extend(Clash(kind, resource, other, booking) for _, _, other in open_bookings)
+            heapq.heappush(open_bookings, (booking.end_time, sequence, booking))
+    clashes.sort(key=lambda clash: (clash.session_date, clash.overlap, clash.kind))
+    return clashes
+
+
+def term_bookings(term_id, exclude=(), using=DEFAULT_DB_ALIAS):
+    """Bookings of every timed session of the term, in one query"""
+    sessions = Session.objects.using(using).filter(
+        term_id=term_id, start_time__isnull=False, end_time__isnull=False
+    )
+    if exclude:
+        sessions = sessions.exclude(pk__in=list(exclude))
+    return [
+        Booking(*row)
+        for row in sessions.order_by().values_list(*BOOKING_FIELDS, 'timetable_slot_id')
+        .iterator(chunk_size=10000)
+    ]
+
+
+def term_clashes(term_id, using=DEFAULT_DB_ALIAS):
+    """All venue and instructor clashes of a term"""
+    return find_clashes(term_bookings(term_id, using=using))
+
+
+def session_clashes(session, using=DEFAULT_DB_ALIAS):
+    """Clashes of one new or edited session with the sessions already saved"""
+    booking = Booking.of(session)
+    if booking.start_time is None or booking.end_time is None:
+        return []
+    resource = Q()
+    if venue_key(booking.venue):
+        resource |= Q(venue_key=venue_key(booking.venue))
+    if booking.instructor_id is not None:
+        resource |= Q(instructor_id=booking.instructor_id)
+    if not resource:
+        return []
+    others = Session.objects.using(using).filter(
+        resource,
+        session_date=booking.session_date,
+        start_time__lt=booking.end_time,
+        end_time__gt=booking.start_time,
+    )
+    if booking.pk is not None:
+        others = others.exclude(pk=booking.pk)
+    bookings = [
+        Booking(*row)
+        for row in others.order_by().values_list(*BOOKING_FIELDS, 'timetable_slot_id')
+    ]
+    return [
+        clash for clash in find_clashes([booking, *bookings])
+        if booking in (clash.first, clash.second)
+    ]
@@ -0,0 +1,181 @@
+# ============================================================================
+# apps/sessions/counters.py
+# Per-session attendance counters
+# ============================================================================
+#
+# Every session has a SessionAttendanceCounts row holding how many students
+# of its class are expected, how many are marked and with which status.
+# Attendance changes become +1/-1 deltas applied with UPDATE ... SET col =
+# col + n inside the transaction that wrote the records, so a session list
+# or the registers still to mark read one row per session instead of
+# counting records per session.
+
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert, chunked
+from apps.learners.models import Student, StudentStatus
+
+from .models import AttendanceRecord, AttendanceStatus, Session, SessionAttendanceCounts
+
+
+STATUS_COUNTERS = {
+    AttendanceStatus.PRESENT: 'present_count',
+    AttendanceStatus.ABSENT: 'absent_count',
+    AttendanceStatus.LATE: 'late_count',
+    AttendanceStatus.EXCUSED: 'excused_count',
+    AttendanceStatus.SICK: 'sick_count',
+}
+
+COUNTER_FIELDS = ['expected_count', 'marked_count', 'unmarked_count', *STATUS_COUNTERS.values()]
+
+CHUNK_SIZE = 1000
+
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Ignore attendance writes, e.g. while bulk loading before a recount"""
+    _state.suspended = getattr(_state, 'suspended', 0) + 1
+    try:
+        yield
+    finally:
+        _state.suspended -= 1
+
+
+def is_suspended():
+    return bool(getattr(_state, 'suspended', 0))
+
+
+def expected_counts(cohort_ids, using=DEFAULT_DB_ALIAS):
+    """``{cohort_id: active students}`` of the given classes"""
+    return dict(
+        Student.objects.using(using)
+        .filter(cohort_id__in=[pk for pk in cohort_ids if pk is not None],
+                status=StudentStatus.ACTIVE)
+        .values_list('cohort_id').annotate(n=Count('id')).order_by()
+    )
+
+
+def recount_sessions(session_ids, using=DEFAULT_DB_ALIAS):
+    """Write the counters of sessions from their records; returns rows written"""
+    written = 0
+    now = timezone.now()
+    for chunk in chunked(session_ids, CHUNK_SIZE):
+        cohorts = dict(
+            Session.objects.using(using).filter(pk__in=chunk).values_list('pk', 'cohort_id')
+        )
+        expected = expected_counts(set(cohorts.values()), using)
+        marks = defaultdict(Counter)
+        for session_id, status, n in (
+            AttendanceRecord.objects.using(using).filter(session_id__in=chunk)
+            .values_list('session_id', 'status').annotate(n=Count('id')).order_by()
+        ):
+            marks[session_id][STATUS_COUNTERS[status]] = n
+        rows = []
+        for session_id, cohort_id in cohorts.items():
+            counts = marks[session_id]
+            marked = sum(counts.values())
+            total = expected.get(cohort_id, 0)
+            rows.append(SessionAttendanceCounts(
+                session_id=session_id, expected_count=total, marked_count=marked,
+                unmarked_count=max(total - marked, 0), last_updated=now,
+                **{field: counts[field] for field in STATUS_COUNTERS.values()},
+            ))
+        bulk_upsert(SessionAttendanceCounts, rows, unique_fields=['session'],
+                    update_fields=[*COUNTER_FIELDS, 'last_updated'], using=using)
+        written += len(rows)
+    return written
+
+
+def rebuild_session_counts(term_id=None, cohort_id=None, missing_only=False,
+                           using=DEFAULT_DB_ALIAS):
+    """Recount the sessions of a term or class, or only those without counters"""
+    sessions = Session.objects.using(using).order_by()
+    if term_id is not None:
+        sessions = sessions.filter(term_id=term_id)
+    if cohort_id is not None:
+        sessions = sessions.filter(cohort_id=cohort_id)
+    if missing_only:
+        sessions = sessions.filter(attendance_counts__isnull=True)
+    with transaction.atomic(using=using):
+        return recount_sessions(
+            sessions.values_list('pk', flat=True).iterator(chunk_size=10000), using
+        )
+
+
+def apply_counter_changes(changes, using=DEFAULT_DB_ALIAS):
+    """
+    Apply (before, after) attendance changes to the session counters, each
+    side a (session_id, student_id, status) tuple or None.
+
+    Sessions without counters yet are counted from their records when a
+    record is written to them. Deletes only adjust existing counters: a
+    session being deleted must not get them back.
+    """
+    if is_suspended():
+        return
+    deltas = defaultdict(Counter)
+    written = set()
+    for before, after in changes:
+        for side, sign in ((before, -1), (after, 1)):
+            if side is None:
+                continue
+            deltas[side[0]]['marked_count'] += sign
+            deltas[side[0]][STATUS_COUNTERS[side[2]]] += sign
+        if after is not None:
+            written.add(after[0])
+
+    with transaction.atomic(using=using, savepoint=False):
+        existing = set()
+        for chunk in chunked(deltas, CHUNK_SIZE):
+            existing.update(
+                SessionAttendanceCounts.objects.using(using)
+                .filter(session_id__in=chunk).values_list('session_id', flat=True)
+            )
+        # A register is marked a session at a time, so sessions sharing a
+        # delta are updated together.
+        batches = defaultdict(list)
+        for session_id, delta in deltas.items():
+            delta = frozenset((field, n) for field, n in delta.items() if n)
+            if session_id in existing and delta:
+                batches[delta].append(session_id)
+        now = timezone.now()
+        for delta, session_ids in batches.items():
+            delta = dict(delta)
+            # unmarked_count is assigned first: MySQL evaluates SET left to
+            # right, so later assignments would read the new marked_count.
+            values = {'unmarked_count': Greatest(
+                F('expected_count') - F('marked_count') - delta.get('marked_count', 0), Value(0)
+            )}
+            values.update((field, F(field) + n) for field, n in delta.items())
+            for chunk in chunked(sorted(session_ids), CHUNK_SIZE):
+                SessionAttendanceCounts.objects.using(using).filter(
+                    session_id__in=chunk
+                ).update(last_updated=now, **values)
+        recount_sessions(sorted(written - existing), using)
+
+
+def refresh_expected(cohort_ids, since=None, using=DEFAULT_DB_ALIAS):
+    """Re-read the class size of the classes' sessions dated ``since`` (today) or later"""
+    since = since or timezone.localdate()
+    expected = expected_counts(cohort_ids, using)
+    for cohort_id in cohort_ids:
+        if cohort_id is None:
+            continue
+        total = expected.get(cohort_id, 0)
+        SessionAttendanceCounts.objects.using(using).filter(
+            session__cohort_id=cohort_id, session__session_date__gte=since,
+        ).update(
+            expected_count=total,
+            unmarked_count=Greatest(Value(total) - F('marked_count'), Value(0)),
+            last_updated=timezone.now(),
+        )
@@ -0,0 +1,43 @@
+# ============================================================================
+# apps/sessions/management/commands/check_clashes.py
+# Report venue and instructor double-bookings of a term
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academic.models import Term
+from apps.sessions.clashes import term_clashes
+
+
+class Command(BaseCommand):
+    help = (
+        "List every pair of sessions in the term that share a venue or an "
+        "instructor at overlapping times. Exits non-zero with --fail-on-clash."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, nargs='+', required=True, help="Term id(s)")
+        parser.add_argument('--limit', type=int, default=50,
+                            help="Clashes listed per term (default: 50)")
+        parser.add_argument('--fail-on-clash', action='store_true',
+                            help="Exit with an error when any clash is found")
+
+    def handle(self, *args, **options):
+        terms = list(Term.objects.filter(pk__in=options['term']).order_by('start_date'))
+        if len(terms) != len(set(options['term'])):
+            raise CommandError("Unknown term id")
+        found = 0
+        for term in terms:
+            started = time.perf_counter()
+            clashes = term_clashes(term.pk)
+            found += len(clashes)
+            self.stdout.write(f"{term}: {len(clashes)} clash(es) "
+                              f"in {time.perf_counter() - started:.2f}s")
+            for clash in clashes[:options['limit']]:
+                self.stdout.write(f"  {clash.message()}")
+            if len(clashes) > options['limit']:
+                self.stdout.write(f"  ... and {len(clashes) - options['limit']} more")
+        if found and options['fail_on_clash']:
+            raise CommandError(f"{found} clash(es) found")
@@ -0,0 +1,50 @@
+# ============================================================================
+# apps/sessions/management/commands/generate_sessions.py
+# Generate a term's sessions from the weekly timetable
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academic.models import Term
+from apps.sessions.timetable import generate_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the term's sessions from the cohorts' timetable slots, skipping "
+        "exclusions. Safe to rerun: only the difference is inserted or deleted, "
+        "and marked sessions are never deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, nargs='+', required=True, help="Term id(s)")
+        parser.add_argument('--cohort', type=int, help="Cohort id (default: all)")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Report the differences without writing them")
+
+    def handle(self, *args, **options):
+        terms = list(Term.objects.filter(pk__in=options['term']).order_by('start_date'))
+        if len(terms) != len(set(options['term'])):
+            raise CommandError("Unknown term id")
+        for term in terms:
+            started = time.perf_counter()
+            result = generate_sessions(term, options['cohort'], created_by='generate_sessions',
+                                       dry_run=options['dry_run'])
+            self.stdout.write(
+                f"{term}: {result.created} created, {result.updated} updated, "
+                f"{result.deleted} deleted, {result.unchanged} unchanged "
+                f"in {time.perf_counter() - started:.2f}s"
+                + (" (dry run)" if options['dry_run'] else "")
+            )
+            if result.kept:
+                self.stdout.write(self.style.WARNING(
+                    f"  {len(result.kept)} marked session(s) are no longer on the timetable "
+                    f"and were kept: {', '.join(map(str, result.kept[:20]))}"
+                ))
+            if result.clashes:
+                self.stdout.write(self.style.WARNING(
+                    f"  {len(result.clashes)} venue or instructor clash(es); "
+                    f"run check_clashes --term {term.pk} for the list"
+                ))
@@ -0,0 +1,35 @@
+# ============================================================================
+# apps/sessions/management/commands/rebuild_session_counts.py
+# Recount SessionAttendanceCounts from the attendance records
+# ============================================================================
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sessions.counters import rebuild_session_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the per-session attendance counters of a term, a class or "
+        "every session, with grouped queries per chunk of sessions. Needed "
+        "after bulk student or session changes that bypass signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--term', type=int, help="Term id")
+        parser.add_argument('--cohort', type=int, help="Cohort id")
+        parser.add_argument('--all', action='store_true', help="Recount every session")
+        parser.add_argument('--missing', action='store_true',
+                            help="Only sessions without counters")
+
+    def handle(self, *args, **options):
+        if not (options['term'] or options['cohort'] or options['all'] or options['missing']):
+            raise CommandError("Give --term, --cohort, --missing or --all.")
+        started = time.perf_counter()
+        written = rebuild_session_counts(options['term'], options['cohort'],
+                                         missing_only=options['missing'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Recounted {written} sessions in {time.perf_counter() - started:.1f}s"
+        ))
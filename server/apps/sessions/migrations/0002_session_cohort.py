@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:19
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_cohorts(apps, schema_editor):
+    """Give each marked session the cohort of its students, when they share one"""
+    AttendanceRecord = apps.get_model('sch_sessions', 'AttendanceRecord')
+    Session = apps.get_model('sch_sessions', 'Session')
+    cohorts = defaultdict(set)
+    for session_id, cohort_id in (
+        AttendanceRecord.objects.using(schema_editor.connection.alias)
+        .values_list('session_id', 'student__cohort_id').distinct().iterator()
+    ):
+        cohorts[session_id].add(cohort_id)
+    sessions = defaultdict(list)
+    for session_id, found in cohorts.items():
+        if len(found) == 1 and None not in found:
+            sessions[found.pop()].append(session_id)
+    for cohort_id, session_ids in sessions.items():
+        for start in range(0, len(session_ids), 1000):
+            Session.objects.using(schema_editor.connection.alias).filter(
+                pk__in=session_ids[start:start + 1000]
+            ).update(cohort_id=cohort_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_grade_boundaries'),
+        ('sch_sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='cohort',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='academic.cohort'),
+        ),
+        migrations.RunPython(backfill_cohorts, migrations.RunPython.noop),
+    ]
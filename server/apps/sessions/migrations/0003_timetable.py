@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_grade_boundaries'),
+        ('projects', '0001_initial'),
+        ('sch_sessions', '0002_session_cohort'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionExclusion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('cohort', models.ForeignKey(blank=True, help_text='Leave empty for the whole school', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='session_exclusions', to='academic.cohort')),
+            ],
+            options={
+                'verbose_name': 'Session Exclusion',
+                'verbose_name_plural': 'Session Exclusions',
+                'ordering': ['start_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimetableSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('venue', models.CharField(blank=True, max_length=100)),
+                ('session_type', models.CharField(choices=[('LESSON', 'Lesson'), ('PRACTICAL', 'Practical'), ('PROJECT', 'Project'), ('EXAM', 'Exam'), ('FIELD_TRIP', 'Field Trip'), ('ASSEMBLY', 'Assembly'), ('OTHER', 'Other')], default='LESSON', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('cohort', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetable_slots', to='academic.cohort')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetable_slots', to='academic.subject')),
+            ],
+            options={
+                'verbose_name': 'Timetable Slot',
+                'verbose_name_plural': 'Timetable Slots',
+                'ordering': ['cohort', 'weekday', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='timetable_slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='sch_sessions.timetableslot'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['timetable_slot', 'session_date'], name='sch_session_timetab_9317ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionexclusion',
+            index=models.Index(fields=['start_date', 'end_date'], name='sch_session_start_d_0186e7_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='timetableslot',
+            unique_together={('cohort', 'weekday', 'start_time')},
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:25
+
+import re
+from collections import defaultdict
+from datetime import time
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+TIME_PATTERN = re.compile(r'^\s*(\d{1,2})\s*[:.h]?\s*(\d{2})(?::(\d{2}))?\s*([ap]\.?m\.?)?\s*$', re.I)
+
+
+def parse_time(value):
+    """'08:00', '8.30', '0830', '2:15 pm' -> time; anything else -> None"""
+    match = TIME_PATTERN.match(value or '')
+    if not match:
+        return None
+    hour, minute, second = int(match[1]), int(match[2]), int(match[3] or 0)
+    meridiem = (match[4] or '').lower().replace('.', '')
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == 'pm' else 0)
+    try:
+        return time(hour, minute, second)
+    except ValueError:
+        return None
+
+
+def copy_times(apps, schema_editor):
+    """Parse the text times and link instructors recorded by email in created_by"""
+    db = schema_editor.connection.alias
+    Session = apps.get_model('sch_sessions', 'Session')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    users = {email.lower(): pk for pk, email in User.objects.using(db).values_list('pk', 'email')}
+
+    groups = defaultdict(list)
+    for pk, start, end, created_by in (
+        Session.objects.using(db).values_list('pk', 'start_time', 'end_time', 'created_by')
+        .iterator(chunk_size=10000)
+    ):
+        key = (parse_time(start), parse_time(end), users.get((created_by or '').strip().lower()))
+        if key != (None, None, None):
+            groups[key].append(pk)
+    for (start, end, instructor), pks in groups.items():
+        for offset in range(0, len(pks), 1000):
+            Session.objects.using(db).filter(pk__in=pks[offset:offset + 1000]).update(
+                start_at=start, end_at=end, instructor_id=instructor,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sch_sessions', '0003_timetable'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='start_at',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='end_at',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='instructor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='timetableslot',
+            name='instructor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='timetable_slots', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(copy_times, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='session',
+            name='start_time',
+        ),
+        migrations.RemoveField(
+            model_name='session',
+            name='end_time',
+        ),
+        migrations.RenameField(
+            model_name='session',
+            old_name='start_at',
+            new_name='start_time',
+        ),
+        migrations.RenameField(
+            model_name='session',
+            old_name='end_at',
+            new_name='end_time',
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['session_date', 'venue', 'start_time'], name='sch_session_session_163b89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['session_date', 'instructor', 'start_time'], name='sch_session_session_c977ca_idx'),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:33
+
+import django.db.models.deletion
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+STATUS_COUNTERS = {
+    'PRESENT': 'present_count',
+    'ABSENT': 'absent_count',
+    'LATE': 'late_count',
+    'EXCUSED': 'excused_count',
+    'SICK': 'sick_count',
+}
+
+
+def backfill_counts(apps, schema_editor):
+    """Count every session's records and class size with two grouped queries per chunk"""
+    AttendanceRecord = apps.get_model('sch_sessions', 'AttendanceRecord')
+    Session = apps.get_model('sch_sessions', 'Session')
+    SessionAttendanceCounts = apps.get_model('sch_sessions', 'SessionAttendanceCounts')
+    Student = apps.get_model('learners', 'Student')
+    alias = schema_editor.connection.alias
+    expected = dict(
+        Student.objects.using(alias).filter(status='ACTIVE', cohort__isnull=False)
+        .values_list('cohort_id').annotate(n=Count('id')).order_by()
+    )
+    sessions = list(Session.objects.using(alias).values_list('pk', 'cohort_id').order_by('pk'))
+    for start in range(0, len(sessions), 1000):
+        chunk = dict(sessions[start:start + 1000])
+        marks = defaultdict(Counter)
+        for session_id, status, n in (
+            AttendanceRecord.objects.using(alias).filter(session_id__in=list(chunk))
+            .values_list('session_id', 'status').annotate(n=Count('id')).order_by()
+        ):
+            marks[session_id][STATUS_COUNTERS[status]] = n
+        rows = []
+        for session_id, cohort_id in chunk.items():
+            counts = marks[session_id]
+            marked = sum(counts.values())
+            total = expected.get(cohort_id, 0)
+            rows.append(SessionAttendanceCounts(
+                session_id=session_id, expected_count=total, marked_count=marked,
+                unmarked_count=max(total - marked, 0),
+                **{field: counts[field] for field in STATUS_COUNTERS.values()},
+            ))
+        SessionAttendanceCounts.objects.using(alias).bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learners', '0001_initial'),
+        ('sch_sessions', '0004_typed_times_instructor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionAttendanceCounts',
+            fields=[
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_counts', serialize=False, to='sch_sessions.session')),
+                ('expected_count', models.IntegerField(default=0)),
+                ('marked_count', models.IntegerField(default=0)),
+                ('unmarked_count', models.IntegerField(default=0)),
+                ('present_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0)),
+                ('late_count', models.IntegerField(default=0)),
+                ('excused_count', models.IntegerField(default=0)),
+                ('sick_count', models.IntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Session Attendance Counts',
+                'verbose_name_plural': 'Session Attendance Counts',
+            },
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:44
+
+from django.db import migrations, models
+
+
+def detach_duplicates(apps, schema_editor):
+    """Keep the first session of each (slot, date); later ones become ad-hoc sessions"""
+    Session = apps.get_model('sch_sessions', 'Session')
+    alias = schema_editor.connection.alias
+    seen, duplicates = set(), []
+    for pk, slot_id, session_date in (
+        Session.objects.using(alias).filter(timetable_slot__isnull=False)
+        .order_by('timetable_slot_id', 'session_date', 'pk')
+        .values_list('pk', 'timetable_slot_id', 'session_date').iterator()
+    ):
+        if (slot_id, session_date) in seen:
+            duplicates.append(pk)
+        seen.add((slot_id, session_date))
+    for start in range(0, len(duplicates), 1000):
+        Session.objects.using(alias).filter(
+            pk__in=duplicates[start:start + 1000]
+        ).update(timetable_slot=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sch_sessions', '0005_session_attendance_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(detach_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.UniqueConstraint(fields=('timetable_slot', 'session_date'), name='unique_session_per_slot_date'),
+        ),
+        migrations.RemoveIndex(
+            model_name='session',
+            name='sch_session_timetab_9317ae_idx',
+        ),
+    ]
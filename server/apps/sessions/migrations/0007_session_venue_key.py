@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:56
+
+from django.db import migrations, models
+
+
+def fill_venue_keys(apps, schema_editor):
+    """Store every session's venue collapsed and case folded, as clash checks compare it"""
+    Session = apps.get_model('sch_sessions', 'Session')
+    alias = schema_editor.connection.alias
+    venues = (
+        Session.objects.using(alias).exclude(venue='')
+        .order_by().values_list('venue', flat=True).distinct()
+    )
+    for venue in list(venues.iterator()):
+        Session.objects.using(alias).filter(venue=venue).update(
+            venue_key=' '.join(venue.split()).casefold()
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sch_sessions', '0006_unique_slot_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='venue_key',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_venue_keys, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='session',
+            name='sch_session_session_163b89_idx',
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['session_date', 'venue_key', 'start_time'], name='sch_session_session_68784b_idx'),
+        ),
+    ]
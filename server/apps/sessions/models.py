@@ -3,7 +3,15 @@
 # Session and Attendance tracking
 # ============================================================================
 
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
+
+from .signals import attendance_changed
+
+
+def venue_key(venue):
+    """A venue as compared for clashes: whitespace collapsed, case folded"""
+    return ' '.join((venue or '').split()).casefold()
 
 
 class SessionType(models.TextChoices):
@@ -26,6 +34,96 @@ class AttendanceStatus(models.TextChoices):
     SICK = "SICK", "Sick"
 
 
+class Weekday(models.IntegerChoices):
+    """Days of the week, numbered like date.weekday()"""
+    MONDAY = 0, "Monday"
+    TUESDAY = 1, "Tuesday"
+    WEDNESDAY = 2, "Wednesday"
+    THURSDAY = 3, "Thursday"
+    FRIDAY = 4, "Friday"
+    SATURDAY = 5, "Saturday"
+    SUNDAY = 6, "Sunday"
+
+
+class TimetableSlot(models.Model):
+    """A weekly lesson of a cohort in one subject"""
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.CASCADE,
+        related_name='timetable_slots'
+    )
+    subject = models.ForeignKey(
+        'academic.Subject',
+        on_delete=models.CASCADE,
+        related_name='timetable_slots'
+    )
+    
+    weekday = models.PositiveSmallIntegerField(choices=Weekday.choices)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    venue = models.CharField(max_length=100, blank=True)
+    instructor = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='timetable_slots'
+    )
+    session_type = models.CharField(
+        max_length=20,
+        choices=SessionType.choices,
+        default=SessionType.LESSON
+    )
+    is_active = models.BooleanField(default=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['cohort', 'weekday', 'start_time']
+        unique_together = [['cohort', 'weekday', 'start_time']]
+        verbose_name = "Timetable Slot"
+        verbose_name_plural = "Timetable Slots"
+    
+    def __str__(self):
+        return (f"{self.cohort.name} {self.subject.name} - {self.get_weekday_display()} "
+                f"{self.start_time:%H:%M}")
+    
+    def clean(self):
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError({'end_time': "A lesson must end after it starts."})
+
+
+class SessionExclusion(models.Model):
+    """Holiday or other days no timetabled sessions take place"""
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='session_exclusions',
+        help_text="Leave empty for the whole school"
+    )
+    
+    name = models.CharField(max_length=100)  # "Mid-term break"
+    start_date = models.DateField()
+    end_date = models.DateField()
+    
+    class Meta:
+        ordering = ['start_date']
+        indexes = [
+            models.Index(fields=['start_date', 'end_date']),
+        ]
+        verbose_name = "Session Exclusion"
+        verbose_name_plural = "Session Exclusions"
+    
+    def __str__(self):
+        return f"{self.name} ({self.start_date} - {self.end_date})"
+    
+    def clean(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': "The exclusion must end on or after its start."})
+
+
 class Session(models.Model):
     """Time-based learning interaction container"""
     term = models.ForeignKey(
@@ -38,18 +136,44 @@ class Session(models.Model):
         on_delete=models.CASCADE,
         related_name='sessions'
     )
+    # Class whose register the session holds; roll call expands to its students
+    cohort = models.ForeignKey(
+        'academic.Cohort',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sessions'
+    )
     
     session_type = models.CharField(
         max_length=20,
         choices=SessionType.choices
     )
     session_date = models.DateField()
-    start_time = models.CharField(max_length=10, blank=True)  # "08:00"
-    end_time = models.CharField(max_length=10, blank=True)    # "09:30"
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
     
     title = models.CharField(max_length=200, blank=True)
     description = models.TextField(blank=True)
     venue = models.CharField(max_length=100, blank=True)
+    # venue_key(venue), kept by save(); bulk writes must set it themselves
+    venue_key = models.CharField(max_length=100, blank=True, editable=False)
+    instructor = models.ForeignKey(
+        'users.User',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sessions'
+    )
+    
+    # Weekly slot this session was generated from
+    timetable_slot = models.ForeignKey(
+        TimetableSlot,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sessions'
+    )
     
     # Project linkage (if this session is part of a project)
     project = models.ForeignKey(
@@ -70,12 +194,106 @@ class Session(models.Model):
         indexes = [
             models.Index(fields=['session_date']),
             models.Index(fields=['term', 'subject']),
+            models.Index(fields=['session_date', 'venue_key', 'start_time']),
+            models.Index(fields=['session_date', 'instructor', 'start_time']),
+        ]
+        constraints = [
+            # One session per timetable slot and date; ad-hoc sessions have no slot
+            models.UniqueConstraint(fields=['timetable_slot', 'session_date'],
+                                    name='unique_session_per_slot_date'),
         ]
         verbose_name = "Session"
         verbose_name_plural = "Sessions"
     
     def __str__(self):
         return f"{self.session_date} - {self.subject.name} ({self.get_session_type_display()})"
+    
+    def save(self, *args, **kwargs):
+        self.venue_key = venue_key(self.venue)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'venue' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'venue_key'}
+        super().save(*args, **kwargs)
+    
+    def clean(self):
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError({'end_time': "A session must end after it starts."})
+        if self.session_date and self.start_time and self.end_time:
+            from .clashes import session_clashes
+            clashes = session_clashes(self)
+            if clashes:
+                raise ValidationError([clash.message() for clash in clashes])
+
+
+TRACKED_FIELDS = ('session_id', 'student_id', 'status')
+
+
+def _tracked(record):
+    return tuple(getattr(record, field) for field in TRACKED_FIELDS)
+
+
+class AttendanceRecordQuerySet(models.QuerySet):
+    """Reports every attendance change, including bulk writes"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            previous = {}
+            if kwargs.get('update_conflicts') or kwargs.get('ignore_conflicts'):
+                previous = self._existing(objs)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            changes = []
+            for obj in objs:
+                before = previous.get((obj.session_id, obj.student_id))
+                if before is not None and kwargs.get('ignore_conflicts'):
+                    continue
+                changes.append((before, _tracked(obj)))
+            self._send_changed(changes)
+        return objs
+
+    bulk_create.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            before = self._snapshot(pk__in=[obj.pk for obj in objs])
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            self._send_changed([(before.get(obj.pk), _tracked(obj)) for obj in objs])
+        return rows
+
+    bulk_update.alters_data = True
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            before = self._snapshot(pk__in=self.values('pk'))
+            rows = super().update(**kwargs)
+            after = self._snapshot(pk__in=list(before))
+            self._send_changed([(before[pk], after.get(pk)) for pk in before])
+        return rows
+
+    update.alters_data = True
+
+    def _snapshot(self, **lookups):
+        return {
+            pk: tuple(values)
+            for pk, *values in self.model._base_manager.using(self.db)
+            .filter(**lookups).values_list('pk', *TRACKED_FIELDS)
+        }
+
+    def _existing(self, objs):
+        sessions = {obj.session_id for obj in objs}
+        students = {obj.student_id for obj in objs}
+        return {
+            (values[0], values[1]): values
+            for values in self.model._base_manager.using(self.db)
+            .filter(session_id__in=sessions, student_id__in=students)
+            .values_list(*TRACKED_FIELDS)
+        }
+
+    def _send_changed(self, changes):
+        changes = [(before, after) for before, after in changes if before != after]
+        if changes:
+            attendance_changed.send(sender=self.model, changes=changes, using=self.db)
 
 
 class AttendanceRecord(models.Model):
@@ -99,6 +317,8 @@ class AttendanceRecord(models.Model):
     marked_at = models.DateTimeField(auto_now_add=True)
     marked_by = models.CharField(max_length=100, blank=True)
     
+    objects = AttendanceRecordQuerySet.as_manager()
+    
     class Meta:
         unique_together = [['session', 'student']]
         indexes = [
@@ -110,4 +330,63 @@ class AttendanceRecord(models.Model):
     
     def __str__(self):
         return f"{self.student.admission_number} - {self.session.session_date} ({self.get_status_display()})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if instance.get_deferred_fields().isdisjoint(TRACKED_FIELDS):
+            instance._loaded = _tracked(instance)
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Deletes, including cascades, are reported through post_delete.
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            before = None
+            if not self._state.adding:
+                before = getattr(self, '_loaded', None)
+                if before is None:
+                    before = type(self)._base_manager.using(using).filter(
+                        pk=self.pk
+                    ).values_list(*TRACKED_FIELDS).first()
+            super().save(*args, **kwargs)
+            self._loaded = _tracked(self)
+            if before != self._loaded:
+                attendance_changed.send(
+                    sender=type(self), changes=[(before, self._loaded)], using=using
+                )
 
+
+class SessionAttendanceCounts(models.Model):
+    """
+    Attendance tallies of one session, kept in step with its records.
+    
+    ``expected_count`` is the number of active students in the session's
+    class. It follows roster changes for sessions from today on; past
+    registers keep the class they had. ``unmarked_count`` is the expected
+    students not marked yet, never below zero.
+    """
+    session = models.OneToOneField(
+        Session,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='attendance_counts'
+    )
+    
+    expected_count = models.IntegerField(default=0)
+    marked_count = models.IntegerField(default=0)
+    unmarked_count = models.IntegerField(default=0)
+    present_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0)
+    late_count = models.IntegerField(default=0)
+    excused_count = models.IntegerField(default=0)
+    sick_count = models.IntegerField(default=0)
+    
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Session Attendance Counts"
+        verbose_name_plural = "Session Attendance Counts"
+    
+    def __str__(self):
+        return f"Session {self.session_id}: {self.marked_count}/{self.expected_count} marked"
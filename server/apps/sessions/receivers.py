@@ -0,0 +1,57 @@
+# ============================================================================
+# apps/sessions/receivers.py
+# Keep the per-session attendance counters in step
+# ============================================================================
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.learners.models import Student
+
+from . import counters
+from .models import AttendanceRecord, Session, _tracked
+from .signals import attendance_changed
+
+
+@receiver(attendance_changed, sender=AttendanceRecord)
+def attendance_written(sender, changes, using, **kwargs):
+    counters.apply_counter_changes(changes, using=using)
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def attendance_deleted(sender, instance, using, **kwargs):
+    counters.apply_counter_changes([(_tracked(instance), None)], using=using)
+
+
+@receiver(post_save, sender=Session)
+def session_saved(sender, instance, using, raw=False, **kwargs):
+    # A new session, or one moved to another class, is recounted whole.
+    if not raw:
+        counters.recount_sessions([instance.pk], using=using)
+
+
+@receiver(pre_save, sender=Student)
+def student_changing(sender, instance, using, raw=False, **kwargs):
+    instance._roster_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._roster_previous = Student.objects.using(using).filter(
+        pk=instance.pk
+    ).values_list('cohort_id', 'status').first()
+
+
+@receiver(post_save, sender=Student)
+def student_changed(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_roster_previous', None)
+    if previous == (instance.cohort_id, instance.status):
+        return
+    cohorts = {instance.cohort_id, previous[0] if previous else None} - {None}
+    counters.refresh_expected(cohorts, using=using)
+
+
+@receiver(post_delete, sender=Student)
+def student_deleted(sender, instance, using, **kwargs):
+    if instance.cohort_id is not None:
+        counters.refresh_expected({instance.cohort_id}, using=using)
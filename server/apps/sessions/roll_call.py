@@ -0,0 +1,92 @@
+# ============================================================================
+# apps/sessions/roll_call.py
+# Whole-class roll call for one session
+# ============================================================================
+#
+# A register is a default status plus a few exceptions. The cohort's active
+# students are read once through the (cohort, status) index and every
+# AttendanceRecord is written with upserts on (session, student) in one
+# transaction, so a class costs a handful of queries however large it is
+# and summaries are updated from one batch of changes.
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from apps.academic.db import bulk_upsert
+from apps.learners.models import Student, StudentStatus
+
+from .models import AttendanceRecord, AttendanceStatus
+
+
+UPSERT_CHUNK_SIZE = 1000
+
+UPDATE_FIELDS = ['status', 'notes', 'marked_by', 'marked_at']
+
+
+def _error(errors, row, field, message):
+    errors.append({'row': row, 'field': field, 'message': message})
+
+
+def validate_exceptions(exceptions, student_ids):
+    """
+    Check exception rows ``{'student': <id>, 'status': ..., 'notes': ...}``
+    against the class. Returns ``({student_id: (status, notes)}, errors)``.
+    """
+    marked, errors = {}, []
+    for row, entry in enumerate(exceptions):
+        found = len(errors)
+        student = entry.get('student')
+        try:
+            student_id = int(student)
+        except (TypeError, ValueError):
+            _error(errors, row, 'student', f"Invalid student id: {student!r}")
+            continue
+        if student_id not in student_ids:
+            _error(errors, row, 'student',
+                   f"Student {student_id} is not an active member of this class")
+        elif student_id in marked:
+            _error(errors, row, 'student', f"Student {student_id} is listed more than once")
+        status = entry.get('status')
+        if status not in AttendanceStatus.values:
+            _error(errors, row, 'status', f"Unknown attendance status: {status!r}")
+        if len(errors) > found:
+            continue
+        marked[student_id] = (status, str(entry.get('notes') or ''))
+    return marked, errors
+
+
+def mark_roll_call(session, default_status=AttendanceStatus.PRESENT, exceptions=(),
+                   marked_by='', using=DEFAULT_DB_ALIAS):
+    """
+    Mark every active student of the session's cohort: ``default_status``
+    for all but the ``exceptions``. The register replaces existing records,
+    notes included.
+
+    Returns ``(counts, errors)``. ``counts`` maps each status to the number
+    of students marked with it. Nothing is written when there are errors.
+    """
+    student_ids = set(
+        Student.objects.using(using)
+        .filter(cohort_id=session.cohort_id, status=StudentStatus.ACTIVE)
+        .order_by().values_list('pk', flat=True)
+    )
+    marked, errors = validate_exceptions(exceptions, student_ids)
+    if errors:
+        return {}, errors
+
+    now = timezone.now()
+    records = []
+    for student_id in sorted(student_ids):
+        status, notes = marked.get(student_id, (default_status, ''))
+        records.append(AttendanceRecord(
+            session_id=session.pk, student_id=student_id, status=status,
+            notes=notes, marked_by=marked_by, marked_at=now,
+        ))
+    with transaction.atomic(using=using):
+        bulk_upsert(AttendanceRecord, records, unique_fields=['session', 'student'],
+                    update_fields=UPDATE_FIELDS, batch_size=UPSERT_CHUNK_SIZE, using=using)
+
+    counts = {status: 0 for status in AttendanceStatus.values}
+    for record in records:
+        counts[record.status] += 1
+    return counts, []
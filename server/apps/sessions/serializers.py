@@ -0,0 +1,53 @@
+# ============================================================================
+# apps/sessions/serializers.py
+# ============================================================================
+
+from rest_framework import serializers
+
+from apps.academic.models import Cohort, Subject, Term
+from apps.users.models import User
+
+from .models import AttendanceStatus
+
+
+class RollCallSerializer(serializers.Serializer):
+    """
+    A whole register: one status for the class and the students who differ.
+    Exception rows are only checked for shape here; ``roll_call`` validates
+    them against the class.
+    """
+    default_status = serializers.ChoiceField(
+        choices=AttendanceStatus.choices, default=AttendanceStatus.PRESENT
+    )
+    exceptions = serializers.ListField(
+        child=serializers.DictField(), required=False, default=list, max_length=10000
+    )
+    cohort = serializers.PrimaryKeyRelatedField(
+        queryset=Cohort.objects.all(), required=False,
+        help_text="Class of a session that has none yet",
+    )
+    marked_by = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class GenerateSessionsSerializer(serializers.Serializer):
+    """Scope of a timetable generation run"""
+    cohort = serializers.PrimaryKeyRelatedField(queryset=Cohort.objects.all(), required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+
+class SessionListSerializer(serializers.Serializer):
+    """Query parameters of the session list; every filter but the term is optional"""
+    term = serializers.PrimaryKeyRelatedField(queryset=Term.objects.all())
+    cohort = serializers.PrimaryKeyRelatedField(queryset=Cohort.objects.all(), required=False)
+    subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all(), required=False)
+    instructor = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+
+class UnmarkedRegistersSerializer(serializers.Serializer):
+    """Query parameters of the registers-not-yet-marked report"""
+    term = serializers.PrimaryKeyRelatedField(queryset=Term.objects.all(), required=False)
+    cohort = serializers.PrimaryKeyRelatedField(queryset=Cohort.objects.all(), required=False)
+    instructor = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    until = serializers.DateField(required=False, help_text="Last session date (default: today)")
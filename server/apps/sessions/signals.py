@@ -0,0 +1,13 @@
+# ============================================================================
+# apps/sessions/signals.py
+# Signals for attendance writes
+# ============================================================================
+
+from django.dispatch import Signal
+
+
+# Sent inside the writing transaction whenever AttendanceRecord rows change,
+# including bulk_create(), bulk_update() and QuerySet.update().
+# ``changes`` is a list of (before, after) pairs where each side is a
+# (session_id, student_id, status) tuple, or None for an insert/delete.
+attendance_changed = Signal()
@@ -1,3 +1,386 @@
-from django.test import TestCase
+from datetime import date, time
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.academic.models import Cohort, CohortSubject, Term
+from apps.academic.query_counts import SIZES, QueryCountTestCase
+from apps.academic.synthetic import SchoolGenerator
+from apps.learners.models import Student, StudentStatus
+
+from . import clashes
+from .counters import COUNTER_FIELDS, recount_sessions
+from .models import (
+    AttendanceRecord, AttendanceStatus, Session, SessionAttendanceCounts, SessionExclusion,
+    SessionType, TimetableSlot, Weekday,
+)
+from .roll_call import mark_roll_call
+from .timetable import generate_sessions as generate_sessions_for
+
+
+def roll_call(school):
+    # A fresh register, so every size applies the same attendance changes
+    session = Session.objects.create(
+        term_id=school.term_id, subject_id=school.subject_id, cohort=school.cohort,
+        session_type=SessionType.LESSON, session_date=date(2024, 2, 1),
+    )
+    absent = list(school.students.values_list('pk', flat=True)[:2])
+    return school.client.post(reverse('sessions:roll-call', args=[session.pk]), {
+        'default_status': AttendanceStatus.PRESENT,
+        'exceptions': [{'student': pk, 'status': AttendanceStatus.ABSENT, 'notes': 'Sent home'}
+                       for pk in absent],
+    }, format='json')
+
+
+def generate_sessions(school):
+    subject_ids = CohortSubject.objects.filter(cohort=school.cohort).values_list(
+        'subject_id', flat=True
+    )
+    TimetableSlot.objects.bulk_create(
+        TimetableSlot(cohort=school.cohort, subject_id=subject_id, weekday=weekday,
+                      start_time=time(8 + n), end_time=time(8 + n, 40))
+        for n, subject_id in enumerate(subject_ids) for weekday in Weekday.values[:5]
+    )
+    SessionExclusion.objects.create(name='Closed', start_date=date(2024, 1, 10),
+                                    end_date=date(2024, 1, 10))
+    return school.client.post(
+        reverse('sessions:generate-sessions', args=[school.term_id]), {}, format='json'
+    )
+
+
+def term_clashes(school):
+    return school.client.get(reverse('sessions:term-clashes', args=[school.term_id]))
+
+
+def session_list(school):
+    return school.client.get(reverse('sessions:session-list'), {'term': school.term_id})
+
+
+def unmarked_registers(school):
+    # One register left unmarked at every size
+    Session.objects.create(
+        term_id=school.term_id, subject_id=school.subject_id, cohort=school.cohort,
+        session_type=SessionType.LESSON, session_date=date(2024, 2, 1),
+    )
+    return school.client.get(reverse('sessions:unmarked-registers'),
+                             {'cohort': school.cohort.pk})
+
+
+class AdminQueryCountTests(QueryCountTestCase):
+
+    def test_changelists(self):
+        self.assertConstantChangelists('sch_sessions')
+
+
+class EndpointQueryCountTests(QueryCountTestCase):
+
+    def test_roll_call(self):
+        self.assertConstantQueries({'roll-call': roll_call})
+
+    def test_generate_sessions(self):
+        self.assertConstantQueries({'generate-sessions': generate_sessions})
+
+    def test_term_clashes(self):
+        self.assertConstantQueries({'term-clashes': term_clashes})
+
+    def test_session_list(self):
+        self.assertConstantQueries({'session-list': session_list})
+
+    def test_unmarked_registers(self):
+        self.assertConstantQueries({'unmarked-registers': unmarked_registers})
+
+
+class SchoolTestCase(TestCase):
+    """A generated school and one of its classes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        SchoolGenerator(SIZES['large']).generate()
+        cls.cohort = Cohort.objects.order_by('pk').first()
+        cls.term = Term.objects.filter(academic_year_id=cls.cohort.academic_year_id).first()
+        cls.subject_id = CohortSubject.objects.filter(cohort=cls.cohort).values_list(
+            'subject_id', flat=True
+        ).first()
+        cls.student_ids = list(cls.cohort.students.filter(
+            status=StudentStatus.ACTIVE
+        ).order_by('pk').values_list('pk', flat=True))
+
+    def new_session(self, **fields):
+        values = {'term': self.term, 'subject_id': self.subject_id, 'cohort': self.cohort,
+                  'session_type': SessionType.LESSON, 'session_date': date(2024, 2, 1)}
+        values.update(fields)
+        return Session.objects.create(**values)
+
+
+class SessionCounterTests(SchoolTestCase):
+    """Incremental counters match a recount and the expected values"""
+
+    def counts(self, session):
+        return SessionAttendanceCounts.objects.filter(session=session).values(
+            *COUNTER_FIELDS
+        ).get()
+
+    def assertMatchesRecount(self):
+        incremental = list(SessionAttendanceCounts.objects.order_by('pk').values())
+        recount_sessions(Session.objects.values_list('pk', flat=True))
+        recounted = list(SessionAttendanceCounts.objects.order_by('pk').values())
+        for row in incremental + recounted:
+            del row['last_updated']
+        self.assertEqual(incremental, recounted)
+
+    def test_mark_change_delete(self):
+        session = self.new_session()
+        first, second, third, *_ = self.student_ids
+        expected = len(self.student_ids)
+        self.assertEqual(self.counts(session)['unmarked_count'], expected)
+
+        record = AttendanceRecord.objects.create(session=session, student_id=first,
+                                                 status=AttendanceStatus.PRESENT)
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(session=session, student_id=pk, status=AttendanceStatus.ABSENT)
+            for pk in (second, third)
+        ])
+        record.status = AttendanceStatus.LATE
+        record.save()
+        AttendanceRecord.objects.filter(session=session, student_id=second).update(
+            status=AttendanceStatus.SICK
+        )
+        AttendanceRecord.objects.filter(session=session, student_id=third).delete()
+
+        self.assertEqual(self.counts(session), {
+            'expected_count': expected, 'marked_count': 2, 'unmarked_count': expected - 2,
+            'present_count': 0, 'absent_count': 0, 'late_count': 1, 'excused_count': 0,
+            'sick_count': 1,
+        })
+        self.assertMatchesRecount()
+
+    def test_roll_call_and_delete(self):
+        session = self.new_session()
+        first, second = self.student_ids[:2]
+        expected = len(self.student_ids)
+        AttendanceRecord.objects.create(session=session, student_id=first,
+                                        status=AttendanceStatus.ABSENT)
+        mark_roll_call(session, exceptions=[
+            {'student': second, 'status': AttendanceStatus.LATE},
+        ])
+        self.assertEqual(self.counts(session), {
+            'expected_count': expected, 'marked_count': expected, 'unmarked_count': 0,
+            'present_count': expected - 1, 'absent_count': 0, 'late_count': 1,
+            'excused_count': 0, 'sick_count': 0,
+        })
+
+        AttendanceRecord.objects.get(session=session, student_id=second).delete()
+        self.assertEqual(self.counts(session), {
+            'expected_count': expected, 'marked_count': expected - 1, 'unmarked_count': 1,
+            'present_count': expected - 1, 'absent_count': 0, 'late_count': 0,
+            'excused_count': 0, 'sick_count': 0,
+        })
+        self.assertMatchesRecount()
+
+    def test_student_changes_class(self):
+        today = timezone.localdate()
+        other = Cohort.objects.exclude(pk=self.cohort.pk).filter(
+            academic_year_id=self.cohort.academic_year_id
+        ).order_by('pk').first()
+        other_size = other.students.filter(status=StudentStatus.ACTIVE).count()
+        past, upcoming = self.new_session(), self.new_session(session_date=today)
+        other_upcoming = self.new_session(cohort=other, session_date=today)
+        marked, moving = Student.objects.filter(pk__in=self.student_ids[:2]).order_by('pk')
+        for session in (past, upcoming):
+            AttendanceRecord.objects.create(session=session, student_id=marked.pk,
+                                            status=AttendanceStatus.PRESENT)
+
+        moving.cohort = other
+        moving.save()
+        marked.status = StudentStatus.WITHDRAWN
+        marked.save()
+
+        expected = len(self.student_ids)
+        summary = ('expected_count', 'marked_count', 'unmarked_count')
+        self.assertEqual([tuple(self.counts(session)[field] for field in summary)
+                          for session in (past, upcoming, other_upcoming)], [
+            (expected, 1, expected - 1),            # dated before the move: unchanged
+            (expected - 2, 1, expected - 3),
+            (other_size + 1, 0, other_size + 1),
+        ])
+
+    def test_generate_sessions(self):
+        slot = TimetableSlot.objects.create(
+            cohort=self.cohort, subject_id=self.subject_id, weekday=Weekday.MONDAY,
+            start_time=time(15), end_time=time(16),
+        )
+        generate_sessions_for(self.term)
+        sessions = Session.objects.filter(timetable_slot=slot).order_by('session_date')
+        counts = SessionAttendanceCounts.objects.filter(session__in=sessions)
+        self.assertEqual(counts.count(), sessions.count())
+        self.assertEqual(set(counts.values_list('expected_count', 'marked_count',
+                                                'unmarked_count')),
+                         {(len(self.student_ids), 0, len(self.student_ids))})
+
+        # Moving the slot to another class, here one student smaller,
+        # recounts its sessions for that class
+        other = Cohort.objects.exclude(pk=self.cohort.pk).filter(
+            academic_year_id=self.cohort.academic_year_id
+        ).order_by('pk').first()
+        other.students.filter(pk=other.students.order_by('pk').values('pk')[:1]).update(
+            status=StudentStatus.WITHDRAWN
+        )
+        AttendanceRecord.objects.create(session=sessions[0], student_id=self.student_ids[0],
+                                        status=AttendanceStatus.ABSENT)
+        slot.cohort = other
+        slot.save()
+        self.assertGreater(generate_sessions_for(self.term).updated, 0)
+        other_size = other.students.filter(status=StudentStatus.ACTIVE).count()
+        self.assertNotEqual(other_size, len(self.student_ids))
+        self.assertEqual(
+            self.counts(sessions[0]),
+            {**dict.fromkeys(COUNTER_FIELDS, 0), 'expected_count': other_size,
+             'marked_count': 1, 'unmarked_count': other_size - 1, 'absent_count': 1},
+        )
+
+    def test_unmarked_assigned_before_marked_count(self):
+        # MySQL evaluates SET left to right; unmarked_count must read the
+        # marked_count from before the update.
+        session = self.new_session()
+        with CaptureQueriesContext(connection) as queries:
+            AttendanceRecord.objects.create(session=session, student_id=self.student_ids[0],
+                                            status=AttendanceStatus.PRESENT)
+        table = SessionAttendanceCounts._meta.db_table
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith(f'UPDATE "{table}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertLess(updates[0].index('"unmarked_count" ='),
+                        updates[0].index('"marked_count" ='))
+
+
+class GenerateSessionsTests(SchoolTestCase):
+
+    def setUp(self):
+        self.slot = TimetableSlot.objects.create(
+            cohort=self.cohort, subject_id=self.subject_id, weekday=Weekday.MONDAY,
+            start_time=time(15), end_time=time(16),
+        )
+
+    def slot_sessions(self):
+        return Session.objects.filter(timetable_slot=self.slot)
+
+    def test_marked_sessions_are_kept(self):
+        result = generate_sessions_for(self.term)
+        self.assertEqual(result.created, self.slot_sessions().count())
+        self.assertGreater(result.created, 1)
+        marked = self.slot_sessions().order_by('session_date').first()
+        AttendanceRecord.objects.create(session=marked, student_id=self.student_ids[0],
+                                        status=AttendanceStatus.PRESENT)
+
+        self.slot.is_active = False
+        self.slot.save()
+        result = generate_sessions_for(self.term)
+        self.assertEqual(result.kept, [marked.pk])
+        self.assertGreater(result.deleted, 0)
+        self.assertEqual(list(self.slot_sessions().values_list('pk', flat=True)), [marked.pk])
+        self.assertTrue(AttendanceRecord.objects.filter(session=marked).exists())
+
+    def test_rerun_is_idempotent(self):
+        created = generate_sessions_for(self.term).created
+        result = generate_sessions_for(self.term)
+        self.assertEqual((result.created, result.updated, result.deleted, result.unchanged),
+                         (0, 0, 0, created))
+
+    def test_one_session_per_slot_and_date(self):
+        generate_sessions_for(self.term)
+        session = self.slot_sessions().first()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Session.objects.create(
+                term=self.term, subject_id=self.subject_id, cohort=self.cohort,
+                session_type=SessionType.LESSON, session_date=session.session_date,
+                timetable_slot=self.slot,
+            )
+
+
+class ClashTests(SchoolTestCase):
+
+    def test_generated_school_has_no_clashes(self):
+        for term in Term.objects.filter(sessions__isnull=False).distinct():
+            self.assertEqual(clashes.term_clashes(term.pk), [])
+
+    def test_venues_match_like_the_sweep(self):
+        booked = self.new_session(venue='Science  Lab', start_time=time(14), end_time=time(15))
+        self.assertEqual(booked.venue_key, 'science lab')
+        edit = Session(term=self.term, subject_id=self.subject_id, cohort=self.cohort,
+                       session_type=SessionType.LESSON, session_date=booked.session_date,
+                       venue=' SCIENCE lab', start_time=time(14, 30), end_time=time(15, 30))
+        found = clashes.session_clashes(edit)
+        self.assertEqual([(clash.kind, clash.first.pk) for clash in found],
+                         [(clashes.VENUE, booked.pk)])
+
+        edit.save()
+        self.assertEqual(
+            [(clash.kind, {clash.first.pk, clash.second.pk})
+             for clash in clashes.term_clashes(self.term.pk)],
+            [(clashes.VENUE, {booked.pk, edit.pk})],
+        )
+        booked.venue = 'Hall'
+        booked.save(update_fields=['venue'])
+        self.assertEqual(clashes.session_clashes(edit), [])
+
+
+@override_settings(ROOT_URLCONF='apps.academic.query_counts')
+class RollCallTests(SchoolTestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_login(get_user_model().objects.create_superuser(
+            email='teacher@synthetic.school', password=None, first_name='Roll', last_name='Call',
+        ))
+
+    def post(self, session, **payload):
+        return self.client.post(reverse('sessions:roll-call', args=[session.pk]), payload,
+                           format='json')
+
+    def register(self, session):
+        return {
+            student_id: (status, notes)
+            for student_id, status, notes in AttendanceRecord.objects.filter(
+                session=session
+            ).values_list('student_id', 'status', 'notes')
+        }
+
+    def test_register_replaces_existing_records(self):
+        session = self.new_session()
+        first, second = self.student_ids[:2]
+        AttendanceRecord.objects.create(session=session, student_id=first,
+                                        status=AttendanceStatus.ABSENT, notes='Sent home')
+        response = self.post(session, default_status=AttendanceStatus.PRESENT, exceptions=[
+            {'student': second, 'status': AttendanceStatus.LATE, 'notes': 'Bus'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['marked'], len(self.student_ids))
+        self.assertEqual(self.register(session), {
+            **{pk: (AttendanceStatus.PRESENT, '') for pk in self.student_ids},
+            second: (AttendanceStatus.LATE, 'Bus'),
+        })
+
+    def test_invalid_register_leaves_session_unchanged(self):
+        session = self.new_session(cohort=None)
+        outsider = Student.objects.exclude(cohort=self.cohort).values_list('pk', flat=True)[0]
+        response = self.post(session, cohort=self.cohort.pk,
+                             default_status=AttendanceStatus.PRESENT, exceptions=[
+                                 {'student': outsider, 'status': AttendanceStatus.ABSENT},
+                             ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['field'], 'student')
+        session.refresh_from_db()
+        self.assertIsNone(session.cohort_id)
+        self.assertEqual(self.register(session), {})
+
+        response = self.post(session, cohort=self.cohort.pk,
+                             default_status=AttendanceStatus.ABSENT)
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertEqual(session.cohort_id, self.cohort.pk)
+        self.assertEqual(set(self.register(session).values()), {(AttendanceStatus.ABSENT, '')})
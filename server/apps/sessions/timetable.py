@@ -0,0 +1,181 @@
+# ============================================================================
+# apps/sessions/timetable.py
+# Generate a term's sessions from the weekly timetable
+# ============================================================================
+#
+# The sessions a term should have are computed in memory: every active slot
+# on every matching weekday between the term's start and end dates, minus
+# exclusions. They are compared with the sessions already generated from
+# those slots by (slot, date), so regenerating only inserts the missing
+# sessions in bulk, deletes the ones no longer wanted and realigns the
+# times and venues of the rest. The resulting term is checked for venue and
+# instructor clashes in the same pass.
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from apps.academic.db import chunked
+
+from .clashes import Booking, find_clashes, term_bookings
+from .counters import rebuild_session_counts, recount_sessions
+from .models import Session, SessionExclusion, TimetableSlot, venue_key
+
+
+INSERT_CHUNK_SIZE = 2000
+
+SLOT_FIELDS = ['subject_id', 'cohort_id', 'session_type', 'start_time', 'end_time', 'venue',
+               'venue_key', 'instructor_id']
+
+
+@dataclass
+class GenerationResult:
+    term_id: int
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    # Sessions no longer on the timetable that are kept because they are marked
+    kept: list = field(default_factory=list)
+    # Venue and instructor clashes of the term as generated
+    clashes: list = field(default_factory=list)
+
+
+def _session_values(slot):
+    """Session field values a slot dictates"""
+    return {
+        'subject_id': slot.subject_id,
+        'cohort_id': slot.cohort_id,
+        'session_type': slot.session_type,
+        'start_time': slot.start_time,
+        'end_time': slot.end_time,
+        'venue': slot.venue,
+        'venue_key': venue_key(slot.venue),
+        'instructor_id': slot.instructor_id,
+    }
+
+
+def excluded_dates(term, cohort_ids, using=DEFAULT_DB_ALIAS):
+    """``{cohort_id: set of dates}`` without sessions; key None is the whole school"""
+    excluded = defaultdict(set)
+    for exclusion in SessionExclusion.objects.using(using).filter(
+        Q(cohort__isnull=True) | Q(cohort_id__in=cohort_ids),
+        start_date__lte=term.end_date, end_date__gte=term.start_date,
+    ):
+        day = max(exclusion.start_date, term.start_date)
+        while day <= min(exclusion.end_date, term.end_date):
+            excluded[exclusion.cohort_id].add(day)
+            day += timedelta(days=1)
+    return excluded
+
+
+def planned_sessions(term, slots, excluded):
+    """``{(slot_id, date): slot}`` of every session the timetable asks for"""
+    by_weekday = defaultdict(list)
+    for slot in slots:
+        by_weekday[slot.weekday].append(slot)
+    school = excluded.get(None, set())
+    planned = {}
+    day = term.start_date
+    while day <= term.end_date:
+        if day not in school:
+            for slot in by_weekday.get(day.weekday(), ()):
+                if day not in excluded.get(slot.cohort_id, ()):
+                    planned[(slot.pk, day)] = slot
+        day += timedelta(days=1)
+    return planned
+
+
+def generate_sessions(term, cohort_id=None, created_by='', dry_run=False,
+                      using=DEFAULT_DB_ALIAS):
+    """
+    Bring the term's timetabled sessions in line with the timetable of its
+    academic year's cohorts, or one cohort.
+
+    Sessions already marked are never deleted; they are reported in
+    ``kept``. Clashes are reported, not prevented. With ``dry_run`` the
+    differences are counted but nothing is written.
+    """
+    slots = TimetableSlot.objects.using(using).filter(
+        cohort__academic_year_id=term.academic_year_id
+    )
+    if cohort_id is not None:
+        slots = slots.filter(cohort_id=cohort_id)
+    slots = list(slots)
+    active = [slot for slot in slots if slot.is_active]
+    planned = planned_sessions(
+        term, active, excluded_dates(term, {slot.cohort_id for slot in active}, using)
+    )
+
+    result = GenerationResult(term_id=term.pk)
+    with transaction.atomic(using=using):
+        existing = Session.objects.using(using).filter(
+            term_id=term.pk, timetable_slot__in=[slot.pk for slot in slots]
+        ).only('pk', 'timetable_slot_id', 'session_date', *SLOT_FIELDS)
+        if not dry_run:
+            # Marking a register takes a key lock on its session, so nothing
+            # seen unmarked here can be marked before the delete below.
+            existing = existing.select_for_update()
+
+        stale, realign, generated = [], [], set()
+        for session in existing:
+            key = (session.timetable_slot_id, session.session_date)
+            slot = planned.get(key)
+            if slot is None or key in generated:
+                stale.append(session.pk)
+                continue
+            generated.add(key)
+            values = _session_values(slot)
+            if any(getattr(session, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(session, name, value)
+                realign.append(session)
+            else:
+                result.unchanged += 1
+
+        missing = [
+            Session(term_id=term.pk, timetable_slot_id=slot.pk, session_date=day,
+                    created_by=created_by, **_session_values(slot))
+            for (slot_id, day), slot in sorted(planned.items(), key=lambda item: item[0][1])
+            if (slot_id, day) not in generated
+        ]
+
+        marked = set(
+            Session.objects.using(using).filter(pk__in=stale, attendance_records__isnull=False)
+            .values_list('pk', flat=True).distinct()
+        ) if stale else set()
+        result.kept = sorted(marked)
+        removable = [pk for pk in stale if pk not in marked]
+        result.created, result.updated, result.deleted = (
+            len(missing), len(realign), len(removable)
+        )
+        result.clashes = find_clashes([
+            *term_bookings(term.pk, exclude=removable + [session.pk for session in realign],
+                           using=using),
+            *(Booking.of(session) for session in realign),
+            *(Booking.of(session) for session in missing),
+        ])
+        if dry_run:
+            return result
+
+        deleted = 0
+        for chunk in chunked(removable, INSERT_CHUNK_SIZE):
+            _, per_model = Session.objects.using(using).filter(
+                pk__in=chunk, attendance_records__isnull=True
+            ).delete()
+            deleted += per_model.get(Session._meta.label, 0)
+        result.deleted = deleted
+        if realign:
+            Session.objects.using(using).bulk_update(realign, SLOT_FIELDS,
+                                                     batch_size=INSERT_CHUNK_SIZE)
+        # A concurrent run may have inserted some of them; (slot, date) is unique.
+        Session.objects.using(using).bulk_create(missing, batch_size=INSERT_CHUNK_SIZE,
+                                                 ignore_conflicts=True)
+        # bulk writes skip the signals that keep session counters
+        recount_sessions([session.pk for session in realign], using)
+        if missing:
+            rebuild_session_counts(term.pk, missing_only=True, using=using)
+    return result
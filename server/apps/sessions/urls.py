@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'sessions'
+
+urlpatterns = [
+    path('', views.SessionListView.as_view(), name='session-list'),
+    path('unmarked/', views.UnmarkedRegistersView.as_view(), name='unmarked-registers'),
+    path('<int:pk>/roll-call/', views.RollCallView.as_view(), name='roll-call'),
+    path('terms/<int:pk>/generate/', views.GenerateSessionsView.as_view(),
+         name='generate-sessions'),
+    path('terms/<int:pk>/clashes/', views.TermClashesView.as_view(), name='term-clashes'),
+]
@@ -1,3 +1,182 @@
-from django.shortcuts import render
+# ============================================================================
+# apps/sessions/views.py
+# Session and attendance API views
+# ============================================================================
 
-# Create your views here.
+from django.db import transaction
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.academic.models import Term
+
+from .clashes import term_clashes
+from .models import Session
+from .roll_call import mark_roll_call
+from .serializers import (
+    GenerateSessionsSerializer, RollCallSerializer, SessionListSerializer,
+    UnmarkedRegistersSerializer,
+)
+from .timetable import generate_sessions
+
+
+# Session columns, and its attendance counters, read in one joined query
+SESSION_FIELDS = ['id', 'session_date', 'start_time', 'end_time', 'session_type', 'title',
+                  'venue', 'subject_id', 'cohort_id', 'instructor_id', 'timetable_slot_id']
+
+SESSION_RELATED = {
+    'subject_name': 'subject__name',
+    'cohort_name': 'cohort__name',
+    'expected': 'attendance_counts__expected_count',
+    'marked': 'attendance_counts__marked_count',
+    'unmarked': 'attendance_counts__unmarked_count',
+    'present': 'attendance_counts__present_count',
+    'absent': 'attendance_counts__absent_count',
+    'late': 'attendance_counts__late_count',
+    'excused': 'attendance_counts__excused_count',
+    'sick': 'attendance_counts__sick_count',
+}
+
+
+def _session_rows(sessions):
+    return list(sessions.order_by('session_date', 'start_time', 'pk').values(
+        *SESSION_FIELDS, **{name: F(path) for name, path in SESSION_RELATED.items()}
+    ))
+
+
+def _filter_scope(sessions, data):
+    for name in ('term', 'cohort', 'subject', 'instructor'):
+        if data.get(name) is not None:
+            sessions = sessions.filter(**{name: data[name]})
+    return sessions
+
+
+class SessionListView(APIView):
+    """
+    GET ?term=<id>[&cohort=<id>][&subject=<id>][&instructor=<id>]
+    [&start=YYYY-MM-DD][&end=YYYY-MM-DD]
+
+    The term's sessions with their attendance counters, in date order.
+    """
+
+    def get(self, request):
+        params = SessionListSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        sessions = _filter_scope(Session.objects.all(), data)
+        if data.get('start'):
+            sessions = sessions.filter(session_date__gte=data['start'])
+        if data.get('end'):
+            sessions = sessions.filter(session_date__lte=data['end'])
+        rows = _session_rows(sessions)
+        return Response({'count': len(rows), 'sessions': rows})
+
+
+class UnmarkedRegistersView(APIView):
+    """
+    GET [?term=<id>][&cohort=<id>][&instructor=<id>][&until=YYYY-MM-DD]
+
+    Sessions up to ``until`` (today) whose class is not fully marked yet.
+    """
+
+    def get(self, request):
+        params = UnmarkedRegistersSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+        until = data.get('until') or timezone.localdate()
+        rows = _session_rows(_filter_scope(Session.objects.all(), data).filter(
+            session_date__lte=until, attendance_counts__unmarked_count__gt=0,
+        ))
+        return Response({'until': until, 'count': len(rows),
+                         'unmarked': sum(row['unmarked'] for row in rows), 'sessions': rows})
+
+
+class RollCallView(APIView):
+    """
+    POST {"default_status": "PRESENT", "exceptions": [{"student": <id>,
+    "status": "ABSENT", "notes": ""}, ...], "marked_by": "..."}
+
+    Marks the whole register of the session's cohort in one request:
+    every active student gets the default status except those listed.
+    A session without a cohort takes ``cohort`` from the request.
+    Nothing is saved if any exception is invalid.
+    """
+
+    def post(self, request, pk):
+        session = get_object_or_404(Session, pk=pk)
+        payload = RollCallSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        data = payload.validated_data
+
+        cohort = data.get('cohort')
+        if session.cohort_id is None and cohort is None:
+            return Response({'cohort': ["This session has no class; pass its cohort."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if cohort is not None and session.cohort_id not in (None, cohort.pk):
+            return Response({'cohort': ["The session belongs to another class."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        marked_by = data.get('marked_by')
+        if marked_by is None and request.user.is_authenticated:
+            marked_by = request.user.get_username()
+        # A register that fails validation must not leave its class on the session.
+        with transaction.atomic():
+            if session.cohort_id is None:
+                session.cohort = cohort
+                session.save(update_fields=['cohort'])
+            counts, errors = mark_roll_call(
+                session, data['default_status'], data['exceptions'], marked_by=marked_by or '',
+            )
+            if errors:
+                transaction.set_rollback(True)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'session': session.pk, 'marked': sum(counts.values()),
+                         'statuses': counts})
+
+
+class GenerateSessionsView(APIView):
+    """
+    POST {"cohort": <id>, "dry_run": false}
+
+    Creates the term's sessions from the timetable, or one cohort's, and
+    removes timetabled sessions that no longer fit it. Rerunning only
+    applies the difference; marked sessions are never removed.
+    """
+
+    def post(self, request, pk):
+        term = get_object_or_404(Term, pk=pk)
+        payload = GenerateSessionsSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        cohort = payload.validated_data.get('cohort')
+        result = generate_sessions(
+            term, cohort.pk if cohort else None,
+            created_by=request.user.get_username() if request.user.is_authenticated else '',
+            dry_run=payload.validated_data['dry_run'],
+        )
+        return Response({
+            'term': term.pk,
+            'created': result.created,
+            'updated': result.updated,
+            'deleted': result.deleted,
+            'unchanged': result.unchanged,
+            'kept': result.kept,
+            'clashes': [clash.as_dict() for clash in result.clashes],
+            'dry_run': payload.validated_data['dry_run'],
+        })
+
+
+class TermClashesView(APIView):
+    """
+    GET: every venue and instructor double-booking among the term's
+    sessions, by date and time.
+    """
+
+    def get(self, request, pk):
+        term = get_object_or_404(Term, pk=pk)
+        clashes = term_clashes(term.pk)
+        return Response({'term': term.pk, 'count': len(clashes),
+                         'clashes': [clash.as_dict() for clash in clashes]})